@@ -79,7 +79,7 @@ export default function StoryPage() {
           }
         }
 
-        const storyRes = await fetch(`http://127.0.0.1:8000/api/stories`, {
+        const storyRes = await fetch(`http://127.0.0.1:8000/api/stories?view=summary`, {
           method: "GET",
           headers: { "Content-Type": "application/json" },
         });
@@ -0,0 +1,51 @@
+"""Compare two benchmark reports produced by benchmarks.run.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any route's p95 regressed by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline: dict, candidate: dict, metric: str = "p95_ms"):
+    rows = []
+    for phase, base_phase in baseline["phases"].items():
+        cand_routes = candidate["phases"].get(phase, {}).get("routes", {})
+        for route, base in base_phase["routes"].items():
+            cand = cand_routes.get(route)
+            if cand is None:
+                continue
+            before, after = base[metric], cand[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((phase, route, before, after, change))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    regressed = False
+    print(f"{'phase':<12} {'route':<45} {'before':>10} {'after':>10} {'change':>8}")
+    for phase, route, before, after, change in compare(baseline, candidate, args.metric):
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{phase:<12} {route:<45} {before:>10.2f} {after:>10.2f} {change:>7.1f}%{flag}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
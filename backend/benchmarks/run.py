@@ -0,0 +1,155 @@
+"""Seed a synthetic dataset into a fresh database and load-test the API.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --mode inprocess --output before.json
+    python -m benchmarks.run --mode http --students 40 --requests 5000
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+import httpx
+
+from benchmarks.seed import Scale, seed_dataset
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--db", help="SQLite file to create (default: a temporary file)")
+    parser.add_argument("--schools", type=int, default=Scale.schools)
+    parser.add_argument("--classes", type=int, default=Scale.classes, help="classes per school")
+    parser.add_argument("--students", type=int, default=Scale.students, help="students per class")
+    parser.add_argument("--stories", type=int, default=Scale.stories, help="stories per class")
+    parser.add_argument("--paragraphs", type=int, default=Scale.paragraphs, help="paragraphs per story")
+    parser.add_argument("--attempts", type=int, default=Scale.attempts, help="attempts per student")
+    parser.add_argument("--requests", type=int, default=2000, help="requests in the mixed phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--port", type=int, default=0, help="uvicorn port for --mode http (default: free port)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument(
+        "--rate-limits", action="store_true",
+        help="keep admission control on (every simulated client shares one IP, so most requests get 429)",
+    )
+    return parser.parse_args(argv)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_uvicorn(port: int, env: dict) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/challenges/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+async def _drive(client: httpx.AsyncClient, seeded, args) -> dict:
+    from benchmarks.workload import login_burst, mixed_workload
+
+    login_summary, tokens = await login_burst(client, seeded)
+    mixed_summary = await mixed_workload(client, seeded, tokens, args.requests, args.concurrency, args.seed)
+    return {"login_burst": login_summary, "mixed": mixed_summary}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scale = Scale(args.schools, args.classes, args.students, args.stories, args.paragraphs, args.attempts)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["SQL_ECHO"] = "0"
+    # core.admission reads this at import time, for --mode http in the uvicorn child too
+    os.environ["ADMISSION_ENABLED"] = "1" if args.rate_limits else "0"
+
+    # database reads DATABASE_URL at import time, so import only after it is set
+    from database import create_db_and_tables, engine
+
+    seed_start = time.perf_counter()
+    create_db_and_tables()
+    seeded = seed_dataset(engine, scale, seed=args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+    engine.dispose()
+
+    process = None
+    try:
+        if args.mode == "inprocess":
+            from main import app
+
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://benchmark"
+        else:
+            port = args.port or _free_port()
+            process = _start_uvicorn(port, dict(os.environ))
+            transport = None
+            base_url = f"http://127.0.0.1:{port}"
+
+        async def run():
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+                return await _drive(client, seeded, args)
+
+        phases = asyncio.run(run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "mode": args.mode,
+            "scale": asdict(scale),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 3),
+            "python": platform.python_version(),
+            "database": db_path,
+        },
+        "phases": phases,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlmodel import Session, SQLModel
+
+from core.security import get_password_hash
+from models.challenge import ChallengeAttempt, ChallengeProgress
+from models.circuit import Circuit
+from models.class_model import Class, ClassStory, ClassStudent
+from models.paragraph import Paragraph
+from models.story import Story
+from models.user import User
+
+TEACHER_PASSWORD = "benchmark"
+CHALLENGE_IDS = list(range(1, 26))
+
+
+@dataclass
+class Scale:
+    schools: int = 2
+    classes: int = 3
+    students: int = 25
+    stories: int = 3
+    paragraphs: int = 10
+    attempts: int = 5
+
+    @property
+    def total_students(self) -> int:
+        return self.schools * self.classes * self.students
+
+
+@dataclass
+class SeededData:
+    teacher_emails: List[str] = field(default_factory=list)
+    class_ids: List[int] = field(default_factory=list)
+    story_ids: List[int] = field(default_factory=list)
+    # class id -> login codes of its students
+    student_codes: Dict[int, List[str]] = field(default_factory=dict)
+
+
+def _sample_circuit(rng: random.Random, size: int) -> dict:
+    kinds = ["battery", "bulb", "resistor", "switch", "wire"]
+    components = []
+    for index in range(size):
+        components.append({
+            "id": f"c{index}",
+            "type": rng.choice(kinds),
+            "x": rng.randint(0, 800),
+            "y": rng.randint(0, 600),
+            "rotation": rng.choice([0, 90, 180, 270]),
+            "connections": [f"c{rng.randrange(size)}" for _ in range(2)],
+        })
+    return {"components": components}
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    vocabulary = ["the", "fox", "river", "castle", "little", "girl", "boat", "sun", "forest", "ran", "saw", "quietly"]
+    return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+
+def seed_dataset(engine, scale: Scale, seed: int = 1234) -> SeededData:
+    rng = random.Random(seed)
+    SQLModel.metadata.create_all(engine)
+    # Hashing is deliberately slow, so every synthetic teacher shares one hash
+    password_hash = get_password_hash(TEACHER_PASSWORD)
+    seeded = SeededData()
+
+    with Session(engine) as session:
+        student_counter = 0
+        for school in range(scale.schools):
+            teacher = User(
+                name=f"Teacher{school}",
+                surname="Bench",
+                email=f"teacher{school}@bench.local",
+                password=password_hash,
+                type="teacher",
+            )
+            session.add(teacher)
+            session.flush()
+            seeded.teacher_emails.append(teacher.email)
+
+            for class_index in range(scale.classes):
+                class_obj = Class(class_name=f"S{school}-C{class_index}", teacher_id=teacher.id)
+                session.add(class_obj)
+                session.flush()
+                seeded.class_ids.append(class_obj.id)
+
+                students = []
+                for _ in range(scale.students):
+                    student_counter += 1
+                    students.append(User(
+                        name=f"Student{student_counter}",
+                        surname="Bench",
+                        email=f"student{student_counter}@bench.local",
+                        password=password_hash,
+                        type="student",
+                        code=f"B{student_counter:07d}",
+                    ))
+                session.add_all(students)
+                session.flush()
+                seeded.student_codes[class_obj.id] = [s.code for s in students]
+                session.add_all(ClassStudent(class_id=class_obj.id, student_id=s.id) for s in students)
+
+                for story_index in range(scale.stories):
+                    story = Story(
+                        title=f"Story {school}.{class_index}.{story_index}",
+                        author="Benchmark",
+                        short_description=_sentence(rng, 8),
+                        content=" ".join(_sentence(rng, 12) for _ in range(scale.paragraphs * 3)),
+                    )
+                    session.add(story)
+                    session.flush()
+                    seeded.story_ids.append(story.id)
+                    session.add(ClassStory(class_id=class_obj.id, story_id=story.id))
+                    session.add_all(
+                        Paragraph(
+                            story_id=story.id,
+                            user_id=students[order % len(students)].id,
+                            content=" ".join(_sentence(rng, 12) for _ in range(3)),
+                            drawing="data:image/png;base64," + "A" * rng.randint(2000, 8000),
+                            order=order,
+                        )
+                        for order in range(scale.paragraphs)
+                    )
+
+                for student in students:
+                    challenge_ids = rng.sample(CHALLENGE_IDS, min(scale.attempts, len(CHALLENGE_IDS)))
+                    for challenge_id in challenge_ids:
+                        session.add(ChallengeAttempt(
+                            user_id=student.id,
+                            challenge_id=challenge_id,
+                            data=_sample_circuit(rng, rng.randint(4, 20)),
+                        ))
+                        completions = rng.randint(0, 3)
+                        if completions:
+                            session.add(ChallengeProgress(
+                                user_id=student.id,
+                                challenge_id=challenge_id,
+                                completed=True,
+                                completion_count=completions,
+                                points_earned=50 * completions,
+                            ))
+                    session.add(Circuit(user_id=student.id, name="saved", data=_sample_circuit(rng, 10)))
+            session.commit()
+
+    return seeded
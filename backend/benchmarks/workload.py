@@ -0,0 +1,159 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.seed import CHALLENGE_IDS, SeededData, _sample_circuit
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.client_errors: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = self.started
+
+    async def timed(self, name: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        finally:
+            self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 500:
+            self.errors[name] += 1
+        elif response.status_code >= 400:
+            self.client_errors[name] += 1
+        return response
+
+    def summary(self) -> dict:
+        elapsed = max(self.finished - self.started, 1e-9)
+        routes = {}
+        for name, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            routes[name] = {
+                "count": len(ordered),
+                "errors": self.errors.get(name, 0),
+                "client_errors": self.client_errors.get(name, 0),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def login_burst(client: httpx.AsyncClient, seeded: SeededData) -> Tuple[dict, Dict[int, List[str]]]:
+    """Every class logs in at once, the way a lesson starts."""
+    recorder = Recorder()
+    tokens: Dict[int, List[str]] = {}
+
+    async def login(class_id: int, code: str):
+        response = await recorder.timed("POST /api/login", client.post("/api/login", json={"code": code}))
+        if response is not None and response.status_code == 200:
+            tokens.setdefault(class_id, []).append(response.json()["access_token"])
+
+    await asyncio.gather(*(
+        login(class_id, code)
+        for class_id, codes in seeded.student_codes.items()
+        for code in codes
+    ))
+    recorder.finished = time.perf_counter()
+    return recorder.summary(), tokens
+
+
+OPERATIONS = (
+    ("autosave", 50),
+    ("leaderboard", 15),
+    ("class_populated", 10),
+    ("attempt_read", 10),
+    ("story_paragraphs", 10),
+    ("complete", 5),
+)
+
+
+def plan_operations(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    names = [name for name, _ in OPERATIONS]
+    weights = [weight for _, weight in OPERATIONS]
+    return rng.choices(names, weights=weights, k=count)
+
+
+async def mixed_workload(
+    client: httpx.AsyncClient,
+    seeded: SeededData,
+    tokens: Dict[int, List[str]],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    recorder = Recorder()
+    plan = plan_operations(requests, seed)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, name in enumerate(plan):
+        queue.put_nowait((index, name))
+    class_ids = [class_id for class_id in seeded.class_ids if tokens.get(class_id)]
+    if not class_ids:
+        raise RuntimeError("No student could log in; cannot run the mixed workload")
+
+    async def worker():
+        while not queue.empty():
+            index, name = queue.get_nowait()
+            rng = random.Random(seed * 1_000_003 + index)
+            class_id = rng.choice(class_ids)
+            headers = {"Authorization": f"Bearer {rng.choice(tokens[class_id])}"}
+            challenge_id = rng.choice(CHALLENGE_IDS)
+
+            if name == "autosave":
+                body = {"challenge_id": challenge_id, "data": _sample_circuit(rng, rng.randint(4, 20))}
+                await recorder.timed("POST /challenges/attempt", client.post("/challenges/attempt", json=body, headers=headers))
+            elif name == "leaderboard":
+                await recorder.timed("GET /challenges/leaderboard/top", client.get("/challenges/leaderboard/top"))
+            elif name == "class_populated":
+                await recorder.timed(
+                    "GET /api/classes/{class_id}?populate=true",
+                    client.get(f"/api/classes/{class_id}", params={"populate": "true"}),
+                )
+            elif name == "attempt_read":
+                await recorder.timed(
+                    "GET /challenges/attempt/{challenge_id}",
+                    client.get(f"/challenges/attempt/{challenge_id}", headers=headers),
+                )
+            elif name == "story_paragraphs":
+                story_id = rng.choice(seeded.story_ids)
+                await recorder.timed(
+                    "GET /api/stories/{story_id}/paragraphs",
+                    client.get(f"/api/stories/{story_id}/paragraphs"),
+                )
+            elif name == "complete":
+                await recorder.timed(
+                    "POST /challenges/complete/{challenge_id}",
+                    client.post(f"/challenges/complete/{challenge_id}", headers=headers),
+                )
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
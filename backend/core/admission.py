@@ -0,0 +1,165 @@
+import functools
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from core import security
+from core.metrics import Counter, registry
+from core.tenancy import bearer_token
+
+# Off only for load tests, where every simulated client shares one IP
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Requests handled at once before lower priorities are shed
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "200"))
+MAX_BUCKETS = 50000
+EXEMPT_PATHS = ("/metrics",)
+
+# Specific routes first; everything else is classed by method
+ROUTE_CLASSES = (
+    ("POST", "/api/login", "auth"),
+    ("POST", "/api/register", "auth"),
+    ("POST", "/challenges/attempt", "autosave"),
+    ("POST", "/api/sync", "autosave"),
+)
+
+# Share of MAX_IN_FLIGHT a class may still use: autosaves go first when the server is
+# busy (the client retries with the latest state anyway), logins last
+SHED_AT = {"autosave": 0.5, "write": 0.75, "read": 0.9, "auth": 1.0}
+
+
+def _limit(name: str, rate: float, burst: float) -> Tuple[float, float]:
+    # ADMISSION_RATE_<CLASS>="<tokens per second>,<burst>"
+    configured = os.getenv(f"ADMISSION_RATE_{name.upper()}")
+    if configured:
+        rate, burst = (float(part) for part in configured.split(","))
+    return rate, burst
+
+
+# Logins are limited per IP, and a whole class behind one school NAT logs in together
+RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "auth": _limit("auth", 1.0, 60),
+    "autosave": _limit("autosave", 2.0, 10),
+    "write": _limit("write", 5.0, 30),
+    "read": _limit("read", 20.0, 100),
+    "ip": _limit("ip", 100.0, 400),
+}
+
+REJECTIONS = registry.register(Counter(
+    "admission_rejections_total",
+    "Requests turned away by admission control",
+    ("route_class", "reason"),
+))
+
+
+class TokenBuckets:
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: str) -> float:
+        """Take a token from ``key``'s bucket; returns 0 when allowed, otherwise the
+        seconds until a token is available."""
+        rate, burst = RATE_LIMITS[limit]
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((key, limit))
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._prune(now)
+                bucket = self._buckets[(key, limit)] = [burst, now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / rate
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely are the same as new ones
+        for key in [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * RATE_LIMITS[key[1]][0] >= RATE_LIMITS[key[1]][1]
+        ]:
+            del self._buckets[key]
+        if len(self._buckets) >= MAX_BUCKETS:
+            self._buckets.clear()
+
+
+def route_class(method: str, path: str) -> str:
+    for class_method, prefix, name in ROUTE_CLASSES:
+        if method == class_method and (path == prefix or path.startswith(prefix + "/")):
+            return name
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+@functools.lru_cache(maxsize=4096)
+def _token_subject(token: str) -> Optional[str]:
+    # Only verified tokens name a user, so made-up tokens cannot mint fresh buckets
+    try:
+        payload = security.decode_access_token(token)
+    except Exception:
+        return None
+    subject = payload.get("sub")
+    return f"{payload.get('tenant', '')}:{subject}" if subject else None
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Token buckets per client IP and per user (or IP) and route class, plus load
+    shedding by route class once too many requests are in flight."""
+
+    def __init__(self, app):
+        self.app = app
+        self.buckets = TokenBuckets()
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not ADMISSION_ENABLED or scope["type"] != "http" or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        # A batch's sub-requests already hold its in-flight slot, but each one still pays
+        # its own route class, so a batch of logins is limited like separate logins
+        in_batch = scope.get("batch", False)
+        if not in_batch and self.in_flight >= MAX_IN_FLIGHT * SHED_AT[name]:
+            REJECTIONS.inc(name, "overloaded")
+            await _reject(503, "Server is busy, try again shortly", 1)(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ip = client[0] if client else "-"
+        token = bearer_token(scope)
+        subject = _token_subject(token) if token and name != "auth" else None
+        wait = self.buckets.take(f"ip:{ip}", "ip") or self.buckets.take(
+            f"user:{subject}" if subject else f"ip:{ip}", name
+        )
+        if wait:
+            REJECTIONS.inc(name, "rate_limited")
+            await _reject(429, "Too many requests", wait)(scope, receive, send)
+            return
+
+        if in_batch:
+            await self.app(scope, receive, send)
+            return
+        # The ASGI app runs on one event loop, so the counter needs no lock
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, event, insert, or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from core import blobs
+from models.archive import ArchivedRecord
+from models.challenge import ChallengeAttempt
+from models.class_model import Class
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; archives fall back to zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+# Attempts and finalized stories untouched for longer than a school term are archived
+ARCHIVE_TERM_DAYS = int(os.getenv("ARCHIVE_TERM_DAYS", "150"))
+BATCH_SIZE = 500
+ZSTD_LEVEL = 19
+
+
+def term_cutoff(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=ARCHIVE_TERM_DAYS)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands datetimes back without their zone; everything is stored in UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _pack(record: dict):
+    line = blobs.canonical_json(record) + b"\n"
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(line)
+    return "zlib", zlib.compress(line, 9)
+
+
+def _unpack(codec: str, data: bytes) -> dict:
+    return json.loads(blobs.decompress(codec, data))
+
+
+class _ArchiveFile:
+    """One archive file per batch: a JSON line per record, each compressed as its own
+    frame. Concatenated zstd frames are still a valid .jsonl.zst stream, and the index
+    keeps every frame's offset so a single record is read without the rest."""
+
+    def __init__(self, tenant: str, kind: str):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        extension = "jsonl.zst" if zstandard is not None else "jsonl.zz"
+        self.path = f"{tenant}/{kind}-{stamp}-{uuid.uuid4().hex[:8]}.{extension}"
+        self.kind = kind
+        self.entries: List[dict] = []
+        self._handle = None
+        self._offset = 0
+
+    def add(self, owner_id: int, ref_id: int, recorded_at: Optional[datetime], record: dict):
+        if self._handle is None:
+            full_path = os.path.join(ARCHIVE_DIR, self.path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self._handle = open(full_path, "xb")
+        codec, frame = _pack(record)
+        self._handle.write(frame)
+        self.entries.append({
+            "kind": self.kind, "owner_id": owner_id, "ref_id": ref_id, "path": self.path,
+            "offset": self._offset, "length": len(frame), "codec": codec,
+            "recorded_at": recorded_at, "archived_at": datetime.now(timezone.utc),
+        })
+        self._offset += len(frame)
+
+    def close(self):
+        # On disk before the rows it replaces are deleted
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+
+
+def read_record(entry: ArchivedRecord) -> dict:
+    with open(os.path.join(ARCHIVE_DIR, entry.path), "rb") as handle:
+        handle.seek(entry.offset)
+        return _unpack(entry.codec, handle.read(entry.length))
+
+
+def archive_attempts(engine: Engine, tenant: str, cutoff: datetime) -> int:
+    """Move attempts last changed before ``cutoff`` into archive files; returns how many."""
+    # Attempts from before change tracking have no timestamp and are older than any term
+    stale = or_(ChallengeAttempt.updated_at < cutoff, ChallengeAttempt.updated_at == None)  # noqa: E711
+    moved = 0
+    while True:
+        archive = _ArchiveFile(tenant, "attempt")
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(ChallengeAttempt.__table__).where(stale)
+                .order_by(ChallengeAttempt.id).limit(BATCH_SIZE).with_for_update()
+            ).all()
+            if not rows:
+                break
+            try:
+                for row in rows:
+                    data = row.data
+                    if data is None and row.data_hash:
+                        # The blob is reclaimed once nothing references it, so the payload goes along
+                        data = blobs.load(connection, row.data_hash)
+                    record = {
+                        "id": row.id, "user_id": row.user_id, "challenge_id": row.challenge_id,
+                        "data": data, "data_hash": row.data_hash, "revision": row.revision,
+                        "updated_at": _as_utc(row.updated_at).isoformat() if row.updated_at else None,
+                    }
+                    archive.add(row.user_id, row.challenge_id, _as_utc(row.updated_at), record)
+            finally:
+                archive.close()
+            connection.execute(insert(ArchivedRecord), archive.entries)
+            # Plain DELETEs: archiving is not a user deletion, so no sync tombstones are written
+            connection.execute(delete(ChallengeAttempt).where(ChallengeAttempt.id.in_([row.id for row in rows])))
+        moved += len(rows)
+    return moved
+
+
+def _finalized_at(entry: dict) -> Optional[datetime]:
+    try:
+        return _as_utc(datetime.fromisoformat(entry["finalized_at"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def archive_finalized_stories(engine: Engine, tenant: str, cutoff: datetime) -> int:
+    """Move finalized stories older than ``cutoff`` out of Class.finalized_stories."""
+    moved = 0
+    last_id = 0
+    now = datetime.now(timezone.utc).isoformat()
+    while True:
+        archive = _ArchiveFile(tenant, "story")
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(Class.id, Class.finalized_stories)
+                .where(Class.id > last_id, Class.finalized_stories != None)  # noqa: E711
+                .order_by(Class.id).limit(BATCH_SIZE).with_for_update()
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            remaining: Dict[int, list] = {}
+            try:
+                for class_id, raw in rows:
+                    try:
+                        finalized = json.loads(raw)
+                    except ValueError:
+                        continue
+                    kept = []
+                    for entry in finalized:
+                        finalized_at = _finalized_at(entry)
+                        if finalized_at is None:
+                            # Finalized before timestamps were kept: the term starts counting now
+                            kept.append({**entry, "finalized_at": now})
+                        elif finalized_at < cutoff:
+                            archive.add(class_id, entry.get("story_id") or 0, finalized_at, entry)
+                        else:
+                            kept.append(entry)
+                    if kept != finalized:
+                        remaining[class_id] = kept
+            finally:
+                archive.close()
+            if archive.entries:
+                connection.execute(insert(ArchivedRecord), archive.entries)
+            for class_id, kept in remaining.items():
+                connection.execute(
+                    update(Class).where(Class.id == class_id)
+                    .values(finalized_stories=json.dumps(kept) if kept else None)
+                )
+        moved += len(archive.entries)
+    return moved
+
+
+def compact(engine: Engine, tables: Iterable[str] = ("challengeattempt", "classes")):
+    # VACUUM cannot run inside a transaction and needs every other writer to be idle,
+    # so a failure here is logged and the next run tries again
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if engine.dialect.name == "sqlite":
+            statements = ["ANALYZE", "VACUUM"]
+        else:
+            statements = [f'VACUUM ANALYZE "{table}"' for table in tables]
+        for statement in statements:
+            try:
+                connection.execute(text(statement))
+            except Exception:
+                logger.warning("%s failed", statement, exc_info=True)
+
+
+def find_archived_attempt(session: Session, user_id: int, challenge_id: int) -> Optional[ChallengeAttempt]:
+    entry = session.execute(
+        select(ArchivedRecord).where(
+            ArchivedRecord.kind == "attempt", ArchivedRecord.owner_id == user_id, ArchivedRecord.ref_id == challenge_id
+        ).order_by(ArchivedRecord.id.desc()).limit(1)
+    ).scalars().first()
+    if entry is None:
+        return None
+    record = read_record(entry)
+    updated_at = record.get("updated_at")
+    # Detached: it is read from the archive and never flushed back
+    return ChallengeAttempt(
+        id=record["id"], user_id=record["user_id"], challenge_id=record["challenge_id"],
+        data=record["data"], data_hash=record.get("data_hash"), revision=record.get("revision") or 0,
+        updated_at=datetime.fromisoformat(updated_at) if updated_at else None,
+    )
+
+
+def forget_archived_attempt(session: Session, user_id: int, challenge_id: int) -> bool:
+    # The frame stays in its file; without an index entry it is never read again
+    result = session.execute(
+        delete(ArchivedRecord).where(
+            ArchivedRecord.kind == "attempt", ArchivedRecord.owner_id == user_id, ArchivedRecord.ref_id == challenge_id
+        )
+    )
+    session.commit()
+    return result.rowcount > 0
+
+
+def archived_finalized_stories(session: Session, class_ids: List[int]) -> Dict[int, list]:
+    entries = session.execute(
+        select(ArchivedRecord)
+        .where(ArchivedRecord.kind == "story", ArchivedRecord.owner_id.in_(class_ids))
+        .order_by(ArchivedRecord.owner_id, ArchivedRecord.recorded_at, ArchivedRecord.id)
+    ).scalars().all()
+    stories: Dict[int, list] = {}
+    for entry in entries:
+        stories.setdefault(entry.owner_id, []).append(read_record(entry))
+    return stories
+
+
+def iter_archived_stories(session: Session, class_id: int, story_id: Optional[int] = None) -> Iterator[dict]:
+    # Only the index rows are loaded up front; each story is read from its file when reached
+    statement = select(ArchivedRecord).where(ArchivedRecord.kind == "story", ArchivedRecord.owner_id == class_id)
+    if story_id is not None:
+        statement = statement.where(ArchivedRecord.ref_id == story_id)
+    entries = session.execute(statement.order_by(ArchivedRecord.recorded_at, ArchivedRecord.id)).scalars().all()
+    for entry in entries:
+        yield read_record(entry)
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _drop_superseded_attempts(session, flush_context, instances):
+    # Creating or deleting the live attempt replaces whatever was archived for the same
+    # challenge, so neither reads nor grading fall back to the older archived work
+    keys = {
+        (obj.user_id, obj.challenge_id)
+        for obj in list(session.new) + list(session.deleted) if isinstance(obj, ChallengeAttempt)
+    }
+    for user_id, challenge_id in keys:
+        session.connection().execute(
+            delete(ArchivedRecord).where(
+                ArchivedRecord.kind == "attempt", ArchivedRecord.owner_id == user_id,
+                ArchivedRecord.ref_id == challenge_id,
+            )
+        )
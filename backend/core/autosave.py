@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from core.metrics import Counter, registry
+from crud.challenge import get_attempt, save_attempt
+from database import current_tenant, get_engine, in_shared_transaction
+from models.challenge import ChallengeAttempt
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("AUTOSAVE_FLUSH_INTERVAL", "2.0"))
+# Flush early when this many distinct attempts are waiting
+MAX_PENDING = int(os.getenv("AUTOSAVE_MAX_PENDING", "500"))
+# The buffer lives in one process: behind several workers a read served by another
+# process would miss saves still buffered here, so every save writes through instead
+BUFFERING_ENABLED = int(os.getenv("WEB_CONCURRENCY", "1")) <= 1
+
+AUTOSAVES = registry.register(Counter(
+    "attempt_autosaves_total",
+    "Attempt autosaves by how they reached the database",
+    ("result",),
+))
+
+Key = Tuple[str, int, int]
+
+# (tenant, user_id, challenge_id) -> (attempt id, latest data); only the newest save per key survives
+_pending: Dict[Key, Tuple[int, dict]] = {}
+# Entries taken by a running flush, still served to readers until committed
+_flushing: Dict[Key, Tuple[int, dict]] = {}
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _lookup(key: Key) -> Optional[Tuple[int, dict]]:
+    with _lock:
+        return _pending.get(key) or _flushing.get(key)
+
+
+def buffer_attempt(session: Session, user_id: int, challenge_id: int, data: dict) -> dict:
+    key = (current_tenant(), user_id, challenge_id)
+    known = _lookup(key)
+    attempt_id = known[0] if known else None
+    if attempt_id is None:
+        attempt_id = session.exec(
+            select(ChallengeAttempt.id).where(
+                ChallengeAttempt.user_id == user_id, ChallengeAttempt.challenge_id == challenge_id
+            )
+        ).first()
+
+    # The first save creates the row (and its id) right away, as does any save
+    # inside a batch transaction, which must commit or roll back as a whole
+    if attempt_id is None or _thread is None or in_shared_transaction():
+        attempt = save_attempt(session, user_id, challenge_id, data)
+        with _lock:
+            _pending.pop(key, None)
+        AUTOSAVES.inc("write_through")
+        return {"id": attempt.id, "user_id": user_id, "challenge_id": challenge_id, "data": attempt.data}
+
+    with _lock:
+        coalesced = key in _pending
+        _pending[key] = (attempt_id, data)
+        size = len(_pending)
+    AUTOSAVES.inc("coalesced" if coalesced else "buffered")
+    if size >= MAX_PENDING:
+        _wakeup.set()
+    return {"id": attempt_id, "user_id": user_id, "challenge_id": challenge_id, "data": data}
+
+
+def read_attempt(session: Session, user_id: int, challenge_id: int) -> Optional[ChallengeAttempt]:
+    # Read-your-writes: a buffered save wins over the row in the database. The buffer
+    # is checked first; once an entry has left it, its flush has already committed
+    buffered = _lookup((current_tenant(), user_id, challenge_id))
+    attempt = get_attempt(session, user_id, challenge_id)
+    if attempt is not None and buffered is not None:
+        if attempt in session:
+            session.expunge(attempt)
+        attempt.data = buffered[1]
+    return attempt
+
+
+def discard(user_id: int, challenge_id: int):
+    with _lock:
+        _pending.pop((current_tenant(), user_id, challenge_id), None)
+
+
+def flush() -> int:
+    """Write every buffered save, one transaction per tenant; returns how many rows were updated."""
+    with _flush_lock:
+        with _lock:
+            if not _pending:
+                return 0
+            _flushing.update(_pending)
+            _pending.clear()
+            batch = dict(_flushing)
+        try:
+            by_tenant: Dict[str, Dict[int, dict]] = {}
+            for (tenant, _, _), (attempt_id, data) in batch.items():
+                by_tenant.setdefault(tenant, {})[attempt_id] = data
+            flushed = 0
+            for tenant, by_id in by_tenant.items():
+                with Session(get_engine(tenant)) as session:
+                    rows = session.exec(select(ChallengeAttempt).where(ChallengeAttempt.id.in_(by_id))).all()
+                    for attempt in rows:
+                        attempt.data = by_id[attempt.id]
+                        session.add(attempt)
+                    session.commit()
+                flushed += len(rows)
+            AUTOSAVES.inc("flushed", amount=flushed)
+            return flushed
+        except Exception:
+            # Put the batch back unless a newer save arrived for the same key meanwhile
+            with _lock:
+                for key, entry in batch.items():
+                    _pending.setdefault(key, entry)
+            raise
+        finally:
+            with _lock:
+                _flushing.clear()
+
+
+def _flush_loop():
+    while not _stop.is_set():
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Attempt autosave flush failed; retrying next interval")
+
+
+def start():
+    global _thread
+    if _thread is not None:
+        return
+    if not BUFFERING_ENABLED:
+        logger.info("WEB_CONCURRENCY is above 1; attempt autosaves write through")
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_flush_loop, name="attempt-autosave", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 10.0):
+    global _thread
+    _stop.set()
+    _wakeup.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
+    flush()
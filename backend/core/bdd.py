@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional, Tuple
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD:
+    """Reduced ordered binary decision diagrams sharing one unique table.
+
+    Nodes are integers; because every node is unique for its (var, low, high),
+    two functions built in the same manager are equal exactly when their ids are.
+    """
+
+    __slots__ = ("num_vars", "var", "low", "high", "_unique", "_apply_cache", "_not_cache")
+
+    def __init__(self, num_vars: int):
+        self.num_vars = num_vars
+        # Terminals sit below every variable
+        self.var: List[int] = [num_vars, num_vars]
+        self.low: List[int] = [FALSE, TRUE]
+        self.high: List[int] = [FALSE, TRUE]
+        self._unique: Dict[Tuple[int, int, int], int] = {}
+        self._apply_cache: Dict[Tuple[str, int, int], int] = {}
+        self._not_cache: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self.var)
+
+    def node(self, var: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (var, low, high)
+        found = self._unique.get(key)
+        if found is None:
+            found = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self._unique[key] = found
+        return found
+
+    def variable(self, index: int) -> int:
+        return self.node(index, FALSE, TRUE)
+
+    def negate(self, u: int) -> int:
+        if u <= TRUE:
+            return TRUE - u
+        found = self._not_cache.get(u)
+        if found is None:
+            found = self.node(self.var[u], self.negate(self.low[u]), self.negate(self.high[u]))
+            self._not_cache[u] = found
+        return found
+
+    def apply(self, op: str, u: int, v: int) -> int:
+        if u <= TRUE and v <= TRUE:
+            return _TABLES[op][u][v]
+        # Short-cuts that avoid recursing into the other operand
+        if op == "and":
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE or u == v:
+                return v
+            if v == TRUE:
+                return u
+        elif op == "or":
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE or u == v:
+                return v
+            if v == FALSE:
+                return u
+        elif op == "xor":
+            if u == v:
+                return FALSE
+            if u == FALSE:
+                return v
+            if v == FALSE:
+                return u
+        if u > v:  # All three operators are commutative
+            u, v = v, u
+        key = (op, u, v)
+        found = self._apply_cache.get(key)
+        if found is not None:
+            return found
+        var_u, var_v = self.var[u], self.var[v]
+        top = min(var_u, var_v)
+        u_low, u_high = (self.low[u], self.high[u]) if var_u == top else (u, u)
+        v_low, v_high = (self.low[v], self.high[v]) if var_v == top else (v, v)
+        found = self.node(top, self.apply(op, u_low, v_low), self.apply(op, u_high, v_high))
+        self._apply_cache[key] = found
+        return found
+
+    def satisfy_one(self, u: int) -> Optional[List[int]]:
+        """Some assignment making u true (unconstrained variables are 0), or None."""
+        if u == FALSE:
+            return None
+        assignment = [0] * self.num_vars
+        while u > TRUE:
+            if self.low[u] != FALSE:
+                u = self.low[u]
+            else:
+                assignment[self.var[u]] = 1
+                u = self.high[u]
+        return assignment
+
+    def evaluate(self, u: int, assignment: List[int]) -> int:
+        while u > TRUE:
+            u = self.high[u] if assignment[self.var[u]] else self.low[u]
+        return u
+
+
+_TABLES = {
+    "and": ((0, 0), (0, 1)),
+    "or": ((0, 1), (1, 1)),
+    "xor": ((0, 1), (1, 0)),
+}
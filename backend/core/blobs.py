@@ -0,0 +1,258 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect as sa_inspect, insert, null
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, select
+
+from core.circuit import SCHEMA_VERSION, CompiledCircuit, compile_payload
+from core.fingerprint import fingerprint
+from models.blob import Blob, BlobBand
+from models.challenge import ChallengeAttempt
+from models.circuit import Circuit
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; blobs fall back to zlib
+    zstandard = None
+
+ZSTD_LEVEL = 10
+STORED_MODELS = (Circuit, ChallengeAttempt)
+CACHE_SIZE = 512
+
+# Blobs are immutable, so decoded payloads can be cached by hash without invalidation
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def canonical_json(data) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def compress(raw: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        packed, codec = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), "zstd"
+    else:
+        packed, codec = zlib.compress(raw, 9), "zlib"
+    # Tiny payloads can grow when compressed
+    if len(packed) >= len(raw):
+        return "raw", raw
+    return codec, packed
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "raw":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown blob codec '{codec}'")
+
+
+def _remember(key: str, raw: bytes):
+    with _cache_lock:
+        _cache[key] = raw
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def store(connection, data) -> str:
+    raw = canonical_json(data)
+    key = content_hash(raw)
+    exists = connection.execute(select(Blob.hash).where(Blob.hash == key)).first()
+    if not exists:
+        codec, packed = compress(raw)
+        # Circuit payloads are compiled once here and kept next to the raw JSON
+        compiled = compile_payload(data)
+        connection.execute(
+            insert(Blob).prefix_with("OR IGNORE", dialect="sqlite"),
+            {
+                "hash": key, "codec": codec, "data": packed,
+                "raw_size": len(raw), "stored_size": len(packed),
+                "compiled": compiled.to_dict() if compiled else None,
+                "compiled_version": SCHEMA_VERSION,
+                "created_at": datetime.now(timezone.utc),
+            },
+        )
+        _store_fingerprint(connection, key, compiled)
+    _remember(key, raw)
+    return key
+
+
+def load(connection, key: str):
+    with _cache_lock:
+        raw = _cache.get(key)
+    if raw is None:
+        row = connection.execute(select(Blob.codec, Blob.data).where(Blob.hash == key)).first()
+        if row is None:
+            return None
+        raw = decompress(row.codec, row.data)
+        _remember(key, raw)
+    return json.loads(raw)
+
+
+def _store_fingerprint(connection, key: str, compiled: Optional[CompiledCircuit]):
+    found = fingerprint(compiled)
+    connection.execute(BlobBand.__table__.delete().where(BlobBand.__table__.c.hash == key))
+    connection.execute(
+        Blob.__table__.update().where(Blob.__table__.c.hash == key).values(
+            wl_hash=found["wl_hash"] if found else None,
+            minhash=found["minhash"] if found and found["minhash"] else null(),
+        )
+    )
+    if found and found["buckets"]:
+        connection.execute(
+            insert(BlobBand),
+            [{"hash": key, "band": band, "bucket": bucket} for band, bucket in enumerate(found["buckets"])],
+        )
+
+
+def load_compiled(connection, key: str) -> Optional[CompiledCircuit]:
+    row = connection.execute(
+        select(Blob.compiled, Blob.compiled_version).where(Blob.hash == key)
+    ).first()
+    if row is None:
+        return None
+    if row.compiled_version == SCHEMA_VERSION:
+        return CompiledCircuit.from_dict(row.compiled) if row.compiled else None
+    # Written before the schema existed or changed: compile now and keep the result
+    compiled = compile_payload(load(connection, key))
+    connection.execute(
+        Blob.__table__.update().where(Blob.__table__.c.hash == key)
+        .values(compiled=compiled.to_dict() if compiled else null(), compiled_version=SCHEMA_VERSION)
+    )
+    _store_fingerprint(connection, key, compiled)
+    return compiled
+
+
+def backfill_compiled(engine, batch_size: int = 100):
+    # Blobs stored under an older schema are recompiled (which also fingerprints them);
+    # blobs compiled before fingerprints existed only need the fingerprint
+    stale = (Blob.compiled_version == None) | (Blob.compiled_version != SCHEMA_VERSION)  # noqa: E711
+    unprinted = (Blob.compiled != None) & (Blob.wl_hash == None)  # noqa: E711
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(Blob.hash, stale.label("stale")).where(stale | unprinted).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                compiled = load_compiled(connection, row.hash)
+                if not row.stale:
+                    _store_fingerprint(connection, row.hash, compiled)
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _move_data_to_blobs(session, flush_context, instances):
+    stored = session.info.setdefault("blob_payloads", [])
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, STORED_MODELS) or obj.data is None:
+            continue
+        if obj not in session.new and not sa_inspect(obj).attrs.data.history.has_changes():
+            continue
+        obj.data_hash = store(session.connection(), obj.data)
+        # The row keeps only the hash; the payload is put back once the flush is done
+        stored.append((obj, obj.data))
+        # SQL NULL rather than the JSON literal null
+        obj.data = null()
+
+
+@event.listens_for(OrmSession, "after_flush_postexec")
+def _restore_payloads(session, flush_context):
+    for obj, data in session.info.pop("blob_payloads", []):
+        set_committed_value(obj, "data", data)
+
+
+def _fill_data(target, context):
+    state = sa_inspect(target)
+    if "data" in state.unloaded or target.data is not None or not target.data_hash:
+        return
+    set_committed_value(target, "data", load(context.session.connection(), target.data_hash))
+
+
+for _model in STORED_MODELS:
+    event.listen(_model, "load", _fill_data)
+    event.listen(_model, "refresh", lambda target, context, attrs: _fill_data(target, context))
+
+
+def migrate_inline_data(engine, batch_size: int = 100):
+    # Rows written before the blob store existed still carry their JSON inline. They are
+    # moved with plain UPDATEs so the content-neutral change does not bump sync revisions
+    for model in STORED_MODELS:
+        table = model.__table__
+        last_id = 0
+        while True:
+            with engine.begin() as connection:
+                rows = connection.execute(
+                    select(table.c.id, table.c.data)
+                    .where(table.c.data_hash == None, table.c.id > last_id)  # noqa: E711
+                    .order_by(table.c.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                for row in rows:
+                    last_id = row.id
+                    if row.data is None:
+                        continue
+                    connection.execute(
+                        table.update().where(table.c.id == row.id)
+                        .values(data=null(), data_hash=store(connection, row.data))
+                    )
+
+
+def collect_garbage(session: Session) -> int:
+    referenced = select(Circuit.data_hash).where(Circuit.data_hash != None).union(  # noqa: E711
+        select(ChallengeAttempt.data_hash).where(ChallengeAttempt.data_hash != None)  # noqa: E711
+    )
+    session.connection().execute(BlobBand.__table__.delete().where(BlobBand.hash.not_in(referenced)))
+    result = session.connection().execute(Blob.__table__.delete().where(Blob.hash.not_in(referenced)))
+    session.commit()
+    return result.rowcount
+
+
+def storage_report(session: Session) -> Dict:
+    connection = session.connection()
+    blob_count, unique_bytes, stored_bytes = connection.execute(
+        select(func.count(), func.coalesce(func.sum(Blob.raw_size), 0), func.coalesce(func.sum(Blob.stored_size), 0))
+    ).one()
+
+    tables = {}
+    logical_bytes = 0
+    for model, name in ((Circuit, "circuits"), (ChallengeAttempt, "attempts")):
+        rows, distinct, logical = connection.execute(
+            select(func.count(model.id), func.count(func.distinct(model.data_hash)), func.coalesce(func.sum(Blob.raw_size), 0))
+            .select_from(model).join(Blob, Blob.hash == model.data_hash)
+        ).one()
+        inline = connection.execute(
+            select(func.count()).select_from(model).where(model.data_hash == None)  # noqa: E711
+        ).scalar()
+        tables[name] = {"rows": rows, "distinct_payloads": distinct, "inline_rows": inline, "logical_bytes": logical}
+        logical_bytes += logical
+
+    codecs = dict(connection.execute(select(Blob.codec, func.count()).group_by(Blob.codec)).all())
+    return {
+        "blobs": blob_count,
+        "codecs": codecs,
+        "logical_bytes": logical_bytes,
+        "unique_bytes": unique_bytes,
+        "stored_bytes": stored_bytes,
+        "dedup_ratio": round(logical_bytes / unique_bytes, 3) if unique_bytes else None,
+        "compression_ratio": round(unique_bytes / stored_bytes, 3) if stored_bytes else None,
+        "saved_bytes": logical_bytes - stored_bytes,
+        "tables": tables,
+    }
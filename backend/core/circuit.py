@@ -0,0 +1,289 @@
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+# Mirrors Vezalko/src/phaser: two-terminal electric parts have their ends 40px either
+# side of the centre and ends closer than 25px are one node (CircuitGraph.addNode);
+# logic parts have an output 40px ahead, inputs 40px behind and ports within 45px connect
+TERMINAL_OFFSET = 40
+MERGE_RADIUS = 25
+GATE_INPUT_SPREAD = 20
+CONNECTION_TOLERANCE = 45
+
+SCHEMA_VERSION = 1
+
+BATTERY_VOLTAGE = 3.3
+RESISTOR_OHM = 1.5
+# The editor gives bulbs no resistance; a nominal value makes brightness comparable
+BULB_OHM = 3.0
+
+ELECTRIC_TYPES = ("battery", "resistor", "bulb", "switch", "switch-on", "switch-off", "wire", "ammeter", "voltmeter")
+LOGIC_TYPES = ("input-0", "input-1", "output", "not", "and", "or", "nand", "nor", "xor", "xnor")
+# "wire" is shared by both workspaces and is listed once, under electric
+TYPE_CODES = {name: code for code, name in enumerate(ELECTRIC_TYPES + LOGIC_TYPES)}
+TYPE_NAMES = ELECTRIC_TYPES + LOGIC_TYPES
+TWO_INPUT_GATES = {"and", "or", "nand", "nor", "xor", "xnor"}
+
+# type -> (parameter key in the component JSON, default)
+_PARAMS = {
+    "battery": ("voltage", BATTERY_VOLTAGE),
+    "resistor": ("ohm", RESISTOR_OHM),
+    "bulb": ("ohm", BULB_OHM),
+    "switch": ("is_on", False),
+    "switch-on": ("is_on", True),
+    "switch-off": ("is_on", False),
+}
+
+
+class CircuitError(ValueError):
+    pass
+
+
+class CompiledCircuit:
+    """Array-backed form of a circuit; components are addressed by their index."""
+
+    __slots__ = (
+        "kind", "types", "x", "y", "rotation", "params", "ids",
+        "node_count", "terminal_a", "terminal_b", "node_ptr", "node_idx",
+        "fanin_ptr", "fanin_idx",
+    )
+
+    def __init__(self, kind: str, count: int):
+        self.kind = kind
+        self.types = array("B", bytes(count))
+        self.x = array("d", bytes(8 * count))
+        self.y = array("d", bytes(8 * count))
+        self.rotation = array("d", bytes(8 * count))
+        self.params = array("d", bytes(8 * count))
+        self.ids: List[Optional[str]] = [None] * count
+        # Electric: terminal node of each end, and node -> incident components (CSR)
+        self.node_count = 0
+        self.terminal_a = array("i")
+        self.terminal_b = array("i")
+        self.node_ptr = array("i", [0])
+        self.node_idx = array("i")
+        # Logic: component -> components driving it (CSR)
+        self.fanin_ptr = array("i", [0])
+        self.fanin_idx = array("i")
+
+    def __len__(self):
+        return len(self.types)
+
+    def type_of(self, index: int) -> str:
+        return TYPE_NAMES[self.types[index]]
+
+    def components_at(self, node: int) -> array:
+        return self.node_idx[self.node_ptr[node]:self.node_ptr[node + 1]]
+
+    def inputs_of(self, index: int) -> array:
+        return self.fanin_idx[self.fanin_ptr[index]:self.fanin_ptr[index + 1]]
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": SCHEMA_VERSION,
+            "kind": self.kind,
+            "types": [TYPE_NAMES[code] for code in self.types],
+            "x": self.x.tolist(),
+            "y": self.y.tolist(),
+            "rotation": self.rotation.tolist(),
+            "params": self.params.tolist(),
+            "ids": self.ids,
+            "node_count": self.node_count,
+            "terminal_a": self.terminal_a.tolist(),
+            "terminal_b": self.terminal_b.tolist(),
+            "node_ptr": self.node_ptr.tolist(),
+            "node_idx": self.node_idx.tolist(),
+            "fanin_ptr": self.fanin_ptr.tolist(),
+            "fanin_idx": self.fanin_idx.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CompiledCircuit":
+        circuit = cls(data["kind"], 0)
+        circuit.types = array("B", (TYPE_CODES[name] for name in data["types"]))
+        for name, code in (("x", "d"), ("y", "d"), ("rotation", "d"), ("params", "d"),
+                           ("terminal_a", "i"), ("terminal_b", "i"), ("node_ptr", "i"),
+                           ("node_idx", "i"), ("fanin_ptr", "i"), ("fanin_idx", "i")):
+            setattr(circuit, name, array(code, data[name]))
+        circuit.ids = list(data["ids"])
+        circuit.node_count = data["node_count"]
+        return circuit
+
+
+def _number(item: Dict, key: str, index: int, default=None) -> float:
+    value = item.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise CircuitError(f"components[{index}].{key} must be a finite number")
+    return value
+
+
+def _offset(rotation: float, dx: float, dy: float):
+    # Same rounding as getOutputOffset/getInputOffsets in the logic workspace
+    angle = math.radians(rotation)
+    cos, sin = math.cos(angle), math.sin(angle)
+    return round(dx * cos - dy * sin), round(dx * sin + dy * cos)
+
+
+def _csr(lists: Sequence[Sequence[int]]):
+    ptr, idx = array("i", [0]), array("i")
+    for items in lists:
+        idx.extend(items)
+        ptr.append(len(idx))
+    return ptr, idx
+
+
+class _Grid:
+    # Spatial hash so each point is compared with its neighbourhood only
+    def __init__(self, cell: float):
+        self.cell = cell
+        self.cells: Dict = {}
+
+    def key(self, x, y):
+        return int(math.floor(x / self.cell)), int(math.floor(y / self.cell))
+
+    def add(self, x, y, value):
+        self.cells.setdefault(self.key(x, y), []).append((x, y, value))
+
+    def near(self, x, y, radius):
+        cx, cy = self.key(x, y)
+        found = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for px, py, value in self.cells.get((gx, gy), ()):
+                    if math.hypot(px - x, py - y) < radius:
+                        found.append(value)
+        return found
+
+
+def compile_components(items: Sequence[Dict]) -> CompiledCircuit:
+    if not isinstance(items, (list, tuple)):
+        raise CircuitError("components must be a list")
+    kinds = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise CircuitError(f"components[{index}] must be an object")
+        kind = item.get("type")
+        if kind not in TYPE_CODES:
+            raise CircuitError(f"components[{index}].type '{kind}' is not a known component")
+        if kind != "wire":
+            kinds.add("logic" if kind in LOGIC_TYPES else "electric")
+    if len(kinds) > 1:
+        raise CircuitError("A circuit cannot mix electric and logic components")
+
+    circuit = CompiledCircuit(kinds.pop() if kinds else "electric", len(items))
+    for index, item in enumerate(items):
+        kind = item["type"]
+        circuit.types[index] = TYPE_CODES[kind]
+        circuit.x[index] = _number(item, "x", index)
+        circuit.y[index] = _number(item, "y", index)
+        circuit.rotation[index] = _number(item, "rotation", index, 0)
+        if item.get("id") is not None:
+            circuit.ids[index] = str(item["id"])
+        if kind in _PARAMS:
+            key, default = _PARAMS[kind]
+            if key == "is_on":
+                value = item.get(key, default) if kind == "switch" else default
+                if not isinstance(value, bool):
+                    raise CircuitError(f"components[{index}].is_on must be a boolean")
+                circuit.params[index] = 1.0 if value else 0.0
+            else:
+                value = _number(item, key, index, default)
+                if value <= 0:
+                    raise CircuitError(f"components[{index}].{key} must be positive")
+                circuit.params[index] = value
+
+    if circuit.kind == "electric":
+        _link_terminals(circuit)
+    else:
+        _link_ports(circuit)
+    return circuit
+
+
+def _link_terminals(circuit: CompiledCircuit):
+    grid = _Grid(MERGE_RADIUS)
+    node_count = 0
+    ends = []
+    for index in range(len(circuit)):
+        dx, dy = _offset(circuit.rotation[index], TERMINAL_OFFSET, 0)
+        for sign in (-1, 1):
+            x, y = circuit.x[index] + sign * dx, circuit.y[index] + sign * dy
+            # First node created within the radius wins, as in CircuitGraph.addNode
+            near = grid.near(x, y, MERGE_RADIUS)
+            if near:
+                node = min(near)
+            else:
+                node = node_count
+                node_count += 1
+                grid.add(x, y, node)
+            ends.append(node)
+    circuit.node_count = node_count
+    circuit.terminal_a = array("i", ends[0::2])
+    circuit.terminal_b = array("i", ends[1::2])
+    incident: List[List[int]] = [[] for _ in range(node_count)]
+    for index in range(len(circuit)):
+        incident[circuit.terminal_a[index]].append(index)
+        if circuit.terminal_b[index] != circuit.terminal_a[index]:
+            incident[circuit.terminal_b[index]].append(index)
+    circuit.node_ptr, circuit.node_idx = _csr(incident)
+
+
+def _input_offsets(kind: str, rotation: float):
+    if kind in TWO_INPUT_GATES:
+        return [
+            _offset(rotation, -TERMINAL_OFFSET, GATE_INPUT_SPREAD),
+            _offset(rotation, -TERMINAL_OFFSET, -GATE_INPUT_SPREAD),
+        ]
+    return [_offset(rotation, -TERMINAL_OFFSET, 0)]
+
+
+def _link_ports(circuit: CompiledCircuit):
+    count = len(circuit)
+    outputs = []
+    inputs = _Grid(CONNECTION_TOLERANCE)
+    wire_ports = _Grid(CONNECTION_TOLERANCE)
+    for index in range(count):
+        kind, rotation = circuit.type_of(index), circuit.rotation[index]
+        x, y = circuit.x[index], circuit.y[index]
+        ox, oy = _offset(rotation, TERMINAL_OFFSET, 0)
+        outputs.append((x + ox, y + oy))
+        for ix, iy in _input_offsets(kind, rotation):
+            inputs.add(x + ix, y + iy, index)
+            if kind == "wire":
+                wire_ports.add(x + ix, y + iy, index)
+        if kind == "wire":
+            wire_ports.add(x + ox, y + oy, index)
+
+    # Output -> input links, plus wire junctions which conduct both ways
+    drives = [set() for _ in range(count)]
+    for source, (ox, oy) in enumerate(outputs):
+        for target in inputs.near(ox, oy, CONNECTION_TOLERANCE):
+            if target != source:
+                drives[source].add(target)
+    for index in range(count):
+        if circuit.type_of(index) != "wire":
+            continue
+        ports = [outputs[index]] + [
+            (circuit.x[index] + ix, circuit.y[index] + iy)
+            for ix, iy in _input_offsets("wire", circuit.rotation[index])
+        ]
+        for px, py in ports:
+            for other in wire_ports.near(px, py, CONNECTION_TOLERANCE):
+                if other != index and other not in drives[index]:
+                    drives[index].add(other)
+                    drives[other].add(index)
+
+    fanin: List[List[int]] = [[] for _ in range(count)]
+    for source in range(count):
+        for target in drives[source]:
+            fanin[target].append(source)
+    circuit.fanin_ptr, circuit.fanin_idx = _csr([sorted(items) for items in fanin])
+
+
+def compile_payload(data) -> Optional[CompiledCircuit]:
+    """Compile circuit-shaped JSON ({"components": [...]}); None for anything else."""
+    if not isinstance(data, dict) or not isinstance(data.get("components"), list):
+        return None
+    try:
+        return compile_components(data["components"])
+    except CircuitError:
+        return None
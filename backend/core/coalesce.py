@@ -0,0 +1,115 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from core.metrics import Counter, record_cache, registry
+from database import after_commit, current_tenant, in_shared_transaction
+
+MAX_CACHED = 1024
+
+COALESCED_REQUESTS = registry.register(Counter(
+    "coalesced_requests_total",
+    "Requests to coalesced routes by how they were answered",
+    ("route", "result"),
+))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+_lock = threading.Lock()
+_inflight: Dict[Hashable, _Call] = {}
+# key -> (expires_at, encoded result); only filled for routes with a micro-cache window
+_cache: Dict[Hashable, Tuple[float, Any]] = {}
+# Bumped by invalidate() so a computation that started before a write is not cached
+_generations: Dict[str, int] = {}
+
+
+def _store(key: Hashable, ttl: float, result):
+    now = time.monotonic()
+    if len(_cache) >= MAX_CACHED:
+        for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+            del _cache[stale]
+        if len(_cache) >= MAX_CACHED:
+            _cache.clear()
+    _cache[key] = (now + ttl, result)
+
+
+def run_once(key: Hashable, compute: Callable[[], Any], ttl: float = 0.0):
+    """Run compute() once for all concurrent callers with the same key; the first caller
+    does the work and the others wait for its result (or exception)."""
+    route = key[0] if isinstance(key, tuple) else str(key)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            COALESCED_REQUESTS.inc(route, "cached")
+            record_cache(f"coalesce:{route}", True)
+            return cached[1]
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+            generation = _generations.get(route, 0)
+
+    if not leader:
+        call.done.wait()
+        COALESCED_REQUESTS.inc(route, "shared")
+        record_cache(f"coalesce:{route}", True)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    COALESCED_REQUESTS.inc(route, "computed")
+    record_cache(f"coalesce:{route}", False)
+    try:
+        call.result = compute()
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+            if ttl > 0 and call.error is None and _generations.get(route, 0) == generation:
+                _store(key, ttl, call.result)
+        call.done.set()
+    return call.result
+
+
+def coalesce(route: str, key: Optional[Callable[..., Hashable]] = None, ttl: float = 0.0):
+    """Share one computation between concurrent identical requests to a sync endpoint.
+
+    ``key`` receives the endpoint's keyword arguments and returns what makes two requests
+    identical; ``ttl`` additionally keeps the answer for that many seconds. The result is
+    encoded once so followers never touch the leader's session objects.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if in_shared_transaction():
+                # A batch reads its own uncommitted writes, which must not be shared
+                return func(*args, **kwargs)
+            cache_key = (route, current_tenant(), key(**kwargs) if key else None)
+            return run_once(cache_key, lambda: jsonable_encoder(func(*args, **kwargs)), ttl)
+        return wrapper
+    return decorate
+
+
+def invalidate(route: str):
+    # After the commit, so no request can cache the pre-write answer in between
+    after_commit(lambda: _invalidate(route))
+
+
+def _invalidate(route: str):
+    with _lock:
+        _generations[route] = _generations.get(route, 0) + 1
+        for cache_key in [k for k in _cache if k[0] == route]:
+            del _cache[cache_key]
@@ -0,0 +1,132 @@
+import html
+import io
+import re
+import zipfile
+from typing import Iterator, List, Optional
+
+from sqlmodel import Session
+
+from crud.class_crud import iter_finalized_paragraphs, iter_finalized_summaries
+from crud.paragraph import iter_paragraphs_by_ids
+from core.images import decode_drawing
+from database import get_engine
+
+CHUNK_SIZE = 20
+
+_PAGE_STYLE = (
+    "body{font-family:Georgia,serif;max-width:760px;margin:2rem auto;padding:0 1rem;color:#222}"
+    "article{margin-bottom:3rem}img{max-width:100%;display:block;margin:1rem 0}"
+    ".meta{color:#666;font-style:italic}"
+)
+
+
+def build_export_plan(session: Session, class_id: int, story_id: Optional[int] = None) -> List[dict]:
+    # Only ids and titles: paragraphs and drawings are read per story while streaming
+    return list(iter_finalized_summaries(session, class_id, story_id))
+
+
+def iter_story_paragraphs(session: Session, class_id: int, story: dict) -> Iterator[dict]:
+    seen = set()
+    for paragraph in iter_paragraphs_by_ids(session, story["paragraph_ids"], CHUNK_SIZE):
+        seen.add(paragraph.id)
+        yield {"content": paragraph.content, "drawing": paragraph.drawing, "order": paragraph.order}
+
+    missing = [pid for pid in story["paragraph_ids"] if pid not in seen]
+    if missing:
+        # Paragraph rows deleted after finalizing are still in the class snapshot
+        yield from iter_finalized_paragraphs(
+            session, class_id, story["story_id"], missing, story.get("archived", False)
+        )
+
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", text or "").strip("-").lower()
+    return slug[:40] or "story"
+
+
+def _page_start(title: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title><style>{_PAGE_STYLE}</style></head><body>"
+    )
+
+
+def _story_header(story: dict) -> str:
+    meta = story.get("story", {})
+    return (
+        f"<article><h2>{html.escape(meta.get('title', 'Untitled'))}</h2>"
+        f"<p class=\"meta\">{html.escape(meta.get('author', ''))}</p>"
+        f"<p class=\"meta\">{html.escape(meta.get('short_description', ''))}</p>"
+    )
+
+
+def _paragraph_html(paragraph: dict, image_src: Optional[str]) -> str:
+    parts = [f"<p>{html.escape(paragraph['content'] or '')}</p>"]
+    if image_src:
+        parts.append(f"<img src=\"{html.escape(image_src, quote=True)}\" alt=\"Drawing\">")
+    return "".join(parts)
+
+
+class _StreamBuffer(io.RawIOBase):
+    # Unseekable sink: zipfile falls back to data descriptors and we drain after each entry
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_class_zip(class_id: int, class_name: str, plan: List[dict]) -> Iterator[bytes]:
+    buffer = _StreamBuffer()
+    archive = zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED)
+    folders = [f"{number:02d}-{_slug(story['story'].get('title', ''))}" for number, story in enumerate(plan, 1)]
+
+    index = [_page_start(class_name), f"<h1>{html.escape(class_name)}</h1><ul>"]
+    for folder, story in zip(folders, plan):
+        title = html.escape(story["story"].get("title", "Untitled"))
+        index.append(f"<li><a href=\"{folder}/index.html\">{title}</a></li>")
+    index.append("</ul></body></html>")
+    archive.writestr("index.html", "".join(index))
+    yield buffer.drain()
+
+    with Session(get_engine()) as session:
+        for folder, story in zip(folders, plan):
+            # Images are streamed into the archive one by one; only the small HTML text is kept
+            page = [_page_start(story["story"].get("title", "Story")), _story_header(story)]
+            for number, paragraph in enumerate(iter_story_paragraphs(session, class_id, story), 1):
+                image_src = None
+                decoded = decode_drawing(paragraph["drawing"])
+                if decoded:
+                    ext, data = decoded
+                    image_src = f"images/{number:03d}.{ext}"
+                    archive.writestr(f"{folder}/{image_src}", data, compress_type=zipfile.ZIP_STORED)
+                    yield buffer.drain()
+                elif paragraph["drawing"]:
+                    image_src = paragraph["drawing"]
+                page.append(_paragraph_html(paragraph, image_src))
+            page.append("</article></body></html>")
+            archive.writestr(f"{folder}/index.html", "".join(page))
+            yield buffer.drain()
+
+    archive.close()
+    yield buffer.drain()
+
+
+def iter_class_html(class_id: int, class_name: str, plan: List[dict]) -> Iterator[bytes]:
+    yield (_page_start(class_name) + f"<h1>{html.escape(class_name)}</h1>").encode("utf-8")
+    with Session(get_engine()) as session:
+        for story in plan:
+            yield _story_header(story).encode("utf-8")
+            for paragraph in iter_story_paragraphs(session, class_id, story):
+                yield _paragraph_html(paragraph, paragraph["drawing"]).encode("utf-8")
+            yield b"</article>"
+    yield b"</body></html>"
@@ -0,0 +1,105 @@
+import hashlib
+import random
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from core.circuit import CompiledCircuit
+
+WL_ITERATIONS = 3
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above roughly 0.5 Jaccard similarity share a bucket
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+# Fixed seeds: signatures must stay comparable across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _graph(circuit: CompiledCircuit) -> Tuple[List[str], List[List[int]], List[List[int]]]:
+    """Vertex labels with in/out neighbour lists; independent of component order and position."""
+    labels, incoming, outgoing = [], [], []
+    for index in range(len(circuit)):
+        kind = circuit.type_of(index)
+        if kind in ("switch", "switch-on", "switch-off"):
+            kind = "switch:on" if circuit.params[index] else "switch:off"
+        labels.append(kind)
+        incoming.append([])
+        outgoing.append([])
+    if circuit.kind == "electric":
+        # Components and the nodes joining them form a bipartite, undirected graph
+        for node in range(circuit.node_count):
+            vertex = len(labels)
+            labels.append("node")
+            members = list(circuit.components_at(node))
+            incoming.append(members)
+            outgoing.append([])
+            for member in members:
+                incoming[member].append(vertex)
+    else:
+        for target in range(len(circuit)):
+            for source in circuit.inputs_of(target):
+                incoming[target].append(source)
+                outgoing[source].append(target)
+    return labels, incoming, outgoing
+
+
+def _shingle(label: int, occurrence: int) -> int:
+    return _hash(f"{label}#{occurrence}")
+
+
+def wl_fingerprint(circuit: CompiledCircuit) -> Tuple[str, Set[int]]:
+    # Weisfeiler-Lehman relabelling: isomorphic circuits get the same canonical hash, and
+    # the labels of all rounds are the shingles MinHash works on. Repeated labels are
+    # numbered so a design copied three times does not look identical to a single copy.
+    labels, incoming, outgoing = _graph(circuit)
+    current = [_hash(label) for label in labels]
+    history = sorted(current)
+    for _ in range(WL_ITERATIONS):
+        current = [
+            _hash(
+                f"{current[v]}|{','.join(map(str, sorted(current[u] for u in incoming[v])))}"
+                f"|{','.join(map(str, sorted(current[u] for u in outgoing[v])))}"
+            )
+            for v in range(len(current))
+        ]
+        history.extend(sorted(current))
+    shingles, seen = set(), {}
+    for label in history:
+        seen[label] = seen.get(label, 0) + 1
+        shingles.add(_shingle(label, seen[label]))
+    canonical = hashlib.sha256(",".join(map(str, history)).encode("utf-8")).hexdigest()
+    return canonical, shingles
+
+
+def minhash(shingles: Set[int]) -> Optional[List[int]]:
+    if not shingles:
+        return None
+    return [min((a * shingle + b) % _PRIME for shingle in shingles) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature: Sequence[int]) -> List[str]:
+    return [
+        hashlib.blake2b(
+            f"{band}:{','.join(map(str, signature[band * ROWS:(band + 1) * ROWS]))}".encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERMUTATIONS
+
+
+def fingerprint(circuit: Optional[CompiledCircuit]) -> Optional[Dict]:
+    if circuit is None:
+        return None
+    canonical, shingles = wl_fingerprint(circuit)
+    signature = minhash(shingles)
+    # Empty designs are all identical, but too trivial to be worth bucketing
+    return {"wl_hash": canonical, "minhash": signature, "buckets": band_buckets(signature) if signature else []}
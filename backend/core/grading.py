@@ -0,0 +1,192 @@
+import ast
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from core.bdd import BDD, FALSE, TRUE
+from core.circuit import CircuitError, CompiledCircuit, compile_components
+
+# Keep a reference's manager from growing without bound as submissions are graded in it
+MAX_MANAGER_NODES = 200_000
+MAX_INPUTS = 32
+
+_GATES = {
+    "and": ("and", False), "nand": ("and", True),
+    "or": ("or", False), "nor": ("or", True),
+    "xor": ("xor", False), "xnor": ("xor", True),
+}
+
+
+class GradingError(ValueError):
+    pass
+
+
+def circuit_signals(circuit: CompiledCircuit) -> Tuple[List[int], List[int]]:
+    # Inputs and outputs are matched between designs by position: top to bottom, then left to right
+    def ordered(types):
+        found = [i for i in range(len(circuit)) if circuit.type_of(i) in types]
+        return sorted(found, key=lambda i: (circuit.y[i], circuit.x[i], i))
+    return ordered({"input-0", "input-1"}), ordered({"output"})
+
+
+def circuit_to_bdd(bdd: BDD, circuit: CompiledCircuit) -> List[int]:
+    """One BDD per output; every input component is a free variable."""
+    if circuit.kind != "logic":
+        raise GradingError("Only logic circuits can be graded for equivalence")
+    inputs, outputs = circuit_signals(circuit)
+    if len(inputs) != bdd.num_vars:
+        raise GradingError(f"Expected {bdd.num_vars} inputs, found {len(inputs)}")
+    variable_of = {component: index for index, component in enumerate(inputs)}
+    memo: Dict[int, Optional[int]] = {}
+    visiting = set()
+
+    def signal(index: int) -> Optional[int]:
+        # None marks an undriven signal, like an undefined logicValue in the editor
+        if index in memo:
+            return memo[index]
+        if index in variable_of:
+            return bdd.variable(variable_of[index])
+        kind = circuit.type_of(index)
+        visiting.add(index)
+        sources = [s for s in circuit.inputs_of(index) if s not in visiting]
+        if kind != "wire" and len(sources) < len(circuit.inputs_of(index)):
+            raise GradingError(f"Feedback loop through component {index} ({kind})")
+        result = None
+        if kind == "wire":
+            # Junctions pass on the first driven source, as the editor's propagation does
+            for source in sources:
+                result = signal(source)
+                if result is not None:
+                    break
+        elif sources:
+            values = [signal(source) for source in sources]
+            if all(value is not None for value in values):
+                if kind == "not":
+                    result = bdd.negate(values[0])
+                elif kind == "output":
+                    result = values[0]
+                else:
+                    op, inverted = _GATES[kind]
+                    result = values[0]
+                    for value in values[1:]:
+                        result = bdd.apply(op, result, value)
+                    if inverted:
+                        result = bdd.negate(result)
+        visiting.discard(index)
+        # Wires reached while another wire was on the stack may resolve differently later
+        if kind != "wire" or not visiting:
+            memo[index] = result
+        return result
+
+    built = []
+    for number, output in enumerate(outputs):
+        value = signal(output)
+        if value is None:
+            raise GradingError(f"Output {number + 1} is not driven by the inputs")
+        built.append(value)
+    return built
+
+
+_EXPRESSION_OPS = {ast.BitAnd: "and", ast.BitOr: "or", ast.BitXor: "xor"}
+
+
+def expression_to_bdd(bdd: BDD, expression: str) -> int:
+    # Reference functions may be written as e.g. "x0 ^ x1" or "(x0 & x1) | ~x2"
+    def build(node) -> int:
+        if isinstance(node, ast.Expression):
+            return build(node.body)
+        if isinstance(node, ast.BinOp) and type(node.op) in _EXPRESSION_OPS:
+            return bdd.apply(_EXPRESSION_OPS[type(node.op)], build(node.left), build(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Invert, ast.Not)):
+            return bdd.negate(build(node.operand))
+        if isinstance(node, ast.Name) and node.id.startswith("x") and node.id[1:].isdigit():
+            index = int(node.id[1:])
+            if index < bdd.num_vars:
+                return bdd.variable(index)
+        if isinstance(node, ast.Constant) and node.value in (0, 1):
+            return TRUE if node.value else FALSE
+        raise GradingError(f"Unsupported term in reference expression: {ast.dump(node)[:60]}")
+    try:
+        return build(ast.parse(expression, mode="eval"))
+    except SyntaxError as e:
+        raise GradingError(f"Invalid reference expression: {e}")
+    except (RecursionError, MemoryError):
+        # Both parsing and build() recurse once per nesting level
+        raise GradingError("Reference expression is nested too deeply")
+
+
+def reference_hash(reference: Dict) -> str:
+    return hashlib.sha256(json.dumps(reference, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _build_reference(reference: Dict) -> Tuple[BDD, List[int]]:
+    if "components" in reference:
+        try:
+            circuit = compile_components(reference["components"])
+        except CircuitError as e:
+            raise GradingError(f"Reference circuit is invalid: {e}")
+        bdd = BDD(len(circuit_signals(circuit)[0]))
+        return bdd, circuit_to_bdd(bdd, circuit)
+    if "outputs" in reference:
+        inputs = int(reference.get("inputs", 0))
+        if not 1 <= inputs <= MAX_INPUTS:
+            raise GradingError(f"Reference expressions need between 1 and {MAX_INPUTS} inputs")
+        bdd = BDD(inputs)
+        return bdd, [expression_to_bdd(bdd, expression) for expression in reference["outputs"]]
+    raise GradingError("Reference needs components or output expressions")
+
+
+class _Reference:
+    __slots__ = ("bdd", "outputs", "lock")
+
+    def __init__(self, bdd: BDD, outputs: List[int]):
+        self.bdd = bdd
+        self.outputs = outputs
+        self.lock = threading.Lock()
+
+
+_references: Dict[Tuple[int, str], _Reference] = {}
+_references_lock = threading.Lock()
+
+
+def prepare_reference(challenge_id: int, reference: Dict) -> _Reference:
+    key = (challenge_id, reference_hash(reference))
+    with _references_lock:
+        cached = _references.get(key)
+    if cached is not None and len(cached.bdd) <= MAX_MANAGER_NODES:
+        return cached
+    cached = _Reference(*_build_reference(reference))
+    with _references_lock:
+        # Older versions of this challenge's reference are no longer needed
+        for stale in [k for k in _references if k[0] == challenge_id]:
+            del _references[stale]
+        _references[key] = cached
+    return cached
+
+
+def check_equivalence(challenge_id: int, reference: Dict, components: List[Dict]) -> Dict:
+    try:
+        circuit = compile_components(components)
+    except CircuitError as e:
+        raise GradingError(str(e))
+    ref = prepare_reference(challenge_id, reference)
+    with ref.lock:
+        bdd = ref.bdd
+        submitted = circuit_to_bdd(bdd, circuit)
+        if len(submitted) != len(ref.outputs):
+            raise GradingError(f"Expected {len(ref.outputs)} outputs, found {len(submitted)}")
+        for number, (expected, actual) in enumerate(zip(ref.outputs, submitted)):
+            if expected == actual:
+                continue
+            assignment = bdd.satisfy_one(bdd.apply("xor", expected, actual))
+            return {
+                "equivalent": False,
+                "output": number,
+                "counterexample": {
+                    "inputs": assignment,
+                    "expected": [bdd.evaluate(node, assignment) for node in ref.outputs],
+                    "actual": [bdd.evaluate(node, assignment) for node in submitted],
+                },
+            }
+    return {"equivalent": True, "inputs": bdd.num_vars, "outputs": len(submitted)}
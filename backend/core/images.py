@@ -0,0 +1,167 @@
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from models.paragraph import Paragraph
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional; without it drawings are only served inline
+    Image = None
+    features = None
+
+MEDIA_DIR = os.getenv("MEDIA_DIR", "./media/drawings")
+VARIANTS = {"thumb": 160, "medium": 480, "full": None}
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_DATA_URI = re.compile(r"^data:image/(?P<ext>[a-zA-Z0-9.+-]+);base64,")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def images_enabled() -> bool:
+    return Image is not None
+
+
+def variant_format() -> str:
+    return "webp" if images_enabled() and features.check("webp") else "png"
+
+
+def decode_drawing(drawing: Optional[str]) -> Optional[Tuple[str, bytes]]:
+    if not drawing:
+        return None
+    match = _DATA_URI.match(drawing)
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(drawing[match.end():], validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    ext = match.group("ext").lower()
+    return ("jpg" if ext == "jpeg" else ext.split("+")[0]), data
+
+
+def drawing_key(drawing: Optional[str]) -> Optional[str]:
+    # Only inline data URIs can be decoded; plain URLs are served as they are
+    if not drawing or not drawing.startswith("data:image/"):
+        return None
+    return hashlib.sha256(drawing.encode("utf-8")).hexdigest()[:32]
+
+
+def drawing_urls(key: Optional[str]) -> Optional[Dict[str, str]]:
+    if not key or not images_enabled():
+        return None
+    ext = variant_format()
+    return {variant: f"/api/drawings/{key}/{variant}.{ext}" for variant in VARIANTS}
+
+
+def variant_path(key: str, variant: str) -> str:
+    return os.path.join(MEDIA_DIR, key[:2], key, f"{variant}.{variant_format()}")
+
+
+def render_variants(key: str, drawing: str) -> bool:
+    if not images_enabled():
+        return False
+    decoded = decode_drawing(drawing)
+    if not decoded:
+        return False
+    try:
+        source = Image.open(io.BytesIO(decoded[1]))
+        source.load()
+    except (OSError, ValueError):
+        return False
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA")
+
+    fmt = variant_format()
+    for variant, max_side in VARIANTS.items():
+        path = variant_path(key, variant)
+        if os.path.exists(path):
+            continue
+        image = source.copy()
+        if max_side:
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a half-written file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        if fmt == "webp":
+            image.save(tmp_path, "WEBP", quality=80, method=4)
+        else:
+            image.save(tmp_path, "PNG", optimize=True)
+        os.replace(tmp_path, path)
+    return True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="drawing-variants")
+        return _executor
+
+
+def schedule_variants(key: Optional[str], drawing: Optional[str]) -> Optional[Future]:
+    if not key or not drawing or not images_enabled():
+        return None
+    if os.path.exists(variant_path(key, "thumb")):
+        return None
+    with _lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+    future = _get_executor().submit(render_variants, key, drawing)
+    with _lock:
+        _pending[key] = future
+    future.add_done_callback(lambda _: _pending.pop(key, None))
+    return future
+
+
+def ensure_variant(session: Session, key: str, variant: str) -> Optional[str]:
+    path = variant_path(key, variant)
+    if os.path.exists(path):
+        return path
+    future = _pending.get(key)
+    if future is not None:
+        future.result()
+    else:
+        drawing = session.exec(
+            select(Paragraph.drawing).where(Paragraph.drawing_key == key)
+        ).first()
+        if drawing:
+            render_variants(key, drawing)
+    return path if os.path.exists(path) else None
+
+
+def backfill_drawing_keys(engine, batch_size: int = 100):
+    with Session(engine) as session:
+        while True:
+            rows = session.exec(
+                select(Paragraph)
+                .where(Paragraph.drawing_key == None, Paragraph.drawing.like("data:image/%"))  # noqa: E711
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for paragraph in rows:
+                paragraph.drawing_key = drawing_key(paragraph.drawing)
+                session.add(paragraph)
+            session.commit()
+            session.expunge_all()
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
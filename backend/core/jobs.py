@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session, select
+
+from database import get_engine, known_tenants, tenant_scope
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Running jobs whose worker died (crash, redeploy) are retried after this long
+STALE_AFTER = timedelta(minutes=10)
+# Jobs run per tenant shard before the worker moves on, so one school can't starve the rest
+TENANT_BATCH = 10
+
+_handlers: Dict[str, Callable[[Session, dict], Optional[dict]]] = {}
+_wakeup = threading.Event()
+_stop = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_handler(kind: str):
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue(session: Session, kind: str, payload: dict, priority: int = 0, max_attempts: int = 3) -> Job:
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    job = Job(kind=kind, payload=payload, priority=priority, max_attempts=max_attempts)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def get_job(session: Session, job_id: int) -> Optional[Job]:
+    return session.get(Job, job_id)
+
+
+def _claim(worker_id: str) -> Optional[int]:
+    # A single UPDATE is atomic under SQLite's writer lock, so several threads or
+    # processes polling the same table never claim the same job twice
+    now = utcnow()
+    token = f"{worker_id}:{uuid.uuid4().hex}"
+    with get_engine().begin() as conn:
+        claimed = conn.execute(
+            text(
+                "UPDATE jobs SET status = 'running', locked_by = :token, locked_at = :now, "
+                "attempts = attempts + 1 "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND run_after <= :now "
+                "ORDER BY priority DESC, id LIMIT 1) AND status = 'queued'"
+            ).bindparams(bindparam("now", type_=Job.__table__.c.run_after.type)),
+            {"token": token, "now": now},
+        )
+        if claimed.rowcount != 1:
+            return None
+        return conn.execute(text("SELECT id FROM jobs WHERE locked_by = :token"), {"token": token}).scalar()
+
+
+def _execute(job_id: int):
+    with Session(get_engine()) as session:
+        job = session.get(Job, job_id)
+        handler = _handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            result = handler(session, dict(job.payload or {}))
+        except Exception:
+            session.rollback()
+            job = session.get(Job, job_id)
+            job.last_error = traceback.format_exc(limit=5)
+            job.locked_by = None
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = utcnow() + timedelta(seconds=2 ** job.attempts)
+            else:
+                job.status = "failed"
+                job.finished_at = utcnow()
+            logger.warning("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        else:
+            job = session.get(Job, job_id)
+            job.status = "succeeded"
+            job.result = result
+            job.locked_by = None
+            job.finished_at = utcnow()
+        session.add(job)
+        session.commit()
+
+
+def run_pending(limit: Optional[int] = None, worker_id: str = "inline") -> int:
+    """Run queued jobs of the current tenant in the calling thread until none are due;
+    returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job_id = _claim(worker_id)
+        if job_id is None:
+            break
+        _execute(job_id)
+        ran += 1
+    return ran
+
+
+def requeue_stale_jobs():
+    cutoff = utcnow() - STALE_AFTER
+    for tenant in known_tenants():
+        with Session(get_engine(tenant)) as session:
+            stale = session.exec(
+                select(Job).where(Job.status == "running", Job.locked_at < cutoff)
+            ).all()
+            for job in stale:
+                job.status = "queued"
+                job.locked_by = None
+                session.add(job)
+            session.commit()
+
+
+def _run_all_tenants(worker_id: str) -> int:
+    ran = 0
+    for tenant in known_tenants():
+        with tenant_scope(tenant):
+            ran += run_pending(limit=TENANT_BATCH, worker_id=worker_id)
+    return ran
+
+
+def _worker_loop(worker_id: str):
+    while not _stop.is_set():
+        try:
+            ran = _run_all_tenants(worker_id)
+        except Exception:
+            logger.exception("Job worker %s crashed while polling", worker_id)
+            ran = 0
+        if not ran:
+            _wakeup.wait(POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def start_workers(count: int = JOB_WORKERS):
+    if _threads:
+        return
+    _stop.clear()
+    requeue_stale_jobs()
+    prefix = f"{os.getpid()}"
+    for index in range(count):
+        thread = threading.Thread(
+            target=_worker_loop, args=(f"{prefix}-{index}",), name=f"job-worker-{index}", daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+
+
+def stop_workers(timeout: float = 10.0):
+    _stop.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
@@ -0,0 +1,113 @@
+import html
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+from sqlmodel import Session
+
+from core import blobs
+from core.circuit import TERMINAL_OFFSET
+from core.jobs import enqueue
+
+PREVIEW_DIR = os.getenv("PREVIEW_DIR", "./media/previews")
+# Bump when the drawing changes so cached URLs are not reused for the new look
+PREVIEW_VERSION = 1
+PADDING = 50
+MAX_COMPONENTS = 2000
+
+_STROKE = {
+    "battery": "#e0a000", "resistor": "#b05a2a", "bulb": "#f2c200", "wire": "#444",
+    "ammeter": "#2a7ab0", "voltmeter": "#2a7ab0", "input-0": "#888", "input-1": "#2e9e44", "output": "#2a7ab0",
+}
+_LABELS = {
+    "battery": "B", "resistor": "R", "ammeter": "A", "voltmeter": "V", "input-0": "0", "input-1": "1",
+    "output": "OUT", "not": "NOT", "and": "AND", "or": "OR", "nand": "NAND", "nor": "NOR", "xor": "XOR", "xnor": "XNOR",
+}
+
+
+def preview_path(data_hash: str) -> str:
+    return os.path.join(PREVIEW_DIR, data_hash[:2], data_hash, f"v{PREVIEW_VERSION}.svg")
+
+
+def preview_url(data_hash: Optional[str]) -> Optional[str]:
+    if not data_hash:
+        return None
+    return f"/circuits/previews/{data_hash}/v{PREVIEW_VERSION}.svg"
+
+
+def _number(value, default=0.0) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return default
+    return float(value)
+
+
+def _symbol(kind: str, item: Dict) -> str:
+    stroke = _STROKE.get(kind, "#333")
+    half = TERMINAL_OFFSET
+    if kind in ("switch", "switch-on", "switch-off"):
+        closed = item.get("is_on", kind == "switch-on")
+        blade = f'<line x1="-12" y1="0" x2="12" y2="{0 if closed else -14}"/>'
+        return (
+            f'<g stroke="{stroke}" stroke-width="3"><line x1="-{half}" y1="0" x2="-12" y2="0"/>{blade}'
+            f'<line x1="12" y1="0" x2="{half}" y2="0"/></g>'
+        )
+    if kind == "wire":
+        return f'<line x1="-{half}" y1="0" x2="{half}" y2="0" stroke="{stroke}" stroke-width="3"/>'
+    if kind == "bulb":
+        return (
+            f'<g stroke="{stroke}" stroke-width="3"><line x1="-{half}" y1="0" x2="{half}" y2="0"/>'
+            '<circle r="14" fill="#fff8d0"/></g>'
+        )
+    label = html.escape(_LABELS.get(kind, kind[:4].upper()))
+    body = (
+        f'<rect x="-24" y="-16" width="48" height="32" rx="4" fill="#fff" stroke="{stroke}" stroke-width="2"/>'
+        f'<text y="5" text-anchor="middle" font-size="12" font-family="sans-serif" fill="{stroke}">{label}</text>'
+    )
+    if kind in ("battery", "resistor", "ammeter", "voltmeter"):
+        leads = f'<line x1="-{half}" y1="0" x2="{half}" y2="0" stroke="{stroke}" stroke-width="3"/>'
+        return leads + body
+    return body
+
+
+def render_svg(components: List[Dict]) -> str:
+    items = [item for item in components[:MAX_COMPONENTS] if isinstance(item, dict) and isinstance(item.get("type"), str)]
+    if not items:
+        return '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100" width="160" height="160"></svg>'
+    xs = [_number(item.get("x")) for item in items]
+    ys = [_number(item.get("y")) for item in items]
+    left, top = min(xs) - PADDING, min(ys) - PADDING
+    width, height = max(xs) - min(xs) + 2 * PADDING, max(ys) - min(ys) + 2 * PADDING
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{left:g} {top:g} {width:g} {height:g}" '
+        f'width="160" height="{max(1, round(160 * height / width))}">'
+    ]
+    for item, x, y in zip(items, xs, ys):
+        rotation = _number(item.get("rotation"))
+        parts.append(f'<g transform="translate({x:g} {y:g}) rotate({rotation:g})">{_symbol(item["type"], item)}</g>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_preview(session: Session, data_hash: str) -> Optional[str]:
+    path = preview_path(data_hash)
+    if os.path.exists(path):
+        return path
+    data = blobs.load(session.connection(), data_hash)
+    if data is None:
+        return None
+    components = data.get("components") if isinstance(data, dict) else None
+    svg = render_svg(components if isinstance(components, list) else [])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so readers never see a half-written file
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(svg)
+    os.replace(tmp_path, path)
+    return path
+
+
+def schedule_preview(session: Session, data_hash: Optional[str]):
+    if not data_hash or os.path.exists(preview_path(data_hash)):
+        return None
+    return enqueue(session, "render_preview", {"data_hash": data_hash}, priority=-1)
@@ -0,0 +1,215 @@
+import hashlib
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+from sqlmodel import Session, create_engine
+
+from core.metrics import Counter, registry
+from database import SQL_ECHO, current_tenant, get_engine, get_session, in_shared_transaction, known_tenants
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replica URLs; "{tenant}" is replaced like in TENANT_DATABASE_URL
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+# For SQLite: this many read-only engines on the primary file (WAL lets them read while it writes)
+SQLITE_READ_REPLICAS = int(os.getenv("SQLITE_READ_REPLICAS", "0"))
+DEFAULT_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "2.0"))
+# A client that just wrote reads from the primary for this long (read-your-writes)
+STICKY_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5.0"))
+HEARTBEAT_INTERVAL = 1.0
+LAG_CACHE_SECONDS = 0.5
+
+READ_ROUTING = registry.register(Counter(
+    "db_read_routing_total",
+    "Read-only sessions by where they were served",
+    ("target",),
+))
+
+_replicas: Dict[int, List[Engine]] = {}
+_round_robin: Dict[int, "itertools.count"] = {}
+_lag_cache: Dict[int, Tuple[float, Optional[float]]] = {}
+# Readers on the primary's own file: a committed write is visible to their next transaction
+_same_storage: set = set()
+_last_write: Dict[Tuple[str, str], float] = {}
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def replication_enabled() -> bool:
+    return bool(READ_REPLICA_URLS) or SQLITE_READ_REPLICAS > 0
+
+
+def _sqlite_readers(primary: Engine) -> List[Engine]:
+    path = primary.url.database
+    if not path or path == ":memory:":
+        return []
+    with primary.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    readers = []
+    for _ in range(SQLITE_READ_REPLICAS):
+        reader = create_engine(
+            f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true", echo=SQL_ECHO
+        )
+        _same_storage.add(id(reader))
+        readers.append(reader)
+    return readers
+
+
+def replicas_for(primary: Engine, tenant: str) -> List[Engine]:
+    key = id(primary)
+    engines = _replicas.get(key)
+    if engines is not None:
+        return engines
+    with _lock:
+        engines = _replicas.get(key)
+        if engines is None:
+            engines = [
+                create_engine(make_url(url.replace("{tenant}", tenant)), echo=SQL_ECHO)
+                for url in READ_REPLICA_URLS
+            ]
+            if primary.url.get_backend_name() == "sqlite" and SQLITE_READ_REPLICAS > 0:
+                engines += _sqlite_readers(primary)
+            _replicas[key] = engines
+            _round_robin[key] = itertools.count()
+    return engines
+
+
+def replica_lag(replica: Engine) -> Optional[float]:
+    """Seconds the replica trails the primary's heartbeat, or None if it can't be read."""
+    if id(replica) in _same_storage:
+        return 0.0
+    now = time.monotonic()
+    cached = _lag_cache.get(id(replica))
+    if cached is not None and now - cached[0] < LAG_CACHE_SECONDS:
+        return cached[1]
+    try:
+        with replica.connect() as conn:
+            beat = conn.execute(text("SELECT value FROM sync_counter WHERE name = 'heartbeat'")).scalar()
+        lag = None if beat is None else max(0.0, time.time() - beat / 1000)
+    except Exception:
+        logger.warning("Read replica %s is unreachable", replica.url, exc_info=True)
+        lag = None
+    _lag_cache[id(replica)] = (now, lag)
+    return lag
+
+
+def client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+    return request.client.host if request.client else "-"
+
+
+def note_write(tenant: str, client: str):
+    now = time.monotonic()
+    with _lock:
+        _last_write[(tenant, client)] = now
+        if len(_last_write) > 10000:
+            for key in [k for k, at in _last_write.items() if now - at > STICKY_SECONDS]:
+                del _last_write[key]
+
+
+def recently_wrote(tenant: str, client: str) -> bool:
+    at = _last_write.get((tenant, client))
+    return at is not None and time.monotonic() - at < STICKY_SECONDS
+
+
+def choose_read_engine(tenant: str, client: Optional[str], max_lag: float) -> Engine:
+    primary = get_engine(tenant)
+    if not replication_enabled():
+        return primary
+    if client is not None and recently_wrote(tenant, client):
+        READ_ROUTING.inc("primary_sticky")
+        return primary
+    engines = replicas_for(primary, tenant)
+    if engines:
+        start = next(_round_robin[id(primary)])
+        for offset in range(len(engines)):
+            replica = engines[(start + offset) % len(engines)]
+            lag = replica_lag(replica)
+            if lag is not None and lag <= max_lag:
+                READ_ROUTING.inc("replica")
+                return replica
+    READ_ROUTING.inc("primary_fallback")
+    return primary
+
+
+def read_session(max_lag: float = DEFAULT_MAX_LAG):
+    """Session dependency for read-only routes: a replica no more than ``max_lag``
+    seconds behind, or the primary when none qualifies or the client just wrote."""
+    def dependency(request: Request):
+        if in_shared_transaction():
+            # Batch sub-requests read their own transaction's writes
+            yield from get_session()
+            return
+        target = choose_read_engine(current_tenant(), client_key(request), max_lag)
+        with Session(target) as session:
+            yield session
+    return dependency
+
+
+class ReadYourWritesMiddleware:
+    """Remembers clients whose writes succeeded so their next reads go to the primary."""
+
+    WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.WRITE_METHODS or not replication_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                note_write(current_tenant(), client_key(Request(scope)))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _write_heartbeats():
+    millis = int(time.time() * 1000)
+    for tenant in known_tenants():
+        with get_engine(tenant).begin() as conn:
+            updated = conn.execute(
+                text("UPDATE sync_counter SET value = :now WHERE name = 'heartbeat'"), {"now": millis}
+            )
+            if updated.rowcount == 0:
+                conn.execute(text("INSERT INTO sync_counter (name, value) VALUES ('heartbeat', :now)"), {"now": millis})
+
+
+def _heartbeat_loop():
+    while not _stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            _write_heartbeats()
+        except Exception:
+            logger.exception("Writing the replication heartbeat failed")
+
+
+def start():
+    # Only external replicas need a heartbeat; SQLite readers share the primary's file
+    global _thread
+    if _thread is not None or not READ_REPLICA_URLS:
+        return
+    _stop.clear()
+    _write_heartbeats()
+    _thread = threading.Thread(target=_heartbeat_loop, name="replica-heartbeat", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 5.0):
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
@@ -0,0 +1,144 @@
+import html
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+# Private-use markers survive snippet() untouched and are swapped for <mark> after escaping
+_HIT_START = "\ue000"
+_HIT_END = "\ue001"
+
+_FTS_TABLES = {
+    "stories_fts": {
+        "source": "stories",
+        "columns": ["title", "author", "short_description", "content"],
+    },
+    "paragraphs_fts": {
+        "source": "paragraphs",
+        "columns": ["content"],
+    },
+}
+
+
+def search_supported(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def setup_search(engine: Engine):
+    if not search_supported(engine):
+        return
+    with engine.begin() as conn:
+        for fts, spec in _FTS_TABLES.items():
+            source, columns = spec["source"], spec["columns"]
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+            ).first()
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{c}" for c in columns)
+            old_values = ", ".join(f"old.{c}" for c in columns)
+            # External-content index: the text lives only in the source table
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{column_list}, content='{source}', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            # Only reindex when searchable columns change, not e.g. on drawing updates
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+            if not exists:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def build_match_query(query: str) -> str:
+    # Quote every term so user input can never be parsed as FTS5 syntax; the last
+    # term is a prefix match to support search-as-you-type
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(snippet: str) -> str:
+    return html.escape(snippet or "").replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+
+def search_stories(session: Session, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    match = build_match_query(query)
+    if not match:
+        return 0, []
+    total = session.connection().execute(
+        text("SELECT count(*) FROM stories_fts WHERE stories_fts MATCH :match"), {"match": match}
+    ).scalar()
+    rows = session.connection().execute(
+        text(
+            "SELECT s.id, s.title, s.author, s.short_description, s.is_finished, "
+            "highlight(stories_fts, 0, :start, :end) AS title_hl, "
+            "snippet(stories_fts, -1, :start, :end, '…', 16) AS snippet, "
+            "bm25(stories_fts, 10.0, 5.0, 3.0, 1.0) AS score "
+            "FROM stories_fts JOIN stories s ON s.id = stories_fts.rowid "
+            "WHERE stories_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "start": _HIT_START, "end": _HIT_END, "limit": limit, "offset": offset},
+    ).mappings().all()
+    items = [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "author": row["author"],
+            "short_description": row["short_description"],
+            "is_finished": bool(row["is_finished"]),
+            "title_highlight": highlight(row["title_hl"]),
+            "snippet": highlight(row["snippet"]),
+            "score": -row["score"],
+        }
+        for row in rows
+    ]
+    return total, items
+
+
+def search_paragraphs(session: Session, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    match = build_match_query(query)
+    if not match:
+        return 0, []
+    total = session.connection().execute(
+        text("SELECT count(*) FROM paragraphs_fts WHERE paragraphs_fts MATCH :match"), {"match": match}
+    ).scalar()
+    rows = session.connection().execute(
+        text(
+            "SELECT p.id, p.story_id, p.user_id, p.\"order\", s.title AS story_title, "
+            "snippet(paragraphs_fts, 0, :start, :end, '…', 16) AS snippet, "
+            "bm25(paragraphs_fts) AS score "
+            "FROM paragraphs_fts JOIN paragraphs p ON p.id = paragraphs_fts.rowid "
+            "LEFT JOIN stories s ON s.id = p.story_id "
+            "WHERE paragraphs_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "start": _HIT_START, "end": _HIT_END, "limit": limit, "offset": offset},
+    ).mappings().all()
+    items = [
+        {
+            "id": row["id"],
+            "story_id": row["story_id"],
+            "story_title": row["story_title"],
+            "user_id": row["user_id"],
+            "order": row["order"],
+            "snippet": highlight(row["snippet"]),
+            "score": -row["score"],
+        }
+        for row in rows
+    ]
+    return total, items
@@ -1,3 +1,5 @@
+import os
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -7,6 +9,8 @@ from passlib.context import CryptContext
 SECRET_KEY = "CHANGE_THIS_SECRET_TO_A_RANDOM_VALUE"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+# Operator token for cross-tenant endpoints and for creating schools
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 
 pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
@@ -34,4 +38,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> dict:
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    return payload
\ No newline at end of file
+    return payload
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN and token and secrets.compare_digest(token, ADMIN_TOKEN))
@@ -0,0 +1,135 @@
+from typing import Dict, List
+
+from sqlalchemy import and_, or_, select, text
+from sqlmodel import Session
+
+from core.sync import current_revision
+from crud.tenant import create_tenant, register_tenant_user
+from database import DEFAULT_TENANT, engine, get_engine, valid_tenant
+from models.archive import ArchivedRecord
+from models.blob import Blob, BlobBand
+from models.challenge import Challenge, ChallengeAttempt, ChallengeProgress
+from models.circuit import Circuit
+from models.class_model import Class, ClassStory, ClassStudent
+from models.paragraph import Paragraph
+from models.story import Story
+from models.user import User
+
+
+class ShardMigrationError(RuntimeError):
+    pass
+
+
+def _plan(source, teacher_email: str) -> Dict[str, object]:
+    teacher_id = source.execute(
+        select(User.id).where(User.email == teacher_email, User.type == "teacher")
+    ).scalar()
+    if teacher_id is None:
+        raise ShardMigrationError(f"No teacher with email {teacher_email}")
+    class_ids = source.execute(select(Class.id).where(Class.teacher_id == teacher_id)).scalars().all()
+    student_ids = source.execute(
+        select(ClassStudent.student_id).where(ClassStudent.class_id.in_(class_ids))
+    ).scalars().all()
+    user_ids = sorted({teacher_id, *student_ids})
+    story_ids = source.execute(
+        select(ClassStory.story_id).where(ClassStory.class_id.in_(class_ids))
+    ).scalars().all()
+    blob_hashes = set()
+    for model in (Circuit, ChallengeAttempt):
+        blob_hashes.update(source.execute(
+            select(model.data_hash).where(model.user_id.in_(user_ids), model.data_hash != None)  # noqa: E711
+        ).scalars())
+
+    # Parents before children so foreign keys hold on databases that enforce them
+    return {
+        "user_ids": user_ids,
+        "tables": [
+            (User, User.id.in_(user_ids)),
+            (Story, Story.id.in_(story_ids)),
+            (Class, Class.id.in_(class_ids)),
+            (ClassStudent, ClassStudent.class_id.in_(class_ids)),
+            (ClassStory, ClassStory.class_id.in_(class_ids)),
+            (Paragraph, Paragraph.story_id.in_(story_ids)),
+            (Blob, Blob.hash.in_(blob_hashes)),
+            (BlobBand, BlobBand.hash.in_(blob_hashes)),
+            (Circuit, Circuit.user_id.in_(user_ids)),
+            (ChallengeAttempt, ChallengeAttempt.user_id.in_(user_ids)),
+            (ChallengeProgress, ChallengeProgress.user_id.in_(user_ids)),
+            # Index rows only: archive file paths stay valid from any shard
+            (ArchivedRecord, or_(
+                and_(ArchivedRecord.kind == "attempt", ArchivedRecord.owner_id.in_(user_ids)),
+                and_(ArchivedRecord.kind == "story", ArchivedRecord.owner_id.in_(class_ids)),
+            )),
+        ],
+    }
+
+
+def migrate_teacher(teacher_email: str, tenant: str, dry_run: bool = False, purge: bool = False) -> Dict[str, int]:
+    """Copy a teacher, their classes, students and everything those users own from the
+    home database into a tenant shard, then point the students' logins at the shard.
+
+    Ids are kept so sync cursors and client-side references stay valid; users pick up
+    the shard with their next login. With ``purge`` the copied rows are removed from
+    the home database afterwards.
+    """
+    if not valid_tenant(tenant) or tenant == DEFAULT_TENANT:
+        raise ShardMigrationError(f"Invalid target tenant '{tenant}'")
+    target_engine = get_engine(tenant)
+    if target_engine is engine:
+        raise ShardMigrationError("Sharding is not enabled (set TENANT_DATABASE_URL)")
+
+    counts: Dict[str, int] = {}
+    with engine.connect() as source:
+        plan = _plan(source, teacher_email)
+        copied: List[tuple] = []
+        for model, condition in plan["tables"]:
+            rows = [dict(row._mapping) for row in source.execute(select(model.__table__).where(condition))]
+            counts[model.__tablename__] = len(rows)
+            copied.append((model, condition, rows))
+        revision = current_revision(source)
+        if dry_run:
+            return counts
+
+        with target_engine.begin() as target:
+            clashing = target.execute(select(User.id).where(User.id.in_(plan["user_ids"]))).scalars().all()
+            if clashing:
+                raise ShardMigrationError(f"User ids {clashing[:10]} already exist in shard '{tenant}'")
+            for model, _, rows in copied:
+                if not rows:
+                    continue
+                statement = model.__table__.insert()
+                if model in (Blob, BlobBand, Story):
+                    # Content-addressed or shared with another migrated class
+                    statement = statement.prefix_with("OR IGNORE", dialect="sqlite")
+                target.execute(statement, rows)
+            # Challenges (and their reference solutions) follow the home database
+            challenges = [dict(row._mapping) for row in source.execute(select(Challenge.__table__))]
+            target.execute(Challenge.__table__.delete())
+            if challenges:
+                target.execute(Challenge.__table__.insert(), challenges)
+            # Sync cursors held by clients must not run ahead of the shard's counter
+            if current_revision(target) < revision:
+                updated = target.execute(
+                    text("UPDATE sync_counter SET value = :revision WHERE name = 'sync'"), {"revision": revision}
+                )
+                if updated.rowcount == 0:
+                    target.execute(
+                        text("INSERT INTO sync_counter (name, value) VALUES ('sync', :revision)"), {"revision": revision}
+                    )
+
+    with Session(engine) as home:
+        create_tenant(home, tenant)
+        with engine.connect() as source:
+            users = source.execute(select(User.email, User.code).where(User.id.in_(plan["user_ids"]))).all()
+        for email, code in users:
+            register_tenant_user(home, email, code, tenant)
+
+    if purge:
+        with engine.begin() as source:
+            for model, condition, _ in reversed(copied):
+                if model in (Blob, BlobBand, Story, Paragraph):
+                    # Blobs are shared by content and reclaimed by blobs.collect_garbage;
+                    # stories may still be assigned to classes that stay behind
+                    continue
+                source.execute(model.__table__.delete().where(condition))
+    return counts
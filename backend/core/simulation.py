@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+from core.circuit import BATTERY_VOLTAGE, CompiledCircuit
+
+# Ideal parts are modelled with small/large resistances so every switch or resistance
+# change is a finite conductance change on one branch (a rank-1 update)
+WIRE_OHM = 1e-3
+BATTERY_INTERNAL_OHM = 1e-2
+OPEN_SIEMENS = 0.0
+# Leak from every node to the reference keeps floating sub-circuits solvable
+GMIN = 1e-6
+# Sherman-Morrison updates accumulate rounding error; refactor after this many
+REFACTOR_AFTER = 64
+BULB_ON_THRESHOLD = 0.05
+
+MAX_SESSIONS = int(os.getenv("SIM_MAX_SESSIONS", "256"))
+IDLE_TIMEOUT = float(os.getenv("SIM_IDLE_TIMEOUT", "1800"))
+# The dense solve is O(n^3) in pure Python and holds the GIL (~0.2 s at 150 nodes,
+# ~3 s at 400), so larger circuits are refused rather than stalling the server
+MAX_NODES = int(os.getenv("SIM_MAX_NODES", "150"))
+
+SWITCH_TYPES = {"switch", "switch-on", "switch-off"}
+RESISTIVE_TYPES = {"resistor", "bulb"}
+
+
+class SimulationError(ValueError):
+    pass
+
+
+def _invert(matrix: List[List[float]]) -> List[List[float]]:
+    # Gauss-Jordan with partial pivoting; callers keep n within MAX_NODES
+    n = len(matrix)
+    work = [row[:] + [1.0 if i == j else 0.0 for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(work[r][col]))
+        if abs(work[pivot][col]) < 1e-300:
+            raise SimulationError("Circuit matrix is singular")
+        work[col], work[pivot] = work[pivot], work[col]
+        pivot_row = work[col]
+        scale = 1.0 / pivot_row[col]
+        for j in range(2 * n):
+            pivot_row[j] *= scale
+        for r in range(n):
+            if r == col:
+                continue
+            factor = work[r][col]
+            if factor:
+                row = work[r]
+                for j in range(col, 2 * n):
+                    row[j] -= factor * pivot_row[j]
+    return [row[n:] for row in work]
+
+
+class ElectricSimulation:
+    """Nodal analysis of a compiled electric circuit with an incrementally updated inverse."""
+
+    __slots__ = (
+        "circuit", "user_id", "conductance", "sources", "inverse", "voltages",
+        "updates", "lock", "last_used",
+    )
+
+    def __init__(self, circuit: CompiledCircuit, user_id: Optional[int] = None):
+        if circuit.kind != "electric":
+            raise SimulationError("Only electric circuits can be simulated")
+        if circuit.node_count > MAX_NODES:
+            raise SimulationError(
+                f"Circuit has {circuit.node_count} connection points; at most {MAX_NODES} can be simulated"
+            )
+        self.circuit = circuit
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.conductance = [self._branch_conductance(i) for i in range(len(circuit))]
+        self.sources = [0.0] * circuit.node_count
+        for index in range(len(circuit)):
+            if circuit.type_of(index) == "battery":
+                # Norton equivalent: the current is pushed from the start into the end terminal
+                current = circuit.params[index] / BATTERY_INTERNAL_OHM
+                self.sources[circuit.terminal_a[index]] -= current
+                self.sources[circuit.terminal_b[index]] += current
+        self._factor()
+
+    def _branch_conductance(self, index: int) -> float:
+        kind = self.circuit.type_of(index)
+        if kind in ("wire", "ammeter"):
+            return 1.0 / WIRE_OHM
+        if kind == "battery":
+            return 1.0 / BATTERY_INTERNAL_OHM
+        if kind in RESISTIVE_TYPES:
+            return 1.0 / self.circuit.params[index]
+        if kind in SWITCH_TYPES:
+            return 1.0 / WIRE_OHM if self.circuit.params[index] else OPEN_SIEMENS
+        return OPEN_SIEMENS  # voltmeter
+
+    def _factor(self):
+        n = self.circuit.node_count
+        matrix = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            matrix[i][i] = GMIN
+        for index, g in enumerate(self.conductance):
+            a, b = self.circuit.terminal_a[index], self.circuit.terminal_b[index]
+            if not g or a == b:
+                continue
+            matrix[a][a] += g
+            matrix[b][b] += g
+            matrix[a][b] -= g
+            matrix[b][a] -= g
+        self.inverse = _invert(matrix) if n else []
+        self.voltages = [sum(row[k] * self.sources[k] for k in range(n) if self.sources[k]) for row in self.inverse]
+        self.updates = 0
+
+    def _set_conductance(self, index: int, g: float):
+        delta = g - self.conductance[index]
+        self.conductance[index] = g
+        a, b = self.circuit.terminal_a[index], self.circuit.terminal_b[index]
+        if not delta or a == b:
+            return
+        # Sherman-Morrison: G' = G + delta*u*u^T with u = e_a - e_b
+        inverse = self.inverse
+        w = [row[a] - row[b] for row in inverse]
+        denominator = 1.0 + delta * (w[a] - w[b])
+        if self.updates >= REFACTOR_AFTER or abs(denominator) < 1e-9:
+            self._factor()
+            return
+        coefficient = delta / denominator
+        for i, wi in enumerate(w):
+            if wi:
+                scaled = coefficient * wi
+                row = inverse[i]
+                for j, wj in enumerate(w):
+                    row[j] -= scaled * wj
+        # v' = G'^-1 I = v - coefficient * w * (u^T v)
+        drop = coefficient * (self.voltages[a] - self.voltages[b])
+        self.voltages = [v - drop * wi for v, wi in zip(self.voltages, w)]
+        self.updates += 1
+
+    def resolve(self, component: Union[int, str]) -> int:
+        if isinstance(component, int) and not isinstance(component, bool):
+            if 0 <= component < len(self.circuit):
+                return component
+        elif component in self.circuit.ids:
+            return self.circuit.ids.index(component)
+        raise SimulationError(f"Unknown component {component!r}")
+
+    def set_switch(self, component: Union[int, str], is_on: Optional[bool] = None):
+        index = self.resolve(component)
+        if self.circuit.type_of(index) not in SWITCH_TYPES:
+            raise SimulationError(f"Component {component!r} is not a switch")
+        closed = not self.circuit.params[index] if is_on is None else is_on
+        self.circuit.params[index] = 1.0 if closed else 0.0
+        self._set_conductance(index, self._branch_conductance(index))
+
+    def set_resistance(self, component: Union[int, str], ohm: float):
+        index = self.resolve(component)
+        if self.circuit.type_of(index) not in RESISTIVE_TYPES:
+            raise SimulationError(f"Component {component!r} has no adjustable resistance")
+        if ohm <= 0:
+            raise SimulationError("Resistance must be positive")
+        self.circuit.params[index] = ohm
+        self._set_conductance(index, self._branch_conductance(index))
+
+    def result(self) -> Dict:
+        circuit, v = self.circuit, self.voltages
+        components, bulbs = [], []
+        for index in range(len(circuit)):
+            kind = circuit.type_of(index)
+            a, b = circuit.terminal_a[index], circuit.terminal_b[index]
+            voltage = v[b] - v[a]
+            if kind == "battery":
+                current = (circuit.params[index] - voltage) / BATTERY_INTERNAL_OHM
+            else:
+                current = -voltage * self.conductance[index]
+            components.append({
+                "index": index, "id": circuit.ids[index], "type": kind,
+                "current": current, "voltage": voltage,
+            })
+            if kind == "bulb":
+                # Relative to the bulb wired straight across one default battery
+                brightness = min(1.0, (voltage * voltage) / (BATTERY_VOLTAGE * BATTERY_VOLTAGE))
+                bulbs.append({
+                    "index": index, "id": circuit.ids[index],
+                    "brightness": brightness, "on": brightness >= BULB_ON_THRESHOLD,
+                })
+        return {"components": components, "bulbs": bulbs}
+
+
+_sessions: "OrderedDict[str, ElectricSimulation]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _evict_locked(now: float):
+    while _sessions:
+        session_id, simulation = next(iter(_sessions.items()))
+        if len(_sessions) > MAX_SESSIONS or now - simulation.last_used > IDLE_TIMEOUT:
+            _sessions.pop(session_id)
+        else:
+            break
+
+
+def create_session(circuit: CompiledCircuit, user_id: Optional[int]) -> str:
+    simulation = ElectricSimulation(circuit, user_id)
+    session_id = uuid.uuid4().hex
+    with _sessions_lock:
+        _sessions[session_id] = simulation
+        _evict_locked(time.monotonic())
+    return session_id
+
+
+def get_session(session_id: str, user_id: Optional[int]) -> Optional[ElectricSimulation]:
+    now = time.monotonic()
+    with _sessions_lock:
+        _evict_locked(now)
+        simulation = _sessions.get(session_id)
+        if simulation is None or simulation.user_id != user_id:
+            return None
+        # Least recently used sessions sit at the front and are evicted first
+        _sessions.move_to_end(session_id)
+        simulation.last_used = now
+    return simulation
+
+
+def close_session(session_id: str, user_id: Optional[int]) -> bool:
+    with _sessions_lock:
+        simulation = _sessions.get(session_id)
+        if simulation is None or simulation.user_id != user_id:
+            return False
+        del _sessions[session_id]
+    return True
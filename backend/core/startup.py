@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import SQLModel
+
+from core.metrics import Histogram, registry
+from models.challenge import Challenge
+from models.metadata import AppMetadata
+
+logger = logging.getLogger(__name__)
+
+CHALLENGES_FILE = os.getenv(
+    "CHALLENGES_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "challenges.json")
+)
+CHALLENGES_FORMAT = 1
+# Bump for DDL the models do not describe, e.g. the search tables and triggers
+SCHEMA_REVISION = 1
+CHALLENGE_FIELDS = ("title", "description", "workspace_type", "difficulty", "requirements")
+
+STARTUP_PHASES = registry.register(Histogram(
+    "startup_phase_seconds",
+    "Time spent in each phase of process startup",
+    ("phase",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+))
+
+
+class StartupTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        # Phases run once per tenant add up
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        STARTUP_PHASES.observe(seconds, name)
+
+    def report(self) -> Dict[str, float]:
+        total = time.perf_counter() - self.started
+        logger.info(
+            "Startup finished in %.0f ms (%s)", total * 1000,
+            ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items()),
+        )
+        return {**self.phases, "total": total}
+
+
+# Created when the database module is first imported, so "imports" covers loading the app
+timings = StartupTimings()
+
+
+def schema_fingerprint(metadata=SQLModel.metadata) -> str:
+    parts = [f"revision:{SCHEMA_REVISION}"]
+    for table in metadata.sorted_tables:
+        parts.append(f"table:{table.name}")
+        parts.extend(
+            f"column:{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}"
+            for column in table.columns
+        )
+        parts.extend(
+            f"index:{index.name}:{','.join(column.name for column in index.columns)}:{index.unique}"
+            for index in sorted(table.indexes, key=lambda index: index.name or "")
+        )
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def read_metadata(engine: Engine, key: str) -> Optional[str]:
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(AppMetadata.value).where(AppMetadata.key == key)).scalar()
+    except SQLAlchemyError:
+        # A new database has no metadata table yet
+        return None
+
+
+def write_metadata(connection, key: str, value: str):
+    now = datetime.now(timezone.utc)
+    updated = connection.execute(
+        update(AppMetadata).where(AppMetadata.key == key).values(value=value, updated_at=now)
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(AppMetadata).values(key=key, value=value, updated_at=now))
+
+
+def load_challenge_definitions(path: str = CHALLENGES_FILE) -> Tuple[str, List[dict]]:
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    document = json.loads(raw)
+    if document.get("version") != CHALLENGES_FORMAT:
+        raise ValueError(f"{path} has format version {document.get('version')}, expected {CHALLENGES_FORMAT}")
+    return hashlib.sha256(raw).hexdigest(), document["challenges"]
+
+
+def _reference_digest(reference) -> str:
+    return hashlib.sha256(json.dumps(reference, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _seeded_values(definition: dict, current, seeded_references: Dict[str, str]) -> dict:
+    values = {field: definition[field] for field in CHALLENGE_FIELDS}
+    reference = ((current.requirements if current is not None else None) or {}).get("reference")
+    # A reference the file did not write was set by a teacher and outlives file updates
+    if reference is not None and seeded_references.get(str(definition["id"])) != _reference_digest(reference):
+        values["requirements"] = {**(values["requirements"] or {}), "reference": reference}
+    return values
+
+
+def seed_challenges(engine: Engine, path: str = CHALLENGES_FILE) -> int:
+    """Upsert the challenge definitions from the data file unless this database already
+    has the file's current contents; returns how many challenges were written.
+
+    The file owns every field except a reference solution set through the API, which is
+    kept; the "challenge_references" metadata records which references the file wrote.
+    """
+    digest, definitions = load_challenge_definitions(path)
+    if read_metadata(engine, "challenges") == digest:
+        return 0
+    seeded_references = json.loads(read_metadata(engine, "challenge_references") or "{}")
+    with engine.begin() as connection:
+        existing = {
+            row.id: row for row in connection.execute(
+                select(Challenge.__table__).where(Challenge.id.in_([d["id"] for d in definitions]))
+            )
+        }
+        values = {d["id"]: _seeded_values(d, existing.get(d["id"]), seeded_references) for d in definitions}
+        added = [d for d in definitions if d["id"] not in existing]
+        changed = [
+            d for d in definitions
+            if d["id"] in existing
+            and any(getattr(existing[d["id"]], field) != values[d["id"]][field] for field in CHALLENGE_FIELDS)
+        ]
+        if added:
+            # Another process booting at the same time may have inserted them already
+            connection.execute(
+                insert(Challenge).prefix_with("OR IGNORE", dialect="sqlite"),
+                [{"id": d["id"], **values[d["id"]]} for d in added],
+            )
+        for definition in changed:
+            connection.execute(
+                update(Challenge).where(Challenge.id == definition["id"])
+                .values(**values[definition["id"]])
+            )
+        write_metadata(connection, "challenges", digest)
+        write_metadata(connection, "challenge_references", json.dumps({
+            str(d["id"]): _reference_digest(d["requirements"]["reference"])
+            for d in definitions if "reference" in (d["requirements"] or {})
+        }, sort_keys=True))
+    logger.info("Seeded challenges from %s: %d added, %d updated", path, len(added), len(changed))
+    return len(added) + len(changed)
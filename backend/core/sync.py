@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from typing import Dict, Type
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import SQLModel
+
+from models.challenge import ChallengeAttempt, ChallengeProgress
+from models.circuit import Circuit
+from models.sync import SyncTombstone
+
+TRACKED: Dict[Type[SQLModel], str] = {
+    Circuit: "circuit",
+    ChallengeAttempt: "attempt",
+    ChallengeProgress: "progress",
+}
+
+
+def next_revision(connection) -> int:
+    # The counter row is updated inside the writing transaction, so SQLite's single
+    # writer makes revisions commit in order and a visible value N means every
+    # change up to N is visible too
+    updated = connection.execute(text("UPDATE sync_counter SET value = value + 1 WHERE name = 'sync'"))
+    if updated.rowcount == 0:
+        connection.execute(text("INSERT INTO sync_counter (name, value) VALUES ('sync', 1)"))
+    return connection.execute(text("SELECT value FROM sync_counter WHERE name = 'sync'")).scalar()
+
+
+def current_revision(connection) -> int:
+    return connection.execute(text("SELECT value FROM sync_counter WHERE name = 'sync'")).scalar() or 0
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _stamp_revisions(session, flush_context, instances):
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if type(obj) in TRACKED and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in TRACKED]
+    if not changed and not deleted:
+        return
+
+    # Everything written by one flush shares a revision
+    revision = next_revision(session.connection())
+    now = datetime.now(timezone.utc)
+    for obj in changed:
+        obj.revision = revision
+        obj.updated_at = now
+    for obj in deleted:
+        session.add(SyncTombstone(
+            entity=TRACKED[type(obj)], entity_id=obj.id, user_id=obj.user_id, revision=revision
+        ))
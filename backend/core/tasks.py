@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlmodel import Session
+
+from core import autosave
+from core.archive import archive_attempts, archive_finalized_stories, compact, term_cutoff
+from core.jobs import job_handler
+from core.previews import render_preview
+from crud.class_crud import build_finalized_entry, finalize_class_story
+from crud.paragraph import get_paragraphs_by_story
+from crud.story import get_story_by_id
+from crud.tenant import sync_directory
+from crud.user import delete_user_with_classes, get_user_by_id
+from database import current_tenant
+
+
+@job_handler("finalize_story")
+def finalize_story_job(session: Session, payload: dict) -> dict:
+    class_id, story_id = payload["class_id"], payload["story_id"]
+    story = get_story_by_id(session, story_id)
+    if not story:
+        raise LookupError("Story not found")
+    paragraphs = get_paragraphs_by_story(session, story_id)
+    if not paragraphs:
+        raise LookupError("No paragraphs found for this story")
+
+    entry = build_finalized_entry(story, paragraphs)
+    if not finalize_class_story(session, class_id, entry):
+        raise LookupError("Could not add finalized story")
+    return {"class_id": class_id, "story_id": story_id, "paragraphs_count": len(paragraphs)}
+
+
+@job_handler("delete_user")
+def delete_user_job(session: Session, payload: dict) -> dict:
+    user = get_user_by_id(session, payload["user_id"])
+    email = user.email if user else None
+    if not delete_user_with_classes(session, payload["user_id"]):
+        raise LookupError("Could not delete user")
+    sync_directory(email)
+    return {"user_id": payload["user_id"]}
+
+
+@job_handler("render_preview")
+def render_preview_job(session: Session, payload: dict) -> dict:
+    if not render_preview(session, payload["data_hash"]):
+        raise LookupError("Circuit data not found")
+    return {"data_hash": payload["data_hash"]}
+
+
+@job_handler("archive_cold_data")
+def archive_cold_data_job(session: Session, payload: dict) -> dict:
+    cutoff = datetime.fromisoformat(payload["before"]) if payload.get("before") else term_cutoff()
+    # Saves still buffered in memory must reach their rows before the rows move
+    autosave.flush()
+    engine = session.get_bind()
+    attempts = archive_attempts(engine, current_tenant(), cutoff)
+    stories = archive_finalized_stories(engine, current_tenant(), cutoff)
+    # End this session's read transaction so it does not hold VACUUM up
+    session.commit()
+    compact(engine)
+    return {"before": cutoff.isoformat(), "attempts": attempts, "stories": stories}
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from core import security
+from database import DEFAULT_TENANT, tenant_scope, valid_tenant
+
+
+def tenant_from_token(token: Optional[str]) -> str:
+    # Invalid or missing tokens fall back to the home shard; authentication itself
+    # is still enforced by get_current_user
+    if not token:
+        return DEFAULT_TENANT
+    try:
+        tenant = security.decode_access_token(token).get("tenant")
+    except Exception:
+        return DEFAULT_TENANT
+    return tenant if valid_tenant(tenant) else DEFAULT_TENANT
+
+
+def bearer_token(scope) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    return None
+
+
+class TenantMiddleware:
+    """Resolves the school from the JWT so get_session, jobs and autosave use its shard."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with tenant_scope(tenant_from_token(bearer_token(scope))):
+            await self.app(scope, receive, send)
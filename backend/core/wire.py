@@ -0,0 +1,161 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from core.circuit import CircuitError, CompiledCircuit, compile_components
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; without it only JSON is spoken
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+_COMPONENT_KEYS = ("type", "x", "y", "rotation")
+
+
+@dataclass(slots=True)
+class Component:
+    type: str
+    x: float
+    y: float
+    rotation: float = 0
+    extra: Optional[Dict[str, Any]] = None  # Any other keys (id, connections, values), kept verbatim
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"type": self.type, "x": self.x, "y": self.y, "rotation": self.rotation}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+@dataclass(slots=True)
+class CircuitPayload:
+    name: str
+    components: List[Component]
+    compiled: Optional[CompiledCircuit] = None
+
+
+@dataclass(slots=True)
+class AttemptPayload:
+    challenge_id: int
+    data: Dict[str, Any]
+    components: Optional[List[Component]] = None
+    compiled: Optional[CompiledCircuit] = None
+
+    def to_data(self) -> Dict[str, Any]:
+        if self.components is None:
+            return self.data
+        return {**self.data, "components": [c.to_dict() for c in self.components]}
+
+
+def msgpack_enabled() -> bool:
+    return msgpack is not None
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _fail(message: str):
+    raise HTTPException(status_code=422, detail=message)
+
+
+def decode_components(items) -> List[Component]:
+    if not isinstance(items, list):
+        _fail("components must be a list")
+    components = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            _fail(f"components[{index}] must be an object")
+        kind, x, y, rotation = item.get("type"), item.get("x"), item.get("y"), item.get("rotation", 0)
+        if not isinstance(kind, str) or not _is_number(x) or not _is_number(y) or not _is_number(rotation):
+            _fail(f"components[{index}] needs a string type and numeric x, y and rotation")
+        extra = {key: value for key, value in item.items() if key not in _COMPONENT_KEYS}
+        components.append(Component(kind, x, y, rotation, extra or None))
+    return components
+
+
+def compile_or_fail(components: List[Component]) -> CompiledCircuit:
+    try:
+        return compile_components([component.to_dict() for component in components])
+    except CircuitError as e:
+        _fail(str(e))
+
+
+async def read_body(request: Request) -> Any:
+    raw = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise HTTPException(status_code=415, detail="MessagePack is not supported by this server")
+        try:
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid MessagePack body: {e}")
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+
+async def circuit_body(request: Request) -> CircuitPayload:
+    body = await read_body(request)
+    if not isinstance(body, dict) or not isinstance(body.get("name"), str):
+        _fail("Body needs a string name and a components list")
+    components = decode_components(body.get("components"))
+    return CircuitPayload(body["name"], components, compile_or_fail(components))
+
+
+async def attempt_body(request: Request) -> AttemptPayload:
+    body = await read_body(request)
+    if not isinstance(body, dict):
+        _fail("Body must be an object")
+    challenge_id, data = body.get("challenge_id"), body.get("data")
+    if not isinstance(challenge_id, int) or isinstance(challenge_id, bool) or not isinstance(data, dict):
+        _fail("Body needs an integer challenge_id and a data object")
+    if "components" not in data:
+        return AttemptPayload(challenge_id, data)
+    components = decode_components(data["components"])
+    return AttemptPayload(challenge_id, data, components, compile_or_fail(components))
+
+
+def wants_msgpack(request: Request) -> bool:
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "").lower()
+    return any(media_type in accept for media_type in MSGPACK_TYPES)
+
+
+def respond(request: Request, payload: Any, shape: Any = None, status_code: int = 200):
+    """Return payload as MessagePack when the client asks for it; otherwise leave it to FastAPI.
+
+    shape mirrors the route's response_model, which FastAPI skips for a ready Response.
+    """
+    if not wants_msgpack(request):
+        return payload
+    if shape is not None:
+        adapter = TypeAdapter(shape)
+        content = adapter.dump_python(adapter.validate_python(payload, from_attributes=True), mode="json")
+    else:
+        content = jsonable_encoder(payload)
+    return Response(
+        msgpack.packb(content, use_bin_type=True),
+        status_code=status_code,
+        media_type=MSGPACK_MEDIA_TYPE,
+        headers={"Vary": "Accept"},
+    )
+
+
+def body_schema(model) -> dict:
+    # Bodies are read by hand, so the documented schema is attached explicitly
+    content = {"application/json": {"schema": model.model_json_schema()}}
+    if msgpack is not None:
+        content[MSGPACK_MEDIA_TYPE] = {"schema": model.model_json_schema()}
+    return {"requestBody": {"required": True, "content": content}}
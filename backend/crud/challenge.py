@@ -1,7 +1,12 @@
 from typing import List, Optional, Dict
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
+from core.archive import find_archived_attempt, forget_archived_attempt
+from core.fingerprint import similarity
 from schemas.challenge import ChallengeCreate
+from models.blob import Blob, BlobBand
 from models.challenge import Challenge, ChallengeAttempt, ChallengeProgress
+from models.class_model import Class, ClassStudent
 from models.user import User
 
 
@@ -12,6 +17,11 @@ def create_challenge(session: Session, data: ChallengeCreate):
     session.refresh(challenge)
     return challenge
 
+def public_challenge(challenge: Challenge) -> Dict:
+    # The reference solution is what grading checks against, so catalog reads never carry it
+    requirements = {key: value for key, value in (challenge.requirements or {}).items() if key != "reference"}
+    return {**challenge.model_dump(), "requirements": requirements}
+
 def get_all_challenges(session: Session):
     return session.exec(select(Challenge)).all()
 
@@ -49,13 +59,17 @@ def get_attempt(session: Session, user_id: int, challenge_id: int) -> Optional[C
     statement = select(ChallengeAttempt).where(
         (ChallengeAttempt.user_id == user_id) & (ChallengeAttempt.challenge_id == challenge_id)
     )
-    return session.exec(statement).first()
+    # Attempts from past terms are read through from cold storage
+    return session.exec(statement).first() or find_archived_attempt(session, user_id, challenge_id)
 
 
 def delete_attempt(session: Session, user_id: int, challenge_id: int) -> bool:
-    attempt = get_attempt(session, user_id, challenge_id)
+    statement = select(ChallengeAttempt).where(
+        (ChallengeAttempt.user_id == user_id) & (ChallengeAttempt.challenge_id == challenge_id)
+    )
+    attempt = session.exec(statement).first()
     if not attempt:
-        return False
+        return forget_archived_attempt(session, user_id, challenge_id)
     session.delete(attempt)
     session.commit()
     return True
@@ -142,7 +156,7 @@ def get_leaderboard(session: Session, limit: int = 10) -> List[Dict]:
         challenges_completed = len([p for p in progress_list if p.completed])
         
         leaderboard.append({
-            "username": user.username,
+            "username": f"{user.name} {user.surname}",
             "total_points": total_points,
             "challenges_completed": challenges_completed
         })
@@ -151,3 +165,119 @@ def get_leaderboard(session: Session, limit: int = 10) -> List[Dict]:
     leaderboard.sort(key=lambda x: x["total_points"], reverse=True)
     
     return leaderboard[:limit]
+
+
+def _submissions(challenge_id: int, class_id: Optional[int] = None, teacher_id: Optional[int] = None):
+    query = (
+        select(ChallengeAttempt.id, ChallengeAttempt.user_id, ChallengeAttempt.data_hash, Blob.wl_hash, Blob.minhash)
+        .join(Blob, Blob.hash == ChallengeAttempt.data_hash)
+        .where(ChallengeAttempt.challenge_id == challenge_id)
+    )
+    if class_id is not None or teacher_id is not None:
+        # A student in several of the teacher's classes is still one submission
+        query = query.join(ClassStudent, ClassStudent.student_id == ChallengeAttempt.user_id).distinct()
+    if class_id is not None:
+        query = query.where(ClassStudent.class_id == class_id)
+    if teacher_id is not None:
+        query = query.join(Class, Class.id == ClassStudent.class_id).where(Class.teacher_id == teacher_id)
+    return query
+
+
+def teaches_student(session: Session, teacher_id: int, student_id: int) -> bool:
+    return session.exec(
+        select(ClassStudent.class_id).join(Class, Class.id == ClassStudent.class_id)
+        .where(Class.teacher_id == teacher_id, ClassStudent.student_id == student_id).limit(1)
+    ).first() is not None
+
+
+def get_submission_clusters(
+    session: Session, challenge_id: int, class_id: Optional[int] = None, threshold: float = 0.8,
+    teacher_id: Optional[int] = None
+) -> List[Dict]:
+    attempts = session.exec(_submissions(challenge_id, class_id, teacher_id)).all()
+    signatures = {row.data_hash: row.minhash for row in attempts}
+    parent = {key: key for key in signatures}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    # Candidate pairs are blobs sharing an LSH bucket, found through the (band, bucket)
+    # index instead of comparing every pair of submissions
+    hashes = select(ChallengeAttempt.data_hash).where(ChallengeAttempt.challenge_id == challenge_id)
+    left, right = aliased(BlobBand), aliased(BlobBand)
+    candidates = session.exec(
+        select(left.hash, right.hash).distinct()
+        .join(right, (right.band == left.band) & (right.bucket == left.bucket) & (right.hash > left.hash))
+        .where(left.hash.in_(hashes), right.hash.in_(hashes))
+    ).all()
+    edges = []
+    for a, b in candidates:
+        if a in parent and b in parent:
+            score = similarity(signatures[a], signatures[b])
+            if score >= threshold:
+                parent[find(a)] = find(b)
+                edges.append((a, score))
+
+    # Designs with the same structure hash always cluster, even when their signatures
+    # share no bucket
+    first_by_wl = {}
+    for row in attempts:
+        if row.wl_hash and row.minhash:
+            first = first_by_wl.setdefault(row.wl_hash, row.data_hash)
+            parent[find(row.data_hash)] = find(first)
+
+    groups: Dict[str, List] = {}
+    for row in attempts:
+        groups.setdefault(find(row.data_hash), []).append(row)
+    lowest: Dict[str, float] = {}
+    for key, score in edges:
+        root = find(key)
+        lowest[root] = min(score, lowest.get(root, 1.0))
+
+    clusters = []
+    for root, rows in groups.items():
+        if len(rows) < 2:
+            continue
+        clusters.append({
+            "size": len(rows),
+            "min_similarity": lowest.get(root, 1.0),
+            # Equal WL hashes: isomorphic circuits always match, but a match is not a proof
+            "same_structure_hash": len({row.wl_hash for row in rows}) == 1,
+            "attempts": [
+                {"attempt_id": row.id, "user_id": row.user_id, "wl_hash": row.wl_hash}
+                for row in sorted(rows, key=lambda r: r.user_id)
+            ],
+        })
+    clusters.sort(key=lambda c: (-c["size"], -c["min_similarity"]))
+    return clusters
+
+
+def get_similar_attempts(
+    session: Session, attempt: ChallengeAttempt, threshold: float = 0.5, limit: int = 10,
+    teacher_id: Optional[int] = None
+) -> List[Dict]:
+    source = session.get(Blob, attempt.data_hash) if attempt.data_hash else None
+    if source is None or not source.minhash:
+        return []
+    mine, theirs = aliased(BlobBand), aliased(BlobBand)
+    rows = session.exec(
+        _submissions(attempt.challenge_id, teacher_id=teacher_id).distinct()
+        .join(theirs, theirs.hash == ChallengeAttempt.data_hash)
+        .join(mine, (mine.band == theirs.band) & (mine.bucket == theirs.bucket))
+        .where(mine.hash == source.hash, ChallengeAttempt.id != attempt.id)
+    ).all()
+    similar = []
+    for row in rows:
+        score = similarity(source.minhash, row.minhash)
+        if score >= threshold:
+            similar.append({
+                "attempt_id": row.id,
+                "user_id": row.user_id,
+                "similarity": score,
+                "same_structure_hash": row.wl_hash == source.wl_hash,
+            })
+    similar.sort(key=lambda item: -item["similarity"])
+    return similar[:limit]
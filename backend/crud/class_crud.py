@@ -1,10 +1,14 @@
+from sqlalchemy import insert, text
 from sqlmodel import Session, select
+from core.archive import archived_finalized_stories, iter_archived_stories
 from models.class_model import Class, ClassStudent, ClassStory
 from models.user import User
 from models.story import Story
+from models.paragraph import Paragraph
 from schemas.class_schema import ClassCreate, ClassUpdate
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterator
 import json
+from datetime import datetime, timezone
 
 def create_class(session: Session, class_in: ClassCreate) -> Class:
     new_class = Class(
@@ -120,27 +124,184 @@ def remove_student_from_class(session: Session, class_id: int, student_id: int)
     session.commit()
     return True
 
-def add_finalized_story(session: Session, class_id: int, story_data: dict) -> Optional[Class]:
+def build_finalized_entry(story: Story, paragraphs: list) -> dict:
+    return {
+        "story_id": story.id,
+        "paragraphs": [
+            {
+                "paragraph_id": paragraph.id,
+                "content": paragraph.content,
+                "drawing": paragraph.drawing,
+                "order": paragraph.order
+            }
+            for paragraph in paragraphs
+        ],
+        "story": {
+            "title": story.title,
+            "short_description": story.short_description,
+            "author": story.author
+        },
+        "finalized_at": datetime.now(timezone.utc).isoformat()
+    }
+
+def finalize_class_story(session: Session, class_id: int, story_data: dict) -> Optional[Class]:
+    # Appending the entry and unlinking the story commit together, and an entry already
+    # there for the story is replaced, so finalizing again (e.g. a retried job) never
+    # leaves a duplicate
     class_obj = session.get(Class, class_id)
     if not class_obj:
         return None
-    
-    # Parse existing finalized_stories
-    finalized = []
-    if class_obj.finalized_stories:
-        try:
-            finalized = json.loads(class_obj.finalized_stories)
-        except:
-            finalized = []
-    
+
+    finalized = [
+        entry for entry in _parse_finalized(class_obj.finalized_stories)
+        if entry.get("story_id") != story_data["story_id"]
+    ]
     finalized.append(story_data)
     class_obj.finalized_stories = json.dumps(finalized)
-    
     session.add(class_obj)
+
+    class_story = session.exec(
+        select(ClassStory).where(ClassStory.class_id == class_id, ClassStory.story_id == story_data["story_id"])
+    ).first()
+    if class_story:
+        session.delete(class_story)
+
     session.commit()
     session.refresh(class_obj)
     return class_obj
 
+def _parse_finalized(raw: Optional[str]) -> list:
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return []
+
+def get_finalized_stories(session: Session, class_id: int) -> Optional[list]:
+    statement = select(Class.finalized_stories).where(Class.id == class_id)
+    result = session.exec(statement).first()
+    if result is None and session.get(Class, class_id) is None:
+        return None
+    # Stories from past terms live in cold storage and come first
+    archived = archived_finalized_stories(session, [class_id]).get(class_id, [])
+    return archived + _parse_finalized(result)
+
+def get_finalized_stories_by_class(session: Session, classes: List[Class]) -> Dict[int, list]:
+    archived = archived_finalized_stories(session, [class_obj.id for class_obj in classes])
+    return {
+        class_obj.id: archived.get(class_obj.id, []) + _parse_finalized(class_obj.finalized_stories)
+        for class_obj in classes
+    }
+
+# SQLite's JSON functions pick the entries apart, so the paragraph texts and drawings
+# of the class's other stories never reach Python
+_FINALIZED_SUMMARIES = text(
+    "SELECT json_extract(s.value, '$.story_id') AS story_id, json_extract(s.value, '$.story') AS story, "
+    "(SELECT json_group_array(json_extract(p.value, '$.paragraph_id')) FROM "
+    "(SELECT value FROM json_each(s.value, '$.paragraphs') ORDER BY json_extract(value, '$.order')) AS p"
+    ") AS paragraph_ids "
+    "FROM classes AS c, json_each(c.finalized_stories) AS s "
+    "WHERE c.id = :class_id AND json_valid(c.finalized_stories) "
+    "AND (:story_id IS NULL OR json_extract(s.value, '$.story_id') = :story_id) "
+    "ORDER BY s.key"
+)
+_FINALIZED_PARAGRAPHS = text(
+    "SELECT s.key AS entry, json_extract(p.value, '$.paragraph_id') AS paragraph_id, "
+    "json_extract(p.value, '$.content') AS content, json_extract(p.value, '$.drawing') AS drawing, "
+    "json_extract(p.value, '$.order') AS \"order\" "
+    "FROM classes AS c, json_each(c.finalized_stories) AS s, json_each(s.value, '$.paragraphs') AS p "
+    "WHERE c.id = :class_id AND json_valid(c.finalized_stories) AND json_extract(s.value, '$.story_id') = :story_id "
+    "ORDER BY s.key, p.key"
+)
+
+def _finalized_summary(entry: dict) -> dict:
+    paragraphs = sorted(entry.get("paragraphs", []), key=lambda p: p.get("order", 0))
+    return {
+        "story_id": entry.get("story_id"),
+        "story": entry.get("story", {}),
+        "paragraph_ids": [p.get("paragraph_id") for p in paragraphs if p.get("paragraph_id") is not None],
+    }
+
+def _json_functions(session: Session) -> bool:
+    return session.get_bind().dialect.name == "sqlite"
+
+def iter_finalized_summaries(session: Session, class_id: int, story_id: Optional[int] = None) -> Iterator[dict]:
+    """Story id, title and paragraph ids of each finalized story (archived ones first),
+    without loading the paragraph texts and drawings."""
+    for entry in iter_archived_stories(session, class_id, story_id):
+        yield {**_finalized_summary(entry), "archived": True}
+    if not _json_functions(session):
+        raw = session.exec(select(Class.finalized_stories).where(Class.id == class_id)).first()
+        for entry in _parse_finalized(raw):
+            if story_id is None or entry.get("story_id") == story_id:
+                yield _finalized_summary(entry)
+        return
+    for row in session.execute(_FINALIZED_SUMMARIES, {"class_id": class_id, "story_id": story_id}):
+        yield {
+            "story_id": row.story_id,
+            "story": json.loads(row.story) if row.story else {},
+            "paragraph_ids": [pid for pid in json.loads(row.paragraph_ids) if pid is not None],
+        }
+
+def iter_finalized_paragraphs(
+    session: Session, class_id: int, story_id: int, paragraph_ids: List[int], archived: bool = False
+) -> Iterator[dict]:
+    """The snapshot copies of ``paragraph_ids`` from a finalized story, one at a time."""
+    wanted = set(paragraph_ids)
+    if archived:
+        entries = iter_archived_stories(session, class_id, story_id)
+    elif not _json_functions(session):
+        raw = session.exec(select(Class.finalized_stories).where(Class.id == class_id)).first()
+        entries = (entry for entry in _parse_finalized(raw) if entry.get("story_id") == story_id)
+    else:
+        first_entry = None
+        for row in session.execute(_FINALIZED_PARAGRAPHS, {"class_id": class_id, "story_id": story_id}):
+            # Only the first entry for the story, like the archived and parsed paths
+            if first_entry is None:
+                first_entry = row.entry
+            elif row.entry != first_entry:
+                break
+            if row.paragraph_id in wanted:
+                yield {"content": row.content or "", "drawing": row.drawing, "order": row.order or 0}
+        return
+    for entry in entries:
+        for paragraph in entry.get("paragraphs", []):
+            if paragraph.get("paragraph_id") in wanted:
+                yield {
+                    "content": paragraph.get("content", ""),
+                    "drawing": paragraph.get("drawing"),
+                    "order": paragraph.get("order", 0),
+                }
+        break
+
+def get_class_student_ids(session: Session, class_id: int) -> List[int]:
+    statement = select(ClassStudent.student_id).where(ClassStudent.class_id == class_id).order_by(ClassStudent.student_id)
+    return list(session.exec(statement).all())
+
+def assign_story_excerpts(session: Session, class_id: int, story_id: int, excerpts: List[str], assignees: List[int]) -> List[Dict]:
+    # One transaction: all paragraphs via a single executemany INSERT plus the class link
+    rows = [
+        {"story_id": story_id, "user_id": user_id, "content": content, "order": order}
+        for order, (content, user_id) in enumerate(zip(excerpts, assignees))
+    ]
+    paragraph_ids = []
+    if rows:
+        result = session.execute(insert(Paragraph).returning(Paragraph.id, sort_by_parameter_order=True), rows)
+        paragraph_ids = list(result.scalars())
+
+    linked = session.exec(
+        select(ClassStory).where(ClassStory.class_id == class_id, ClassStory.story_id == story_id)
+    ).first()
+    if not linked:
+        session.add(ClassStory(class_id=class_id, story_id=story_id))
+    session.commit()
+
+    return [
+        {"paragraph_id": paragraph_id, "user_id": row["user_id"], "order": row["order"], "content": row["content"]}
+        for paragraph_id, row in zip(paragraph_ids, rows)
+    ]
+
 def remove_story_from_class(session: Session, class_id: int, story_id: int) -> bool:
     statement = select(ClassStory).where(
         ClassStory.class_id == class_id,
@@ -1,7 +1,10 @@
+from sqlalchemy import case, update
+from sqlalchemy.orm import load_only
 from sqlmodel import Session, select
 from models.paragraph import Paragraph
 from schemas.paragraph import ParagraphCreate, ParagraphUpdate
-from typing import Optional, List
+from core.images import drawing_key, schedule_variants
+from typing import Optional, List, Iterator, Sequence, Dict
 
 def create_paragraph(session: Session, paragraph_in: ParagraphCreate, user_id: int) -> Paragraph:
     paragraph = Paragraph(
@@ -9,20 +12,34 @@ def create_paragraph(session: Session, paragraph_in: ParagraphCreate, user_id: i
         user_id=user_id,
         content=paragraph_in.content,
         drawing=paragraph_in.drawing,
+        drawing_key=drawing_key(paragraph_in.drawing),
         order=paragraph_in.order
     )
     session.add(paragraph)
     session.commit()
     session.refresh(paragraph)
+    schedule_variants(paragraph.drawing_key, paragraph.drawing)
     return paragraph
 
 def get_paragraph_by_id(session: Session, paragraph_id: int) -> Optional[Paragraph]:
     return session.get(Paragraph, paragraph_id)
 
-def get_paragraphs_by_story(session: Session, story_id: int) -> List[Paragraph]:
+def get_paragraphs_by_story(session: Session, story_id: int, fields: Optional[Sequence[str]] = None) -> List[Paragraph]:
     statement = select(Paragraph).where(Paragraph.story_id == story_id).order_by(Paragraph.order)
+    if fields:
+        statement = statement.options(load_only(*(getattr(Paragraph, field) for field in fields)))
     return list(session.exec(statement).all())
 
+def iter_paragraphs_by_ids(session: Session, paragraph_ids: List[int], chunk_size: int = 20) -> Iterator[Paragraph]:
+    # Yields in the order of paragraph_ids while holding at most one chunk of rows
+    for start in range(0, len(paragraph_ids), chunk_size):
+        chunk = paragraph_ids[start:start + chunk_size]
+        rows = {p.id: p for p in session.exec(select(Paragraph).where(Paragraph.id.in_(chunk))).all()}
+        for paragraph_id in chunk:
+            if paragraph_id in rows:
+                yield rows[paragraph_id]
+        session.expunge_all()
+
 def get_paragraphs_by_user(session: Session, user_id: int) -> List[Paragraph]:
     statement = select(Paragraph).where(Paragraph.user_id == user_id)
     return list(session.exec(statement).all())
@@ -33,14 +50,45 @@ def update_paragraph(session: Session, paragraph_id: int, paragraph_update: Para
         return None
     
     update_data = paragraph_update.model_dump(exclude_unset=True)
+    if "drawing" in update_data:
+        update_data["drawing_key"] = drawing_key(update_data["drawing"])
     for key, value in update_data.items():
         setattr(paragraph, key, value)
     
     session.add(paragraph)
     session.commit()
     session.refresh(paragraph)
+    if "drawing" in update_data:
+        schedule_variants(paragraph.drawing_key, paragraph.drawing)
     return paragraph
 
+def reorder_paragraphs(session: Session, story_id: int, paragraph_ids: List[int]) -> Optional[Dict[int, int]]:
+    current = session.exec(
+        select(Paragraph.id, Paragraph.order).where(Paragraph.story_id == story_id).order_by(Paragraph.order, Paragraph.id)
+    ).all()
+    positions = [paragraph_id for paragraph_id, _ in current]
+    moved = set(paragraph_ids)
+    if len(moved) != len(paragraph_ids) or not moved.issubset(positions):
+        return None
+
+    # Renumber densely; listed paragraphs fill the slots they occupied, in the requested order
+    requested = iter(paragraph_ids)
+    sequence = [next(requested) if paragraph_id in moved else paragraph_id for paragraph_id in positions]
+    old_order = dict(current)
+    new_order = {paragraph_id: index for index, paragraph_id in enumerate(sequence)}
+    changed = {pid: order for pid, order in new_order.items() if old_order[pid] != order}
+
+    if changed:
+        session.execute(
+            update(Paragraph)
+            .where(Paragraph.id.in_(changed))
+            .values(order=case(changed, value=Paragraph.id))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        session.expire_all()
+    return new_order
+
 def delete_paragraph(session: Session, paragraph_id: int) -> bool:
     paragraph = session.get(Paragraph, paragraph_id)
     if not paragraph:
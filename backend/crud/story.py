@@ -1,7 +1,8 @@
+from sqlalchemy.orm import load_only
 from sqlmodel import Session, select
 from models.story import Story
 from schemas.story import StoryCreate, StoryUpdate
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
 def create_story(session: Session, story_in: StoryCreate) -> Story:
     story = Story(
@@ -19,8 +20,11 @@ def create_story(session: Session, story_in: StoryCreate) -> Story:
 def get_story_by_id(session: Session, story_id: int) -> Optional[Story]:
     return session.get(Story, story_id)
 
-def get_all_stories(session: Session) -> List[Story]:
+def get_all_stories(session: Session, fields: Optional[Sequence[str]] = None) -> List[Story]:
     statement = select(Story)
+    if fields:
+        # Unlisted columns (e.g. the full content) are deferred and never read
+        statement = statement.options(load_only(*(getattr(Story, field) for field in fields)))
     return list(session.exec(statement).all())
 
 def update_story(session: Session, story_id: int, story_update: StoryUpdate) -> Optional[Story]:
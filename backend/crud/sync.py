@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional
+from sqlmodel import Session, select
+from models.challenge import ChallengeAttempt, ChallengeProgress
+from models.circuit import Circuit
+from models.sync import SyncTombstone
+from schemas.sync import SyncPush
+from core.sync import current_revision
+
+def get_changes(session: Session, user_id: int, since: Optional[int] = None) -> Dict:
+    # Rows are bounded by the cursor read first, so anything committed meanwhile
+    # is picked up by the next sync instead of being skipped
+    cursor = current_revision(session.connection())
+    lower = -1 if since is None else since
+
+    def changed(model):
+        return list(session.exec(
+            select(model).where(model.user_id == user_id, model.revision > lower, model.revision <= cursor)
+            .order_by(model.revision)
+        ).all())
+
+    rows = {"circuit": changed(Circuit), "attempt": changed(ChallengeAttempt), "progress": changed(ChallengeProgress)}
+    deleted = []
+    if since is not None:
+        deleted = session.exec(
+            select(SyncTombstone).where(
+                SyncTombstone.user_id == user_id, SyncTombstone.revision > since, SyncTombstone.revision <= cursor
+            ).order_by(SyncTombstone.revision)
+        ).all()
+    # A tombstone older than a live row with the same id was superseded by a reinsert
+    live = {(entity, row.id): row.revision for entity, items in rows.items() for row in items}
+    deleted = [t for t in deleted if live.get((t.entity, t.entity_id), -1) < t.revision]
+
+    return {
+        "cursor": cursor,
+        "full": since is None,
+        "circuits": rows["circuit"],
+        "attempts": rows["attempt"],
+        "progress": rows["progress"],
+        "deleted": [{"entity": t.entity, "id": t.entity_id, "revision": t.revision} for t in deleted],
+    }
+
+def apply_changes(session: Session, user_id: int, push: SyncPush) -> Dict:
+    # All offline writes land in one transaction; a row changed on the server after
+    # the client's base_revision is left alone and reported as a conflict
+    applied: List[Dict] = []
+    conflicts: List[Dict] = []
+    circuits = []
+
+    # Deletes go first so a row created in this push can never be mistaken for one being removed
+    for change in sorted(push.circuits, key=lambda c: not c.deleted):
+        circuit = None
+        if change.id is not None:
+            circuit = session.exec(select(Circuit).where(Circuit.id == change.id, Circuit.user_id == user_id)).first()
+            if circuit is None:
+                if not change.deleted:
+                    conflicts.append({"entity": "circuit", "id": change.id, "reason": "not_found"})
+                continue
+            if change.base_revision is not None and circuit.revision > change.base_revision:
+                conflicts.append({"entity": "circuit", "id": change.id, "reason": "stale", "revision": circuit.revision})
+                continue
+        if change.deleted:
+            if circuit is None:
+                continue
+            session.delete(circuit)
+            applied.append({"entity": "circuit", "id": change.id, "deleted": True})
+            continue
+        if circuit is None:
+            if change.name is None or change.data is None:
+                conflicts.append({"entity": "circuit", "client_ref": change.client_ref, "reason": "incomplete"})
+                continue
+            circuit = Circuit(user_id=user_id, name=change.name, data=change.data)
+        else:
+            if change.name is not None:
+                circuit.name = change.name
+            if change.data is not None:
+                circuit.data = change.data
+        session.add(circuit)
+        circuits.append((change, circuit))
+
+    for change in push.attempts:
+        attempt = session.exec(
+            select(ChallengeAttempt).where(
+                ChallengeAttempt.user_id == user_id, ChallengeAttempt.challenge_id == change.challenge_id
+            )
+        ).first()
+        if attempt and change.base_revision is not None and attempt.revision > change.base_revision:
+            conflicts.append({
+                "entity": "attempt", "challenge_id": change.challenge_id, "reason": "stale", "revision": attempt.revision
+            })
+            continue
+        if change.deleted:
+            if attempt:
+                session.delete(attempt)
+            applied.append({"entity": "attempt", "challenge_id": change.challenge_id, "deleted": True})
+            continue
+        if change.data is None:
+            conflicts.append({"entity": "attempt", "challenge_id": change.challenge_id, "reason": "incomplete"})
+            continue
+        if attempt is None:
+            attempt = ChallengeAttempt(user_id=user_id, challenge_id=change.challenge_id, data=change.data)
+        else:
+            attempt.data = change.data
+        session.add(attempt)
+        session.flush()
+        applied.append({"entity": "attempt", "challenge_id": change.challenge_id, "id": attempt.id, "revision": attempt.revision})
+
+    session.flush()
+    for change, circuit in circuits:
+        applied.append({"entity": "circuit", "id": circuit.id, "client_ref": change.client_ref, "revision": circuit.revision})
+    session.commit()
+    return {"applied": applied, "conflicts": conflicts}
@@ -0,0 +1,97 @@
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func
+from sqlmodel import Session, select
+from database import DEFAULT_TENANT, engine, get_engine, known_tenants, sharding_enabled, tenant_scope
+from models.challenge import ChallengeAttempt
+from models.circuit import Circuit
+from models.class_model import Class
+from models.tenant import Tenant, TenantUser
+from models.user import User
+
+# Directory helpers take a session on the home database (database.engine)
+
+def find_tenant(session: Session, email: Optional[str] = None, code: Optional[str] = None) -> str:
+    if not sharding_enabled():
+        return DEFAULT_TENANT
+    statement = select(TenantUser.tenant)
+    if email:
+        statement = statement.where(TenantUser.email == email)
+    elif code:
+        statement = statement.where(TenantUser.code == code)
+    else:
+        return DEFAULT_TENANT
+    # Accounts created before sharding was enabled are not listed and stay in the home shard
+    return session.exec(statement).first() or DEFAULT_TENANT
+
+def tenant_exists(session: Session, tenant: str) -> bool:
+    # Schools from before the registry are known through their directory entries
+    if tenant == DEFAULT_TENANT or session.get(Tenant, tenant) is not None:
+        return True
+    return session.exec(select(TenantUser.email).where(TenantUser.tenant == tenant).limit(1)).first() is not None
+
+def create_tenant(session: Session, tenant: str, name: Optional[str] = None) -> Tenant:
+    entry = session.get(Tenant, tenant) or Tenant(id=tenant)
+    if name is not None:
+        entry.name = name
+    session.add(entry)
+    session.commit()
+    session.refresh(entry)
+    return entry
+
+def email_registered(session: Session, email: str) -> bool:
+    return session.get(TenantUser, email) is not None
+
+def register_tenant_user(session: Session, email: str, code: Optional[str], tenant: str) -> TenantUser:
+    entry = session.get(TenantUser, email) or TenantUser(email=email, tenant=tenant)
+    entry.code = code
+    entry.tenant = tenant
+    session.add(entry)
+    session.commit()
+    return entry
+
+def remove_tenant_user(session: Session, email: str):
+    entry = session.get(TenantUser, email)
+    if entry:
+        session.delete(entry)
+        session.commit()
+
+def sync_directory(email: str, new_email: Optional[str] = None, code: Optional[str] = None, tenant: Optional[str] = None):
+    """Keep the home directory in step after a shard user is renamed or deleted."""
+    if not sharding_enabled():
+        return
+    with Session(engine) as home:
+        remove_tenant_user(home, email)
+        if new_email:
+            register_tenant_user(home, new_email, code, tenant or DEFAULT_TENANT)
+
+
+def for_each_tenant(query: Callable[[Session], List[Dict]]) -> List[Dict]:
+    """Run a read-only query against every shard, tagging each row with its tenant."""
+    rows = []
+    for tenant in known_tenants():
+        with tenant_scope(tenant), Session(get_engine(tenant)) as session:
+            rows.extend({"tenant": tenant, **row} for row in query(session))
+    return rows
+
+def tenant_summaries() -> List[Dict]:
+    def summary(session: Session) -> List[Dict]:
+        users = dict(session.exec(select(User.type, func.count()).group_by(User.type)).all())
+        return [{
+            "teachers": users.get("teacher", 0),
+            "students": users.get("student", 0),
+            "classes": session.exec(select(func.count()).select_from(Class)).one(),
+            "circuits": session.exec(select(func.count()).select_from(Circuit)).one(),
+            "attempts": session.exec(select(func.count()).select_from(ChallengeAttempt)).one(),
+        }]
+    return for_each_tenant(summary)
+
+def search_users(query: str, limit: int = 50) -> List[Dict]:
+    def matches(session: Session) -> List[Dict]:
+        users = session.exec(
+            select(User).where(User.email.contains(query) | User.surname.contains(query)).limit(limit)
+        ).all()
+        return [
+            {"id": u.id, "email": u.email, "name": u.name, "surname": u.surname, "type": u.type}
+            for u in users
+        ]
+    return for_each_tenant(matches)[:limit]
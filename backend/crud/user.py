@@ -2,6 +2,7 @@ from sqlmodel import Session, select
 from models.user import User
 from schemas.user import UserCreate, UserUpdate
 from core.security import get_password_hash, verify_password
+from crud.class_crud import get_all_classes, delete_class
 from utils import generate_unique_code
 from typing import Optional, List
 
@@ -71,6 +72,20 @@ def delete_user(session: Session, user_id: int) -> bool:
     session.commit()
     return True
 
+def delete_user_with_classes(session: Session, user_id: int) -> bool:
+    user = session.get(User, user_id)
+    if not user:
+        return False
+    
+    # If teacher, delete their classes
+    if user.type == "teacher":
+        classes = get_all_classes(session)
+        for class_obj in classes:
+            if class_obj.teacher_id == user_id:
+                delete_class(session, class_obj.id)
+    
+    return delete_user(session, user_id)
+
 def authenticate_user(session: Session, email: Optional[str] = None, password: Optional[str] = None, code: Optional[str] = None) -> Optional[User]:
     if code:
         user = get_user_by_code(session, code)
@@ -1,228 +1,189 @@
-from sqlmodel import SQLModel, Session, create_engine, select
-from models.challenge import Challenge
-
-
-DATABASE_URL = "sqlite:///./database.db"
-engine = create_engine(DATABASE_URL, echo=True)
-
-
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-    seed_challenges()
-
-def seed_challenges():
-    with Session(engine) as session:
-        existing = session.exec(select(Challenge)).first()
-        if existing:
-            return
-
-        challenges = [
-            Challenge(
-                id=1,
-                title="Simple Circuit",
-                description="Connect the battery to the bulb using wires",
-                workspace_type="electric",
-                difficulty=1,
-                requirements={"bulbs": 1, "batteries": 1}
-            ),
-            Challenge(
-                id=2,
-                title="Open Circuit",
-                description="Build an open circuit with switch OFF",
-                workspace_type="electric",
-                difficulty=2,
-                requirements={"bulbs": 1, "batteries": 1, "switches": 1}
-            ),
-            Challenge(
-                id=3,
-                title="Closed Circuit",
-                description="Build a closed circuit with switch ON",
-                workspace_type="electric",
-                difficulty=2,
-                requirements={"bulbs": 1, "batteries": 1, "switches": 1}
-            ),
-            Challenge(
-                id=4,
-                title="Switch Control",
-                description="Add a switch you can turn on/off",
-                workspace_type="electric",
-                difficulty=3,
-                requirements={"bulbs": 1, "batteries": 1, "switches": 1}
-            ),
-            Challenge(
-                id=5,
-                title="Series Batteries",
-                description="Connect two batteries in series with the bulb",
-                workspace_type="electric",
-                difficulty=4,
-                requirements={"bulbs": 1, "batteries": 2}
-            ),
-            Challenge(
-                id=6,
-                title="Series Bulbs",
-                description="Connect two bulbs in series to the battery",
-                workspace_type="electric",
-                difficulty=5,
-                requirements={"bulbs": 2, "batteries": 1}
-            ),
-            Challenge(
-                id=7,
-                title="Parallel Bulbs",
-                description="Connect two bulbs in parallel to the battery",
-                workspace_type="electric",
-                difficulty=6,
-                requirements={"bulbs": 2, "batteries": 1}
-            ),
-            Challenge(
-                id=8,
-                title="Resistor Circuit",
-                description="Connect battery, resistor, and bulb in a complete circuit",
-                workspace_type="electric",
-                difficulty=7,
-                requirements={"bulbs": 1, "batteries": 1, "resistors": 1}
-            ),
-            Challenge(
-                id=9,
-                title="Complex Series",
-                description="Connect battery, two resistors, and bulb in series",
-                workspace_type="electric",
-                difficulty=8,
-                requirements={"bulbs": 1, "batteries": 1, "resistors": 2}
-            ),
-            Challenge(
-                id=10,
-                title="Mixed Circuit",
-                description="Combine series and parallel connections with multiple bulbs",
-                workspace_type="electric",
-                difficulty=9,
-                requirements={"bulbs": 3, "batteries": 1}
-            ),
-            Challenge(
-                id=11,
-                title="AND Gate",
-                description="Add inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=1,
-                requirements={"gates": ["AND"]}
-            ),
-            Challenge(
-                id=12,
-                title="OR Gate",
-                description="Add inputs to get output: 0",
-                workspace_type="logic",
-                difficulty=1,
-                requirements={"gates": ["OR"]}
-            ),
-            Challenge(
-                id=13,
-                title="NOT Gate",
-                description="Add input to get output: 0",
-                workspace_type="logic",
-                difficulty=2,
-                requirements={"gates": ["NOT"]}
-            ),
-            Challenge(
-                id=14,
-                title="NAND Gate",
-                description="Add inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=2,
-                requirements={"gates": ["NAND"]}
-            ),
-            Challenge(
-                id=15,
-                title="NOR Gate",
-                description="Add inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=3,
-                requirements={"gates": ["NOR"]}
-            ),
-            Challenge(
-                id=16,
-                title="XOR Gate",
-                description="Add inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=3,
-                requirements={"gates": ["XOR"]}
-            ),
-            Challenge(
-                id=17,
-                title="XNOR Gate",
-                description="Add inputs to get output: 0",
-                workspace_type="logic",
-                difficulty=4,
-                requirements={"gates": ["XNOR"]}
-            ),
-            Challenge(
-                id=18,
-                title="Complex Circuit",
-                description="Add 4 inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=6,
-                requirements={"gates": ["AND", "OR"]}
-            ),
-            Challenge(
-                id=19,
-                title="NOT-AND Circuit",
-                description="Add 2 inputs to get output: 0",
-                workspace_type="logic",
-                difficulty=7,
-                requirements={"gates": ["NOT", "AND"]}
-            ),
-            Challenge(
-                id=20,
-                title="Advanced XOR-AND",
-                description="Add 4 inputs to get output: 1",
-                workspace_type="logic",
-                difficulty=8,
-                requirements={"gates": ["XOR", "AND"]}
-            ),
-            Challenge(
-                id=21,
-                title="Half Adder",
-                description="Build a half adder circuit (Sum and Carry outputs)",
-                workspace_type="logic",
-                difficulty=9,
-                requirements={"gates": ["XOR", "AND"]}
-            ),
-            Challenge(
-                id=22,
-                title="Full Adder",
-                description="Build a full adder with 3 inputs",
-                workspace_type="logic",
-                difficulty=10,
-                requirements={"gates": ["XOR", "AND", "OR"]}
-            ),
-            Challenge(
-                id=23,
-                title="4-Input Multiplexer",
-                description="Create a 2-to-1 multiplexer with select line",
-                workspace_type="logic",
-                difficulty=9,
-                requirements={"gates": ["AND", "OR", "NOT"]}
-            ),
-            Challenge(
-                id=24,
-                title="Priority Encoder",
-                description="Design a 4-to-2 priority encoder",
-                workspace_type="logic",
-                difficulty=10,
-                requirements={"gates": ["AND", "OR", "NOT"]}
-            ),
-            Challenge(
-                id=25,
-                title="Master Logic",
-                description="Ultimate logic challenge: Complex multi-gate design",
-                workspace_type="logic",
-                difficulty=10,
-                requirements={"gates": ["AND", "OR", "NOT", "XOR", "NAND"]}
-            ),
-        ]
-
-        for challenge in challenges:
-            session.add(challenge)
-        session.commit()
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlmodel import SQLModel, Session, create_engine
+import models  # noqa: F401  registers every table before the schema is fingerprinted
+from core import startup
+from core.metrics import instrument_engine
+from core.search import setup_search
+import core.sync  # noqa: F401  stamps sync revisions and tombstones on every flush
+import core.blobs  # noqa: F401  moves circuit and attempt JSON into the blob store
+import core.archive  # noqa: F401  drops archived attempts superseded by live ones
+
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+SQL_ECHO = os.getenv("SQL_ECHO", "1") == "1"
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO)
+
+# Per-school shards. "{tenant}" in the URL gives every school its own database
+# (e.g. sqlite:///./tenants/{tenant}.db); a URL without it is used for all schools
+# with one Postgres schema each. Unset means a single shared database.
+TENANT_DATABASE_URL = os.getenv("TENANT_DATABASE_URL")
+DEFAULT_TENANT = "default"
+# Tables that only exist in the home database
+HOME_ONLY_TABLES = ("tenant_directory", "tenants")
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+_current_tenant: ContextVar[str] = ContextVar("tenant", default=DEFAULT_TENANT)
+_engines: Dict[str, Engine] = {DEFAULT_TENANT: engine}
+_engines_lock = threading.Lock()
+
+
+def sharding_enabled() -> bool:
+    return bool(TENANT_DATABASE_URL)
+
+def valid_tenant(tenant: Optional[str]) -> bool:
+    return bool(tenant) and bool(_TENANT_ID.match(tenant))
+
+def current_tenant() -> str:
+    return _current_tenant.get()
+
+@contextmanager
+def tenant_scope(tenant: str):
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+def _create_tenant_engine(tenant: str) -> Engine:
+    if "{tenant}" in TENANT_DATABASE_URL:
+        url = make_url(TENANT_DATABASE_URL.replace("{tenant}", tenant))
+        if url.get_backend_name() == "sqlite" and url.database:
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        return create_engine(url, echo=SQL_ECHO)
+
+    tenant_engine = create_engine(TENANT_DATABASE_URL, echo=SQL_ECHO)
+    with tenant_engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{tenant}"'))
+
+    # search_path rather than schema_translate_map so raw SQL lands in the schema too
+    @event.listens_for(tenant_engine, "connect")
+    def _set_search_path(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'SET search_path TO "{tenant}"')
+        cursor.close()
+
+    return tenant_engine
+
+def get_engine(tenant: Optional[str] = None) -> Engine:
+    tenant = tenant or current_tenant()
+    if tenant == DEFAULT_TENANT or not sharding_enabled():
+        return engine
+    if not valid_tenant(tenant):
+        raise ValueError(f"Invalid tenant id '{tenant}'")
+    tenant_engine = _engines.get(tenant)
+    if tenant_engine is not None:
+        return tenant_engine
+    with _engines_lock:
+        tenant_engine = _engines.get(tenant)
+        if tenant_engine is None:
+            tenant_engine = _create_tenant_engine(tenant)
+            create_db_and_tables(tenant_engine)
+            instrument_engine(tenant_engine)
+            _engines[tenant] = tenant_engine
+    return tenant_engine
+
+def known_tenants() -> List[str]:
+    if not sharding_enabled():
+        return [DEFAULT_TENANT]
+    with engine.connect() as conn:
+        registered = conn.execute(
+            text("SELECT id FROM tenants UNION SELECT DISTINCT tenant FROM tenant_directory")
+        ).scalars().all()
+    return sorted({DEFAULT_TENANT, *_engines, *(t for t in registered if valid_tenant(t))})
+
+
+def create_db_and_tables(target: Engine = None):
+    target = target or engine
+    # Schema work is skipped when this database was last set up by the same models
+    fingerprint = startup.schema_fingerprint()
+    with startup.timings.phase("schema"):
+        if startup.read_metadata(target, "schema") != fingerprint:
+            tables = [
+                table for table in SQLModel.metadata.sorted_tables
+                if target is engine or table.name not in HOME_ONLY_TABLES
+            ]
+            SQLModel.metadata.create_all(target, tables=tables)
+            add_missing_columns(target)
+            setup_search(target)
+            with target.begin() as conn:
+                startup.write_metadata(conn, "schema", fingerprint)
+    with startup.timings.phase("seed"):
+        if startup.seed_challenges(target):
+            # Imported here: core.coalesce itself imports this module
+            from core.coalesce import invalidate
+            invalidate("challenges")
+
+def add_missing_columns(target: Engine = None):
+    # create_all never alters existing tables, so columns added to models later
+    # (all nullable or defaulted) are appended here together with their indexes
+    target = target or engine
+    inspector = inspect(target)
+    with target.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=target.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+# Set while a batch runs so every sub-request's get_session shares one transaction
+_shared_session: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
+
+@contextmanager
+def shared_transaction():
+    connection = get_engine().connect()
+    transaction = connection.begin()
+    # "rollback_only": session.commit() inside CRUD helpers only flushes, the
+    # outer transaction decides whether everything is kept
+    session = Session(bind=connection, join_transaction_mode="rollback_only")
+    committed = []
+    event.listen(connection, "commit", lambda conn: committed.append(True))
+    token = _shared_session.set(session)
+    try:
+        yield session, transaction
+    finally:
+        _shared_session.reset(token)
+        callbacks = session.info.pop("after_commit", [])
+        session.close()
+        if transaction.is_active:
+            transaction.rollback()
+        connection.close()
+        if committed:
+            for callback in callbacks:
+                callback()
+
+def in_shared_transaction() -> bool:
+    return _shared_session.get() is not None
+
+def after_commit(callback):
+    # Outside a batch the caller has already committed; inside one, wait for the
+    # shared transaction and drop the callback if it rolls back
+    shared = _shared_session.get()
+    if shared is None:
+        callback()
+    else:
+        shared.info.setdefault("after_commit", []).append(callback)
 
 def get_session():
-    with Session(engine) as session:
+    shared = _shared_session.get()
+    if shared is not None:
+        yield shared
+        return
+    # Routed to the shard of the tenant resolved from the request's token
+    with Session(get_engine()) as session:
         yield session
\ No newline at end of file
@@ -1,25 +1,55 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from routers import auth, user, story, paragraph, class_router, circuit, challenge
-from database import create_db_and_tables
+from routers import auth, user, story, paragraph, class_router, circuit, challenge, metrics, drawing, job, search, batch, sync, simulation, admin
+from database import create_db_and_tables, engine, get_engine, known_tenants
+from core.admission import AdmissionMiddleware
+from core.metrics import MetricsMiddleware, instrument_engine
+from core.replicas import ReadYourWritesMiddleware
+from core.tenancy import TenantMiddleware
+from core import autosave, blobs, images, jobs, replicas, startup
+import core.tasks  # noqa: F401  registers job handlers
+import time
 import uvicorn
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    startup.timings.record("imports", time.perf_counter() - startup.timings.started)
     create_db_and_tables()
+    with startup.timings.phase("backfill"):
+        for tenant in known_tenants():
+            tenant_engine = get_engine(tenant)
+            images.backfill_drawing_keys(tenant_engine)
+            blobs.migrate_inline_data(tenant_engine)
+            blobs.backfill_compiled(tenant_engine)
+    with startup.timings.phase("workers"):
+        jobs.start_workers()
+        autosave.start()
+        replicas.start()
+    startup.timings.report()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    replicas.stop()
+    autosave.stop()
+    jobs.stop_workers()
+    images.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
+instrument_engine(engine)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(TenantMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
@@ -35,6 +65,14 @@ app.include_router(challenge.router)
 app.include_router(story.router)
 app.include_router(paragraph.router)
 app.include_router(class_router.router)
+app.include_router(drawing.router)
+app.include_router(job.router)
+app.include_router(search.router)
+app.include_router(batch.router)
+app.include_router(sync.router)
+app.include_router(simulation.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Move a teacher's classes from the shared database into a per-school shard.
+
+    TENANT_DATABASE_URL=sqlite:///./tenants/{tenant}.db \\
+        python migrate_tenant.py teacher@school.si school-a [--dry-run] [--purge]
+"""
+import argparse
+import json
+import sys
+
+from core.shards import ShardMigrationError, migrate_teacher
+from database import create_db_and_tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("teacher_email")
+    parser.add_argument("tenant")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be copied")
+    parser.add_argument("--purge", action="store_true", help="delete the copied rows from the shared database")
+    args = parser.parse_args(argv)
+
+    create_db_and_tables()
+    try:
+        counts = migrate_teacher(args.teacher_email, args.tenant, dry_run=args.dry_run, purge=args.purge)
+    except ShardMigrationError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
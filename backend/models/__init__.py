@@ -3,6 +3,12 @@ from models.user import User
 from models.story import Story
 from models.paragraph import Paragraph
 from models.class_model import Class, ClassStudent, ClassStory
+from models.job import Job
+from models.sync import SyncCounter, SyncTombstone
+from models.blob import Blob, BlobBand
+from models.tenant import Tenant, TenantUser
+from models.archive import ArchivedRecord
+from models.metadata import AppMetadata
 
 __all__ = [
     "User",
@@ -10,5 +16,14 @@ __all__ = [
     "Paragraph",
     "Class",
     "ClassStudent",
-    "ClassStory"
+    "ClassStory",
+    "Job",
+    "SyncCounter",
+    "SyncTombstone",
+    "Blob",
+    "BlobBand",
+    "Tenant",
+    "TenantUser",
+    "ArchivedRecord",
+    "AppMetadata"
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+class ArchivedRecord(SQLModel, table=True):
+    # Where a row moved to cold storage lives; the payload itself is in an archive file
+    __tablename__ = "archive_index"
+    __table_args__ = (Index("ix_archive_index_kind_owner_ref", "kind", "owner_id", "ref_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # "attempt" or "story"
+    owner_id: int  # Attempt's user or the class a story was finalized in
+    ref_id: int  # Challenge or story id
+    path: str  # Relative to ARCHIVE_DIR
+    offset: int
+    length: int
+    codec: str  # "zstd" or "zlib"
+    recorded_at: Optional[datetime] = Field(default=None)  # Last change before archiving
+    archived_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
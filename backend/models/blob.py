@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Index, LargeBinary
+from sqlmodel import SQLModel, Field, JSON
+from typing import Optional
+from datetime import datetime, timezone
+
+class Blob(SQLModel, table=True):
+    __tablename__ = "blobs"
+
+    hash: str = Field(primary_key=True)  # sha256 of the canonical JSON
+    codec: str  # "zstd", "zlib" or "raw"
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    raw_size: int
+    stored_size: int
+    compiled: Optional[dict] = Field(default=None, sa_column=Column(JSON))  # core.circuit form of circuit payloads
+    compiled_version: Optional[int] = Field(default=None)
+    wl_hash: Optional[str] = Field(default=None, index=True)  # Isomorphism-invariant circuit hash
+    minhash: Optional[list] = Field(default=None, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class BlobBand(SQLModel, table=True):
+    # LSH index over MinHash signatures: blobs sharing any (band, bucket) are candidates
+    __tablename__ = "blob_bands"
+    __table_args__ = (Index("ix_blob_bands_band_bucket", "band", "bucket"),)
+
+    hash: str = Field(foreign_key="blobs.hash", primary_key=True)
+    band: int = Field(primary_key=True)
+    bucket: str
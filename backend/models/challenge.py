@@ -1,5 +1,7 @@
+from sqlalchemy import Index
 from sqlmodel import JSON, Column, SQLModel, Field, Relationship
 from typing import Optional, List
+from datetime import datetime
 
 class Challenge(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -11,16 +13,25 @@ class Challenge(SQLModel, table=True):
 
 
 class ChallengeProgress(SQLModel, table=True):
+    __table_args__ = (Index("ix_challengeprogress_user_id_revision", "user_id", "revision"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int
     challenge_id: int
     completed: bool = False
     completion_count: int = Field(default=0)
     points_earned: int = Field(default=0)
+    revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # Assigned by core.sync on every write
+    updated_at: Optional[datetime] = Field(default=None)
 
 
 class ChallengeAttempt(SQLModel, table=True):
+    __table_args__ = (Index("ix_challengeattempt_user_id_revision", "user_id", "revision"), {"sqlite_autoincrement": True})
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int
     challenge_id: int
-    data: dict = Field(sa_column=Column(JSON))
+    data: dict = Field(sa_column=Column(JSON))  # NULL once moved to the blob store, filled in on load
+    data_hash: Optional[str] = Field(default=None, index=True)  # Blob holding the canonical data
+    revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # Assigned by core.sync on every write
+    updated_at: Optional[datetime] = Field(default=None)
@@ -1,8 +1,16 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Column, JSON
 from typing import Optional
+from datetime import datetime
 
 class Circuit(SQLModel, table=True):
+    # AUTOINCREMENT keeps ids of deleted circuits from being reused behind sync tombstones
+    __table_args__ = (Index("ix_circuit_user_id_revision", "user_id", "revision"), {"sqlite_autoincrement": True})
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int
     name: str
-    data: dict = Field(sa_column=Column(JSON))
+    data: dict = Field(sa_column=Column(JSON))  # NULL once moved to the blob store, filled in on load
+    data_hash: Optional[str] = Field(default=None, index=True)  # Blob holding the canonical data
+    revision: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # Assigned by core.sync on every write
+    updated_at: Optional[datetime] = Field(default=None)
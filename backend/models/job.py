@@ -0,0 +1,21 @@
+from sqlmodel import SQLModel, Field, Column, JSON
+from typing import Optional
+from datetime import datetime, timezone
+
+class Job(SQLModel, table=True):
+    __tablename__ = "jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(index=True)
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = Field(default="queued", index=True)  # "queued", "running", "succeeded" or "failed"
+    priority: int = Field(default=0)  # Higher runs first
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    run_after: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_by: Optional[str] = Field(default=None)
+    locked_at: Optional[datetime] = Field(default=None)
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = Field(default=None)
@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+class AppMetadata(SQLModel, table=True):
+    # Versions of what startup has already applied, e.g. the schema and seed data
+    __tablename__ = "app_metadata"
+
+    key: str = Field(primary_key=True)
+    value: str
+    updated_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 
@@ -7,12 +8,14 @@ if TYPE_CHECKING:
 
 class Paragraph(SQLModel, table=True):
     __tablename__ = "paragraphs"
+    __table_args__ = (Index("ix_paragraphs_story_id_order", "story_id", "order"),)
     
     id: Optional[int] = Field(default=None, primary_key=True)
     story_id: int = Field(foreign_key="stories.id")
     user_id: int = Field(foreign_key="users.id")
     content: str
     drawing: Optional[str] = Field(default=None)  # Base64 or URL
+    drawing_key: Optional[str] = Field(default=None, index=True)  # Content hash of drawing, names its variants
     order: int = Field(default=0)
     
     # Relationships
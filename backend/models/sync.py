@@ -0,0 +1,20 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+class SyncCounter(SQLModel, table=True):
+    __tablename__ = "sync_counter"
+
+    name: str = Field(primary_key=True)
+    value: int = Field(default=0)
+
+
+class SyncTombstone(SQLModel, table=True):
+    __tablename__ = "sync_tombstones"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str  # "circuit", "attempt" or "progress"
+    entity_id: int
+    user_id: int = Field(index=True)
+    revision: int = Field(index=True)
+    deleted_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
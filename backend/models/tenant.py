@@ -0,0 +1,21 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+class TenantUser(SQLModel, table=True):
+    # Lives only in the home database: tells login which shard holds an account
+    __tablename__ = "tenant_directory"
+
+    email: str = Field(primary_key=True)
+    code: Optional[str] = Field(default=None, index=True, unique=True)  # Student login code
+    tenant: str = Field(index=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class Tenant(SQLModel, table=True):
+    # Home database only: schools whose shards may be created, added by operators
+    __tablename__ = "tenants"
+
+    id: str = Field(primary_key=True)
+    name: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlmodel import Session
+
+from core import security
+from core.archive import term_cutoff
+from core.jobs import enqueue
+from crud.tenant import create_tenant, search_users, tenant_summaries
+from database import engine, get_engine, known_tenants, sharding_enabled, tenant_scope, valid_tenant
+from schemas.tenant import TenantCreate
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+# Cross-tenant queries bypass per-school isolation, so they need an operator token
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not security.is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@router.get("/tenants", response_model=dict, dependencies=[Depends(require_admin)])
+def list_tenants():
+    return {"data": {"sharding": sharding_enabled(), "tenants": tenant_summaries()}}
+
+
+@router.post("/tenants", response_model=dict, status_code=201, dependencies=[Depends(require_admin)])
+def add_tenant(body: TenantCreate):
+    """Register a school and create its shard; only then can accounts be placed in it."""
+    if not sharding_enabled():
+        raise HTTPException(status_code=400, detail="Sharding is not enabled")
+    if not valid_tenant(body.id):
+        raise HTTPException(status_code=400, detail="Invalid school id")
+    with Session(engine) as home:
+        tenant = create_tenant(home, body.id, body.name)
+    get_engine(tenant.id)
+    return {"data": tenant}
+
+
+@router.get("/users", response_model=dict, dependencies=[Depends(require_admin)])
+def find_users(q: str = Query(..., min_length=2), limit: int = Query(50, ge=1, le=500)):
+    return {"data": search_users(q, limit)}
+
+
+
+@router.post("/archive", response_model=dict, dependencies=[Depends(require_admin)])
+def archive_cold_data(before: Optional[datetime] = Query(None, description="Defaults to one school term ago")):
+    """Queue a job per school that moves older attempts and finalized stories to cold storage."""
+    if before is None:
+        before = term_cutoff()
+    elif before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    jobs = []
+    for tenant in known_tenants():
+        with tenant_scope(tenant), Session(get_engine(tenant)) as session:
+            job = enqueue(session, "archive_cold_data", {"before": before.isoformat()}, priority=-1)
+            jobs.append({"tenant": tenant, "job_id": job.id})
+    return {"data": jobs}
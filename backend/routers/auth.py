@@ -6,27 +6,65 @@ from sqlmodel import Session
 
 from schemas.user import UserCreate, UserRead, UserLogin, Token
 from crud.user import create_user, authenticate_user, get_user_by_email
+from crud.tenant import email_registered, find_tenant, register_tenant_user, tenant_exists
 from core import security
-from database import get_session
+from database import current_tenant, engine, get_engine, get_session, sharding_enabled, tenant_scope, valid_tenant
 
 router = APIRouter(prefix="/api", tags=["auth"])
 
 
-@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, session: Session = Depends(get_session)):
+def _create_in_tenant(session: Session, user_in: UserCreate, tenant: str):
     existing_email = get_user_by_email(session, user_in.email)
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    if user_in.type not in ["student", "teacher"]:
-        raise HTTPException(status_code=400, detail="Invalid user type")
-    
+
     user = create_user(session, user_in)
+    if sharding_enabled():
+        with Session(engine) as home:
+            register_tenant_user(home, user.email, user.code, tenant)
     return user
 
 
+@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+def register(
+    user_in: UserCreate,
+    session: Session = Depends(get_session),
+    x_admin_token: Optional[str] = Header(None),
+):
+    if user_in.type not in ["student", "teacher"]:
+        raise HTTPException(status_code=400, detail="Invalid user type")
+
+    tenant = user_in.school or current_tenant()
+    if not valid_tenant(tenant):
+        raise HTTPException(status_code=400, detail="Invalid school")
+    # Accounts land in the caller's own school (the home shard when anonymous);
+    # only operators place them elsewhere, e.g. a new school's first teacher
+    if tenant != current_tenant() and not security.is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Registering into another school requires an admin token")
+    if sharding_enabled():
+        with Session(engine) as home:
+            if not tenant_exists(home, tenant):
+                raise HTTPException(status_code=400, detail="Unknown school")
+            if email_registered(home, user_in.email):
+                raise HTTPException(status_code=400, detail="Email already registered")
+
+    if tenant == current_tenant():
+        return _create_in_tenant(session, user_in, tenant)
+    with tenant_scope(tenant), Session(get_engine(tenant)) as tenant_session:
+        return _create_in_tenant(tenant_session, user_in, tenant)
+
+
 @router.post("/login", response_model=dict)
 def login(login_data: UserLogin, session: Session = Depends(get_session)):
+    with Session(engine) as home:
+        tenant = find_tenant(home, email=login_data.email, code=login_data.code)
+    if tenant == current_tenant():
+        return _login(session, login_data, tenant)
+    with tenant_scope(tenant), Session(get_engine(tenant)) as tenant_session:
+        return _login(tenant_session, login_data, tenant)
+
+
+def _login(session: Session, login_data: UserLogin, tenant: str):
     user = authenticate_user(
         session, 
         email=login_data.email, 
@@ -43,14 +81,15 @@ def login(login_data: UserLogin, session: Session = Depends(get_session)):
     # Generate token using email instead of username
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user.email, "user_id": user.id}, 
+        data={"sub": user.email, "user_id": user.id, "tenant": tenant}, 
         expires_delta=access_token_expires
     )
     
     return {
         "data": user,
         "access_token": access_token,
-        "token_type": "bearer"
+        "token_type": "bearer",
+        "tenant": tenant
     }
 
 
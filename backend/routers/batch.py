@@ -0,0 +1,106 @@
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from database import shared_transaction
+from schemas.batch import BatchOperation, BatchRequest, BatchResult
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+# Headers of the batch request that every sub-request inherits unless it sets its own
+INHERITED_HEADERS = ("authorization", "accept-language", "user-agent")
+
+
+async def dispatch(request: Request, operation: BatchOperation) -> BatchResult:
+    path, _, query = operation.path.partition("?")
+    headers = {k: v for k, v in request.headers.items() if k in INHERITED_HEADERS}
+    headers.update({k.lower(): v for k, v in operation.headers.items()})
+    body = b""
+    if operation.body is not None:
+        body = json.dumps(operation.body).encode("utf-8")
+        headers["content-type"] = "application/json"
+    headers["content-length"] = str(len(body))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": operation.method,
+        "scheme": request.url.scheme,
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": request.scope.get("root_path", ""),
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        # core.admission charges it to its own route class but does not shed it
+        "batch": True,
+    }
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = 500
+    content_type = ""
+    chunks = []
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The error middleware re-raises after sending its 500 response
+        return BatchResult(status=500, body={"detail": "Internal Server Error"})
+
+    raw = b"".join(chunks)
+    if content_type.startswith("application/json") and raw:
+        return BatchResult(status=status, body=json.loads(raw))
+    return BatchResult(status=status, body=raw.decode("utf-8", "replace") or None)
+
+
+@router.post("", response_model=dict)
+async def run_batch(batch: BatchRequest, request: Request):
+    for operation in batch.operations:
+        if not operation.path.startswith("/") or operation.path.startswith(router.prefix):
+            raise HTTPException(status_code=400, detail=f"Invalid batch path: {operation.path}")
+
+    results = []
+    if batch.atomic:
+        with shared_transaction() as (session, transaction):
+            for operation in batch.operations:
+                result = await dispatch(request, operation)
+                results.append(result)
+                if result.status >= 400:
+                    break
+            committed = all(result.status < 400 for result in results)
+            if committed:
+                await run_in_threadpool(transaction.commit)
+        # Operations after a failure were never run
+        results += [BatchResult(status=424) for _ in batch.operations[len(results):]]
+    else:
+        committed = True
+        for operation in batch.operations:
+            with shared_transaction() as (session, transaction):
+                result = await dispatch(request, operation)
+                if result.status < 400:
+                    await run_in_threadpool(transaction.commit)
+                else:
+                    committed = False
+            results.append(result)
+
+    return {"data": {"committed": committed, "results": results}}
@@ -1,21 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlmodel import Session
 from database import get_session
+from core import autosave
+from core.coalesce import coalesce, invalidate
+from core.replicas import read_session
+from core.grading import GradingError, check_equivalence, prepare_reference
+from core.wire import AttemptPayload, attempt_body, body_schema, respond
 from routers.auth import get_current_user
-from models.challenge import Challenge
-from schemas.challenge import AttemptCreate, AttemptRead, ChallengeCreate, ProgressCreate, ProgressRead, UserStatsRead, LeaderboardEntry
+from models.challenge import Challenge, ChallengeAttempt
+from schemas.challenge import AttemptCreate, AttemptRead, ChallengeCreate, ProgressCreate, ProgressRead, UserStatsRead, LeaderboardEntry, ReferenceCircuit, GradeRequest
 from crud.challenge import (
     create_challenge,
     delete_attempt,
     delete_challenge,
     get_all_challenges,
-    get_attempt,
     get_challenge_by_id,
     mark_challenge_complete,
-    save_attempt,
     get_user_progress,
     get_user_stats,
     get_leaderboard,
+    get_submission_clusters,
+    get_similar_attempts,
+    public_challenge,
+    teaches_student
 )
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
@@ -25,21 +33,24 @@ def create_challenge_endpoint(
     body: ChallengeCreate,
     session: Session = Depends(get_session),
 ):
-    return create_challenge(session, body)
+    challenge = create_challenge(session, body)
+    invalidate("challenges")
+    return public_challenge(challenge)
 
 @router.get("/", summary="List all challenges")
-def list_challenges(session: Session = Depends(get_session)):
-    return get_all_challenges(session)
+@coalesce("challenges", ttl=5.0)
+def list_challenges(session: Session = Depends(read_session(max_lag=10.0))):
+    return [public_challenge(challenge) for challenge in get_all_challenges(session)]
 
 @router.get("/by-workspace/{workspace_type}", summary="Get challenges by workspace type")
 def get_challenges_by_workspace(
     workspace_type: str,
-    session: Session = Depends(get_session)
+    session: Session = Depends(read_session(max_lag=10.0))
 ):
     challenges = session.query(Challenge).filter(
         Challenge.workspace_type == workspace_type
     ).order_by(Challenge.difficulty).all()
-    return challenges
+    return [public_challenge(challenge) for challenge in challenges]
 
 @router.get("/progress", response_model=ProgressRead, summary="Get user's progress")
 def get_progress_endpoint(
@@ -57,8 +68,9 @@ def get_stats_endpoint(
     return get_user_stats(session, user.id)
 
 @router.get("/leaderboard/top", summary="Get top 10 leaderboard", response_model=list[LeaderboardEntry])
+@coalesce("leaderboard", key=lambda limit, **_: limit, ttl=2.0)
 def get_leaderboard_endpoint(
-    session: Session = Depends(get_session),
+    session: Session = Depends(read_session(max_lag=5.0)),
     limit: int = 10
 ):
     return get_leaderboard(session, limit)
@@ -76,27 +88,30 @@ def mark_complete_endpoint(
         raise HTTPException(status_code=404, detail="Challenge not found")
 
     result = mark_challenge_complete(session, user.id, challenge_id)
+    invalidate("leaderboard")
     return result
 
-@router.post("/attempt", response_model=AttemptRead, status_code=status.HTTP_201_CREATED)
+@router.post("/attempt", response_model=AttemptRead, status_code=status.HTTP_201_CREATED, openapi_extra=body_schema(AttemptCreate))
 def save_attempt_endpoint(
-    body: AttemptCreate,
+    request: Request,
+    body: AttemptPayload = Depends(attempt_body),
     session: Session = Depends(get_session),
     user = Depends(get_current_user)
 ):
-    attempt = save_attempt(session, user.id, body.challenge_id, body.data)
-    return attempt
+    attempt = autosave.buffer_attempt(session, user.id, body.challenge_id, body.to_data())
+    return respond(request, attempt, AttemptRead, status_code=status.HTTP_201_CREATED)
 
 @router.get("/attempt/{challenge_id}", response_model=AttemptRead)
 def get_attempt_endpoint(
     challenge_id: int,
+    request: Request,
     session: Session = Depends(get_session),
     user = Depends(get_current_user)
 ):
-    attempt = get_attempt(session, user.id, challenge_id)
+    attempt = autosave.read_attempt(session, user.id, challenge_id)
     if not attempt:
         raise HTTPException(status_code=404, detail="Attempt not found")
-    return attempt
+    return respond(request, attempt, AttemptRead)
 
 @router.delete("/attempt/{challenge_id}", status_code=status.HTTP_200_OK)
 def delete_attempt_endpoint(
@@ -104,20 +119,101 @@ def delete_attempt_endpoint(
     session: Session = Depends(get_session),
     user = Depends(get_current_user)
 ):
+    autosave.discard(user.id, challenge_id)
     ok = delete_attempt(session, user.id, challenge_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Attempt not found")
     return {"deleted": True}
 
+@router.put("/{challenge_id}/reference", summary="Set the reference solution used for grading")
+def set_reference_endpoint(
+    challenge_id: int,
+    body: ReferenceCircuit,
+    session: Session = Depends(get_session)
+):
+    challenge = get_challenge_by_id(session, challenge_id)
+    if not challenge:
+        raise HTTPException(404, "Challenge not found")
+    reference = body.model_dump(exclude_none=True)
+    try:
+        # Builds (and caches) the reference BDDs, rejecting references that cannot be graded
+        prepare_reference(challenge_id, reference)
+    except GradingError as e:
+        raise HTTPException(422, str(e))
+    challenge.requirements = {**(challenge.requirements or {}), "reference": reference}
+    session.add(challenge)
+    session.commit()
+    invalidate("challenges")
+    return {"challenge_id": challenge_id, "reference": reference}
+
+@router.post("/{challenge_id}/grade", summary="Check a logic design against the reference solution")
+def grade_endpoint(
+    challenge_id: int,
+    body: GradeRequest = GradeRequest(),
+    session: Session = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    challenge = get_challenge_by_id(session, challenge_id)
+    if not challenge:
+        raise HTTPException(404, "Challenge not found")
+    reference = (challenge.requirements or {}).get("reference")
+    if not reference:
+        raise HTTPException(404, "Challenge has no reference solution")
+    
+    components = body.components
+    if components is None:
+        attempt = autosave.read_attempt(session, user.id, challenge_id)
+        if not attempt or not isinstance((attempt.data or {}).get("components"), list):
+            raise HTTPException(404, "No saved attempt with components to grade")
+        components = attempt.data["components"]
+    try:
+        return check_equivalence(challenge_id, reference, components)
+    except GradingError as e:
+        raise HTTPException(422, str(e))
+
+@router.get("/{challenge_id}/clusters", response_model=dict, summary="Group near-duplicate submissions")
+def get_clusters_endpoint(
+    challenge_id: int,
+    class_id: Optional[int] = None,
+    threshold: float = Query(0.8, ge=0.0, le=1.0),
+    session: Session = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    if user.type != "teacher":
+        raise HTTPException(403, "Only teachers can compare submissions")
+    if not get_challenge_by_id(session, challenge_id):
+        raise HTTPException(404, "Challenge not found")
+    autosave.flush()
+    # Teachers only see submissions from students in their own classes
+    clusters = get_submission_clusters(session, challenge_id, class_id, threshold, teacher_id=user.id)
+    return {"data": clusters}
+
+@router.get("/{challenge_id}/attempts/{attempt_id}/similar", response_model=dict, summary="Find submissions similar to one attempt")
+def get_similar_endpoint(
+    challenge_id: int,
+    attempt_id: int,
+    threshold: float = Query(0.5, ge=0.0, le=1.0),
+    limit: int = Query(10, ge=1, le=100),
+    session: Session = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    if user.type != "teacher":
+        raise HTTPException(403, "Only teachers can compare submissions")
+    autosave.flush()
+    attempt = session.get(ChallengeAttempt, attempt_id)
+    if not attempt or attempt.challenge_id != challenge_id or not teaches_student(session, user.id, attempt.user_id):
+        raise HTTPException(404, "Attempt not found")
+    return {"data": get_similar_attempts(session, attempt, threshold, limit, teacher_id=user.id)}
+
 @router.get("/{challenge_id}", summary="Get challenge by ID")
 def get_challenge_endpoint(
     challenge_id: int,
-    session: Session = Depends(get_session)
+    session: Session = Depends(read_session(max_lag=10.0))
 ):
     challenge = get_challenge_by_id(session, challenge_id)
     if not challenge:
         raise HTTPException(404, "Challenge not found")
-    return challenge
+    return public_challenge(challenge)
 
 @router.delete("/{challenge_id}", summary="Delete challenge")
 def delete_challenge_endpoint(
@@ -125,6 +221,7 @@ def delete_challenge_endpoint(
     session: Session = Depends(get_session),
 ):
     deleted = delete_challenge(session, challenge_id)
+    invalidate("challenges")
     if not deleted:
         raise HTTPException(404, "Challenge not found")
     return {"deleted": challenge_id}
@@ -1,39 +1,87 @@
 from getpass import getuser
-from fastapi import APIRouter, Depends, HTTPException
-from schemas.circuit import CircuitCreate
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+from sqlmodel import Session
+from schemas.circuit import CircuitCreate, CircuitSummary
 from models.circuit import Circuit
-from crud.circuit import create_circuit, get_circuits, get_circuit_by_id, delete_circuit
+from crud.circuit import create_circuit, get_circuit_summaries, get_circuit_by_id, delete_circuit
 from typing import List
 from routers.auth import get_current_user
 from models.user import User
+from database import get_session
+from core.blobs import load_compiled
+from core.previews import PREVIEW_VERSION, preview_url, render_preview, schedule_preview
+from core.wire import CircuitPayload, body_schema, circuit_body, respond
 
 
 router = APIRouter(prefix="/circuits", tags=["circuits"])
 
-@router.post("/")
-def create_circuit_endpoint(body: CircuitCreate, user: User = Depends(get_current_user)):
-    return create_circuit(
+# Bodies may be JSON or MessagePack (Content-Type), responses follow the Accept header
+@router.post("/", openapi_extra=body_schema(CircuitCreate))
+def create_circuit_endpoint(
+    request: Request,
+    body: CircuitPayload = Depends(circuit_body),
+    user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    circuit = create_circuit(
+        session,
         user_id=user.id,
         name=body.name,
-        data={"components": body.components}
+        data={"components": [component.to_dict() for component in body.components]}
     )
+    # Enqueueing commits and expires the circuit, so it is reloaded before responding
+    if schedule_preview(session, circuit.data_hash):
+        session.refresh(circuit)
+    return respond(request, circuit)
 
 
-@router.get("/", response_model=List[Circuit])
-def list_circuits(current_user=Depends(get_current_user)):
-    return get_circuits(current_user.id)
+# Lightweight listing for the load dialog; full designs come from GET /circuits/{id}
+@router.get("/", response_model=List[CircuitSummary])
+def list_circuits(request: Request, current_user=Depends(get_current_user), session: Session = Depends(get_session)):
+    summaries = [
+        CircuitSummary(id=row.id, name=row.name, updated_at=row.updated_at, preview_url=preview_url(row.data_hash))
+        for row in get_circuit_summaries(session, current_user.id)
+    ]
+    return respond(request, summaries, List[CircuitSummary])
+
+@router.get("/previews/{data_hash}/{filename}")
+def get_circuit_preview(data_hash: str, filename: str, session: Session = Depends(get_session)):
+    if filename != f"v{PREVIEW_VERSION}.svg" or not data_hash.isalnum():
+        raise HTTPException(status_code=404, detail="Preview not found")
+    # Normally rendered by the job queue on save; render inline if it has not run yet
+    path = render_preview(session, data_hash)
+    if not path:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    # Keys are content hashes, so a URL always points at the same drawing
+    return FileResponse(
+        path,
+        media_type="image/svg+xml",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
 
 @router.get("/{circuit_id}", response_model=Circuit)
-def load_circuit(circuit_id: int, current_user=Depends(get_current_user)):
-    circuit = get_circuit_by_id(circuit_id, current_user.id)
+def load_circuit(circuit_id: int, request: Request, current_user=Depends(get_current_user), session: Session = Depends(get_session)):
+    circuit = get_circuit_by_id(session, circuit_id, current_user.id)
+    if not circuit:
+        raise HTTPException(status_code=404, detail="Circuit not found")
+    return respond(request, circuit, Circuit)
+
+@router.get("/{circuit_id}/compiled", response_model=dict)
+def load_compiled_circuit(circuit_id: int, request: Request, current_user=Depends(get_current_user), session: Session = Depends(get_session)):
+    circuit = get_circuit_by_id(session, circuit_id, current_user.id)
     if not circuit:
         raise HTTPException(status_code=404, detail="Circuit not found")
-    return circuit
+    compiled = load_compiled(session.connection(), circuit.data_hash) if circuit.data_hash else None
+    if compiled is None:
+        raise HTTPException(status_code=404, detail="Circuit has no valid compiled form")
+    session.commit()
+    return respond(request, {"data": compiled.to_dict()})
 
 
 @router.delete("/{circuit_id}")
-def remove_circuit(circuit_id: int, current_user=Depends(get_current_user)):
-    success = delete_circuit(circuit_id, current_user.id)
+def remove_circuit(circuit_id: int, current_user=Depends(get_current_user), session: Session = Depends(get_session)):
+    success = delete_circuit(session, circuit_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Circuit not found")
-    return {"detail": "Circuit deleted"}
\ No newline at end of file
+    return {"detail": "Circuit deleted"}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlmodel import Session
-import json
+from typing import Optional
 
-from schemas.class_schema import ClassCreate, ClassUpdate, ClassReadWithRelations, FinalizedStoryCreate
+from schemas.class_schema import ClassCreate, ClassUpdate, ClassReadWithRelations, FinalizedStoryCreate, StoryAssignmentCreate
 from crud.class_crud import (
     create_class, 
     get_all_classes, 
@@ -10,20 +11,30 @@ from crud.class_crud import (
     update_class, 
     delete_class,
     remove_student_from_class,
-    add_finalized_story,
-    remove_story_from_class
+    finalize_class_story,
+    get_finalized_stories,
+    get_finalized_stories_by_class,
+    build_finalized_entry,
+    get_class_student_ids,
+    assign_story_excerpts
 )
 from crud.paragraph import get_paragraphs_by_story
 from crud.story import get_story_by_id
+from core.coalesce import coalesce
+from core.replicas import read_session
+from core.export import build_export_plan, iter_class_zip, iter_class_html
+from core.jobs import enqueue
 from database import get_session
+from utils import split_into_excerpts
 
 router = APIRouter(prefix="/api/classes", tags=["classes"])
 
 @router.get("", response_model=dict)
-def get_classes(populate: bool = Query(False), session: Session = Depends(get_session)):
+def get_classes(populate: bool = Query(False), session: Session = Depends(read_session())):
     classes = get_all_classes(session, populate=populate)
     
     if populate:
+        finalized = get_finalized_stories_by_class(session, classes)
         result = []
         for class_obj in classes:
             class_dict = {
@@ -34,15 +45,17 @@ def get_classes(populate: bool = Query(False), session: Session = Depends(get_se
                 "teacher": class_obj.teacher,
                 "students": class_obj.students,
                 "stories": class_obj.stories,
-                "finalized_stories": json.loads(class_obj.finalized_stories) if class_obj.finalized_stories else []
+                "finalized_stories": finalized[class_obj.id]
             }
             result.append(class_dict)
         return {"data": result}
     
     return {"data": classes}
 
+# Class pages are opened by a whole class at once; concurrent loads share one query
 @router.get("/{class_id}", response_model=dict)
-def get_class(class_id: int, populate: bool = Query(False), session: Session = Depends(get_session)):
+@coalesce("class", key=lambda class_id, populate, **_: (class_id, populate))
+def get_class(class_id: int, populate: bool = Query(False), session: Session = Depends(read_session())):
     class_obj = get_class_by_id(session, class_id, populate=populate)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
@@ -56,7 +69,7 @@ def get_class(class_id: int, populate: bool = Query(False), session: Session = D
             "teacher": class_obj.teacher,
             "students": class_obj.students,
             "stories": class_obj.stories,
-            "finalized_stories": json.loads(class_obj.finalized_stories) if class_obj.finalized_stories else []
+            "finalized_stories": get_finalized_stories(session, class_obj.id)
         }
         return {"data": class_dict}
     
@@ -95,48 +108,109 @@ def remove_student(class_id: int, student_id: int, session: Session = Depends(ge
     
     return {"data": True}
 
+@router.post("/{class_id}/stories/{story_id}/assign", response_model=dict, status_code=status.HTTP_201_CREATED)
+def assign_story(
+    class_id: int,
+    story_id: int,
+    assignment: StoryAssignmentCreate,
+    session: Session = Depends(get_session)
+):
+    if not get_class_by_id(session, class_id):
+        raise HTTPException(status_code=404, detail="Class not found")
+    story = get_story_by_id(session, story_id)
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    if assignment.mode not in ("round_robin", "explicit"):
+        raise HTTPException(status_code=400, detail="Invalid assignment mode")
+    
+    students = get_class_student_ids(session, class_id)
+    if not students:
+        raise HTTPException(status_code=400, detail="Class has no students")
+    
+    if assignment.excerpts is not None:
+        excerpts = [excerpt.strip() for excerpt in assignment.excerpts if excerpt.strip()]
+    else:
+        count = assignment.excerpt_count or len(students)
+        if count < 1:
+            raise HTTPException(status_code=400, detail="excerpt_count must be positive")
+        excerpts = split_into_excerpts(story.content, count)
+    
+    if assignment.mode == "explicit":
+        enrolled = set(students)
+        invalid = [i for i, s in assignment.assignments.items() if s not in enrolled or not 0 <= i < len(excerpts)]
+        if invalid or len(assignment.assignments) != len(excerpts):
+            raise HTTPException(status_code=400, detail="Every excerpt needs exactly one student from this class")
+        assignees = [assignment.assignments[i] for i in range(len(excerpts))]
+    else:
+        assignees = [students[i % len(students)] for i in range(len(excerpts))]
+    
+    created = assign_story_excerpts(session, class_id, story_id, excerpts, assignees)
+    return {"data": {"story_id": story_id, "paragraphs": created}}
+
 @router.post("/{class_id}/finalize-story/{story_id}", response_model=dict)
-def finalize_story(class_id: int, story_id: int, session: Session = Depends(get_session)):
+def finalize_story(
+    class_id: int,
+    story_id: int,
+    background: bool = Query(False),
+    session: Session = Depends(get_session)
+):
     # Get story
     story = get_story_by_id(session, story_id)
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     
+    if background:
+        if not get_class_by_id(session, class_id):
+            raise HTTPException(status_code=404, detail="Class not found")
+        job = enqueue(session, "finalize_story", {"class_id": class_id, "story_id": story_id})
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"data": {"job_id": job.id, "status_url": f"/api/jobs/{job.id}"}}
+        )
+    
     # Get paragraphs
     paragraphs = get_paragraphs_by_story(session, story_id)
     if not paragraphs:
         raise HTTPException(status_code=404, detail="No paragraphs found for this story")
     
     # Build finalized story entry
-    paragraphs_data = []
-    for paragraph in paragraphs:
-        paragraphs_data.append({
-            "paragraph_id": paragraph.id,
-            "content": paragraph.content,
-            "drawing": paragraph.drawing,
-            "order": paragraph.order
-        })
-    
-    entry = {
-        "story_id": story_id,
-        "paragraphs": paragraphs_data,
-        "story": {
-            "title": story.title,
-            "short_description": story.short_description,
-            "author": story.author
-        }
-    }
+    entry = build_finalized_entry(story, paragraphs)
     
-    # Add to finalized stories
-    updated_class = add_finalized_story(session, class_id, entry)
+    # Add to finalized stories and remove from active stories
+    updated_class = finalize_class_story(session, class_id, entry)
     if not updated_class:
         raise HTTPException(status_code=400, detail="Could not add finalized story")
     
-    # Remove from active stories
-    remove_story_from_class(session, class_id, story_id)
-    
     return {"data": {
         "message": "Story finalized successfully",
-        "paragraphs_count": len(paragraphs_data),
+        "paragraphs_count": len(entry["paragraphs"]),
         "entry": entry
-    }}
\ No newline at end of file
+    }}
+
+@router.get("/{class_id}/export")
+def export_finalized_stories(
+    class_id: int,
+    story_id: Optional[int] = Query(None),
+    format: str = Query("zip", pattern="^(zip|html)$"),
+    session: Session = Depends(get_session)
+):
+    class_obj = get_class_by_id(session, class_id)
+    if not class_obj:
+        raise HTTPException(status_code=404, detail="Class not found")
+
+    plan = build_export_plan(session, class_id, story_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="No finalized stories found")
+
+    filename = f"class-{class_id}-stories" if story_id is None else f"class-{class_id}-story-{story_id}"
+    if format == "html":
+        return StreamingResponse(
+            iter_class_html(class_id, class_obj.class_name, plan),
+            media_type="text/html; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.html"'}
+        )
+    return StreamingResponse(
+        iter_class_zip(class_id, class_obj.class_name, plan),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.zip"'}
+    )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlmodel import Session
+
+from core.images import VARIANTS, ensure_variant, images_enabled, variant_format
+from database import get_session
+
+router = APIRouter(prefix="/api/drawings", tags=["drawings"])
+
+
+@router.get("/{key}/{filename}")
+def get_drawing_variant(key: str, filename: str, session: Session = Depends(get_session)):
+    variant, _, ext = filename.partition(".")
+    if not images_enabled() or variant not in VARIANTS or ext != variant_format():
+        raise HTTPException(status_code=404, detail="Drawing not found")
+    if not key.isalnum():
+        raise HTTPException(status_code=404, detail="Drawing not found")
+
+    path = ensure_variant(session, key, variant)
+    if not path:
+        raise HTTPException(status_code=404, detail="Drawing not found")
+
+    # Keys are content hashes, so a URL always points at the same bytes
+    return FileResponse(
+        path,
+        media_type=f"image/{ext}",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from core.jobs import get_job
+from database import get_session
+from schemas.job import JobRead
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=dict)
+def get_job_status(job_id: int, session: Session = Depends(get_session)):
+    job = get_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {"data": JobRead.model_validate(job)}
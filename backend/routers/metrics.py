@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlmodel import Session
+
+from core.blobs import storage_report
+from core.metrics import registry
+from database import get_session
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/metrics/storage", response_model=dict)
+def storage(session: Session = Depends(get_session)):
+    return {"data": storage_report(session)}
@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import Session
 
-from schemas.paragraph import ParagraphCreate, ParagraphRead, ParagraphUpdate
+from typing import List, Optional
+
+from schemas.paragraph import ParagraphCreate, ParagraphRead, ParagraphUpdate, ParagraphSummary, ParagraphReorder
 from crud.paragraph import (
     create_paragraph, 
     get_paragraph_by_id, 
     get_paragraphs_by_story,
     update_paragraph, 
+    reorder_paragraphs,
     delete_paragraph
 )
+from core.images import drawing_urls
+from core.replicas import read_session
 from database import get_session
+from models.paragraph import Paragraph
+from utils import parse_fields
 
 router = APIRouter(prefix="/api", tags=["paragraphs"])
 
+PARAGRAPH_FIELDS = list(Paragraph.model_fields)
+SUMMARY_FIELDS = [field for field in ParagraphSummary.model_fields if field in PARAGRAPH_FIELDS]
+
+def paragraph_payload(paragraph: Paragraph, fields: Optional[List[str]] = None) -> dict:
+    if fields is None:
+        data = paragraph.model_dump()
+    else:
+        data = {field: getattr(paragraph, field) for field in fields}
+    data["drawing_urls"] = drawing_urls(paragraph.drawing_key)
+    return data
+
 @router.post("/users/{user_id}/paragraphs", response_model=dict, status_code=status.HTTP_201_CREATED)
 def add_paragraph(
     user_id: int,
@@ -20,20 +38,47 @@ def add_paragraph(
     session: Session = Depends(get_session)
 ):
     paragraph = create_paragraph(session, paragraph_in, user_id)
-    return {"data": paragraph}
+    return {"data": paragraph_payload(paragraph)}
 
 @router.get("/paragraphs/{paragraph_id}", response_model=dict)
-def get_paragraph(paragraph_id: int, session: Session = Depends(get_session)):
+def get_paragraph(paragraph_id: int, session: Session = Depends(read_session())):
     paragraph = get_paragraph_by_id(session, paragraph_id)
     if not paragraph:
         raise HTTPException(status_code=404, detail="Paragraph not found")
     
-    return {"data": paragraph}
+    return {"data": paragraph_payload(paragraph)}
 
 @router.get("/stories/{story_id}/paragraphs", response_model=dict)
-def get_story_paragraphs(story_id: int, session: Session = Depends(get_session)):
-    paragraphs = get_paragraphs_by_story(session, story_id)
-    return {"data": paragraphs}
+def get_story_paragraphs(
+    story_id: int,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
+    inline_drawings: bool = Query(True),
+    session: Session = Depends(read_session())
+):
+    try:
+        selected = parse_fields(fields, PARAGRAPH_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected is None and (view == "summary" or not inline_drawings):
+        selected = SUMMARY_FIELDS
+    
+    # drawing_key is always loaded so variant URLs can be built without the drawing itself
+    load = list(dict.fromkeys(selected + ["drawing_key"])) if selected else None
+    paragraphs = get_paragraphs_by_story(session, story_id, load)
+    return {"data": [paragraph_payload(p, selected) for p in paragraphs]}
+
+@router.put("/stories/{story_id}/paragraphs/order", response_model=dict)
+def reorder_story_paragraphs(
+    story_id: int,
+    reorder: ParagraphReorder,
+    session: Session = Depends(get_session)
+):
+    new_order = reorder_paragraphs(session, story_id, reorder.paragraph_ids)
+    if new_order is None:
+        raise HTTPException(status_code=400, detail="paragraph_ids must be distinct paragraphs of this story")
+    
+    return {"data": [{"id": pid, "order": order} for pid, order in new_order.items()]}
 
 @router.patch("/paragraphs/{paragraph_id}", response_model=dict)
 def update_paragraph_endpoint(
@@ -45,7 +90,7 @@ def update_paragraph_endpoint(
     if not updated_paragraph:
         raise HTTPException(status_code=404, detail="Paragraph not found")
     
-    return {"data": updated_paragraph}
+    return {"data": paragraph_payload(updated_paragraph)}
 
 @router.delete("/paragraphs/{paragraph_id}", response_model=dict)
 def delete_paragraph_endpoint(paragraph_id: int, session: Session = Depends(get_session)):
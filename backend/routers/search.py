@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from core.search import search_paragraphs, search_stories, search_supported
+from database import get_session, engine
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("", response_model=dict)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: str = Query("all", pattern="^(all|stories|paragraphs)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    if not search_supported(engine):
+        raise HTTPException(status_code=501, detail="Search is not available for this database")
+    
+    offset = (page - 1) * page_size
+    result = {"page": page, "page_size": page_size}
+    if type in ("all", "stories"):
+        total, items = search_stories(session, q, page_size, offset)
+        result["stories"] = {"total": total, "items": items}
+    if type in ("all", "paragraphs"):
+        total, items = search_paragraphs(session, q, page_size, offset)
+        result["paragraphs"] = {"total": total, "items": items}
+    
+    return {"data": result}
@@ -0,0 +1,88 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import Session
+from database import get_session
+from routers.auth import get_current_user
+from schemas.simulation import SimulationCreate, SwitchChange, ResistanceChange
+from crud.circuit import get_circuit_by_id
+from core.blobs import load_compiled
+from core.circuit import CircuitError, compile_components
+from core import simulation
+
+router = APIRouter(prefix="/api/simulations", tags=["simulations"])
+
+def _payload(session_id: str, sim: simulation.ElectricSimulation, started: float) -> dict:
+    result = sim.result()
+    result["session_id"] = session_id
+    result["solve_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return {"data": result}
+
+def _require(session_id: str, user) -> simulation.ElectricSimulation:
+    sim = simulation.get_session(session_id, user.id)
+    if sim is None:
+        raise HTTPException(status_code=404, detail="Simulation session not found or expired")
+    return sim
+
+@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+def start_simulation(
+    body: SimulationCreate,
+    current_user=Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    if body.circuit_id is not None:
+        circuit = get_circuit_by_id(session, body.circuit_id, current_user.id)
+        if not circuit:
+            raise HTTPException(status_code=404, detail="Circuit not found")
+        compiled = load_compiled(session.connection(), circuit.data_hash) if circuit.data_hash else None
+        session.commit()
+        if compiled is None:
+            raise HTTPException(status_code=400, detail="Circuit has no valid compiled form")
+    elif body.components is not None:
+        try:
+            compiled = compile_components(body.components)
+        except CircuitError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail="Provide circuit_id or components")
+    
+    started = time.perf_counter()
+    try:
+        session_id = simulation.create_session(compiled, current_user.id)
+    except simulation.SimulationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _payload(session_id, simulation.get_session(session_id, current_user.id), started)
+
+@router.get("/{session_id}", response_model=dict)
+def get_simulation(session_id: str, current_user=Depends(get_current_user)):
+    sim = _require(session_id, current_user)
+    started = time.perf_counter()
+    with sim.lock:
+        return _payload(session_id, sim, started)
+
+@router.post("/{session_id}/switch", response_model=dict)
+def toggle_switch(session_id: str, change: SwitchChange, current_user=Depends(get_current_user)):
+    sim = _require(session_id, current_user)
+    started = time.perf_counter()
+    with sim.lock:
+        try:
+            sim.set_switch(change.component, change.is_on)
+        except simulation.SimulationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _payload(session_id, sim, started)
+
+@router.post("/{session_id}/resistance", response_model=dict)
+def change_resistance(session_id: str, change: ResistanceChange, current_user=Depends(get_current_user)):
+    sim = _require(session_id, current_user)
+    started = time.perf_counter()
+    with sim.lock:
+        try:
+            sim.set_resistance(change.component, change.ohm)
+        except simulation.SimulationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _payload(session_id, sim, started)
+
+@router.delete("/{session_id}", response_model=dict)
+def stop_simulation(session_id: str, current_user=Depends(get_current_user)):
+    if not simulation.close_session(session_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Simulation session not found or expired")
+    return {"data": {"deleted": True}}
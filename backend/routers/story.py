@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import Session
-from typing import List
+from typing import List, Optional
 
-from schemas.story import StoryCreate, StoryRead, StoryUpdate
+from schemas.story import StoryCreate, StoryRead, StoryUpdate, StorySummary
 from crud.story import create_story, get_all_stories, get_story_by_id, update_story, delete_story
 from crud.class_crud import remove_story_from_class, get_all_classes
+from core.replicas import read_session
 from database import get_session
+from utils import parse_fields
 
 router = APIRouter(prefix="/api/stories", tags=["stories"])
 
+STORY_FIELDS = list(StoryRead.model_fields)
+
 @router.get("", response_model=dict)
-def get_stories(session: Session = Depends(get_session)):
-    stories = get_all_stories(session)
-    return {"data": stories}
+def get_stories(
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
+    session: Session = Depends(read_session())
+):
+    try:
+        selected = parse_fields(fields, STORY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected is None and view == "summary":
+        selected = list(StorySummary.model_fields)
+    
+    stories = get_all_stories(session, selected)
+    if selected is None:
+        return {"data": stories}
+    return {"data": [{field: getattr(story, field) for field in selected} for story in stories]}
 
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 def create_story_endpoint(story_in: StoryCreate, session: Session = Depends(get_session)):
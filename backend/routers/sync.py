@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from database import get_session
+from routers.auth import get_current_user
+from schemas.sync import SyncPush
+from crud.sync import get_changes, apply_changes
+from core import autosave
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+@router.get("", response_model=dict)
+def pull_changes(
+    since: Optional[int] = Query(None, ge=0),
+    current_user=Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    autosave.flush()
+    return {"data": get_changes(session, current_user.id, since)}
+
+@router.post("", response_model=dict)
+def push_changes(
+    push: SyncPush,
+    since: Optional[int] = Query(None, ge=0),
+    current_user=Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    autosave.flush()
+    result = apply_changes(session, current_user.id, push)
+    # Passing the previous cursor returns the server-side delta in the same round trip
+    if since is not None:
+        result["changes"] = get_changes(session, current_user.id, since)
+    return {"data": result}
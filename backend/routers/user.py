@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from typing import List
 
 from schemas.user import UserRead, UserUpdate
-from crud.user import get_all_users, get_user_by_id, update_user, delete_user
-from crud.class_crud import get_all_classes, delete_class
-from database import get_session
+from crud.user import get_all_users, get_user_by_id, update_user, delete_user_with_classes
+from core.jobs import enqueue
+from crud.tenant import sync_directory
+from database import current_tenant, get_session
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -15,21 +17,28 @@ def get_users(session: Session = Depends(get_session)):
     return {"data": users}
 
 @router.delete("/{user_id}", response_model=dict)
-def delete_user_endpoint(user_id: int, session: Session = Depends(get_session)):
+def delete_user_endpoint(
+    user_id: int,
+    background: bool = Query(False),
+    session: Session = Depends(get_session)
+):
     user = get_user_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # If teacher, delete their classes
-    if user.type == "teacher":
-        classes = get_all_classes(session)
-        for class_obj in classes:
-            if class_obj.teacher_id == user_id:
-                delete_class(session, class_obj.id)
+    if background:
+        job = enqueue(session, "delete_user", {"user_id": user_id})
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"data": {"job_id": job.id, "status_url": f"/api/jobs/{job.id}"}}
+        )
     
-    success = delete_user(session, user_id)
+    # Teachers' classes are deleted along with them
+    email = user.email
+    success = delete_user_with_classes(session, user_id)
     if not success:
         raise HTTPException(status_code=400, detail="Could not delete user")
+    sync_directory(email)
     
     return {"data": user_id}
 
@@ -39,8 +48,12 @@ def update_user_endpoint(
     user_update: UserUpdate, 
     session: Session = Depends(get_session)
 ):
+    user = get_user_by_id(session, user_id)
+    old_email = user.email if user else None
     updated_user = update_user(session, user_id, user_update)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
+    if updated_user.email != old_email:
+        sync_directory(old_email, updated_user.email, updated_user.code, current_tenant())
     
     return {"data": updated_user}
\ No newline at end of file
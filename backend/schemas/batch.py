@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class BatchOperation(BaseModel):
+    method: str = Field(pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str
+    body: Optional[Any] = None
+    headers: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=100)
+    atomic: bool = True
+
+class BatchResult(BaseModel):
+    status: int
+    body: Optional[Any] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Optional
 
 class ChallengeCreate(BaseModel):
     title: str
@@ -48,3 +48,14 @@ class LeaderboardEntry(BaseModel):
     username: str
     total_points: int
     challenges_completed: int
+
+
+class ReferenceCircuit(BaseModel):
+    components: Optional[List[Dict[str, Any]]] = None  # A reference logic circuit, or
+    inputs: Optional[int] = Field(None, ge=1, le=32)  # the number of inputs and
+    # one expression per output over x0..xN, e.g. "x0 ^ x1"
+    outputs: Optional[List[Annotated[str, Field(max_length=1000)]]] = Field(None, min_length=1, max_length=32)
+
+
+class GradeRequest(BaseModel):
+    components: Optional[List[Dict[str, Any]]] = None  # Defaults to the saved attempt
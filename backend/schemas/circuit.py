@@ -1,6 +1,13 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 class CircuitCreate(BaseModel):
     name: str
     components: List[Dict[str, Any]]
+
+class CircuitSummary(BaseModel):
+    id: int
+    name: str
+    updated_at: Optional[datetime] = None
+    preview_url: Optional[str] = None
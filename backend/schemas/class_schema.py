@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 from schemas.user import UserRead
 from schemas.story import StoryRead
 
@@ -37,4 +37,10 @@ class FinalizedStoryCreate(SQLModel):
     images: List[str] = []
 
 class FinalizedStoryImageAdd(SQLModel):
-    image: str
\ No newline at end of file
+    image: str
+
+class StoryAssignmentCreate(SQLModel):
+    mode: str = "round_robin"  # "round_robin" or "explicit"
+    excerpt_count: Optional[int] = None  # Defaults to the number of students in the class
+    excerpts: Optional[List[str]] = None  # Already split excerpts; skips server-side splitting
+    assignments: Dict[int, int] = {}  # Excerpt index -> student id, used by "explicit"
@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel
+from typing import Optional, Any
+from datetime import datetime
+
+class JobRead(SQLModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel
-from typing import Optional
+from typing import Optional, Dict, List
 
 class ParagraphCreate(SQLModel):
     story_id: int
@@ -13,10 +13,22 @@ class ParagraphUpdate(SQLModel):
     drawing: Optional[str] = None
     order: Optional[int] = None
 
+class ParagraphReorder(SQLModel):
+    # Full or partial: listed paragraphs are rearranged among the positions they already hold
+    paragraph_ids: List[int]
+
 class ParagraphRead(SQLModel):
     id: int
     story_id: int
     user_id: int
     content: str
     drawing: Optional[str] = None
-    order: int
\ No newline at end of file
+    order: int
+
+class ParagraphSummary(SQLModel):
+    id: int
+    story_id: int
+    user_id: int
+    content: str
+    order: int
+    drawing_urls: Optional[Dict[str, str]] = None
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Union
+
+class SimulationCreate(BaseModel):
+    circuit_id: Optional[int] = None  # A saved circuit, or
+    components: Optional[List[Dict[str, Any]]] = None  # the editor's current components
+
+class SwitchChange(BaseModel):
+    component: Union[int, str]  # Index in the circuit or the component's id
+    is_on: Optional[bool] = None  # Omitted: toggle
+
+class ResistanceChange(BaseModel):
+    component: Union[int, str]
+    ohm: float = Field(gt=0)
@@ -20,4 +20,11 @@ class StoryRead(SQLModel):
     author: str
     short_description: str
     content: str
-    is_finished: bool
\ No newline at end of file
+    is_finished: bool
+
+class StorySummary(SQLModel):
+    id: int
+    title: str
+    author: str
+    short_description: str
+    is_finished: bool
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class CircuitChange(BaseModel):
+    id: Optional[int] = None  # Omitted for circuits created offline
+    client_ref: Optional[str] = None  # Echoed back so the client can map its local id to the new one
+    name: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+    deleted: bool = False
+    base_revision: Optional[int] = None  # Revision the client last saw; newer server rows win
+
+
+class AttemptChange(BaseModel):
+    challenge_id: int
+    data: Optional[Dict[str, Any]] = None
+    deleted: bool = False
+    base_revision: Optional[int] = None
+
+
+class SyncPush(BaseModel):
+    circuits: List[CircuitChange] = []
+    attempts: List[AttemptChange] = []
@@ -0,0 +1,6 @@
+from sqlmodel import SQLModel
+from typing import Optional
+
+class TenantCreate(SQLModel):
+    id: str  # Lowercase letters, digits, "-" and "_"
+    name: Optional[str] = None
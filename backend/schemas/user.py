@@ -7,6 +7,7 @@ class UserCreate(SQLModel):
     email: str
     password: str
     type: str = "student"  # "student" or "teacher"
+    school: Optional[str] = None  # Tenant id; defaults to the registering user's school
 
 class UserUpdate(SQLModel):
     name: Optional[str] = None
@@ -1,7 +1,67 @@
 import random
+import re
 import string
+from bisect import bisect_left
+from typing import Iterable, List, Optional
 
 def generate_unique_code(length: int = 8) -> str:
     """Generate a random alphanumeric code of specified length"""
     characters = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
\ No newline at end of file
+    return ''.join(random.choice(characters) for _ in range(length))
+
+def parse_fields(raw: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Parse a comma separated ?fields= value, always keeping "id" first"""
+    if not raw:
+        return None
+    allowed = list(allowed)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(fields) if field != "id"]
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, then whitespace
+_SENTENCE_BREAK = re.compile(r"[.!?\u2026]+[\"'\u00bb\u201d\u2019)\]]*\s+")
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+def split_into_excerpts(text: str, count: int) -> List[str]:
+    """Split text into at most `count` excerpts of similar length, cutting only between sentences"""
+    sentences = split_sentences(text)
+    count = min(count, len(sentences))
+    if count <= 0:
+        return []
+
+    # cumulative[i] = characters in the first i + 1 sentences
+    cumulative = []
+    total = 0
+    for sentence in sentences:
+        total += len(sentence) + 1
+        cumulative.append(total)
+
+    # Cut after the sentence whose running total is closest to k/count of the text,
+    # keeping at least one sentence in every excerpt
+    cuts = []
+    previous = 0
+    for k in range(1, count):
+        target = total * k / count
+        index = bisect_left(cumulative, target)
+        if index > 0 and index < len(cumulative) and target - cumulative[index - 1] < cumulative[index] - target:
+            index -= 1
+        cut = min(max(index + 1, previous + 1), len(sentences) - (count - k))
+        cuts.append(cut)
+        previous = cut
+
+    bounds = [0] + cuts + [len(sentences)]
+    return [" ".join(sentences[a:b]) for a, b in zip(bounds, bounds[1:])]
@@ -0,0 +1,18 @@
+import signal
+import threading
+
+import core.tasks  # noqa: F401  registers job handlers
+from core import startup
+from core.jobs import JOB_WORKERS, start_workers, stop_workers
+from database import create_db_and_tables
+
+# Runs job workers in their own process, e.g. next to uvicorn started with JOB_WORKERS=0
+if __name__ == "__main__":
+    create_db_and_tables()
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    start_workers(max(JOB_WORKERS, 1))
+    startup.timings.report()
+    stopped.wait()
+    stop_workers()